@@ -24,9 +24,10 @@ ARISING IN ANY WAY OUT OF THE USE OF THE SOFTWARE CODE, EVEN IF ADVISED OF THE
 POSSIBILITY OF SUCH DAMAGE.
 """
 
-import os, json, azureml.core
+import os, sys, json, azureml.core
 from azureml.core import Workspace, Experiment, ContainerRegistry, Environment
 from azureml.core.compute import ComputeTarget
+from azureml.core.model import Model
 from azureml.core.runconfig import MpiConfiguration, TensorflowConfiguration
 from azureml.core.authentication import AzureCliAuthentication
 from azureml.train.dnn import Chainer, PyTorch, TensorFlow, Gloo, Nccl
@@ -87,6 +88,29 @@ elif experiment_settings["distributed_training"]["backend_config"] == "nccl":
 else:
     distrib_training_backend = None
 
+# Download production model for incremental retraining
+script_parameters = experiment_settings["script_parameters"]
+if experiment_settings["warm_start"]["use_warm_start"] and ("--data" not in script_parameters or "--cache-dir" in script_parameters):
+    # train.py only continues the statistics of an earlier training on --data
+    print("Warm start requires --data and no --cache-dir in the script_parameters, training from scratch")
+elif experiment_settings["warm_start"]["use_warm_start"]:
+    print("Downloading production model for warm start")
+    model_settings = settings["deployment"]["model"]
+    try:
+        production_model = Model(workspace=ws, name=model_settings["name"])
+        production_model.download(target_dir=os.path.join(experiment_settings["source_directory"], "warm_start"), exist_ok=True)
+        experiment_settings["script_parameters"]["--warm-start"] = "/".join(["warm_start", model_settings["path"], experiment_settings["warm_start"]["artifact_name"]])
+        print("Warm start from production model version {}".format(production_model.version))
+    except Exception:
+        print("No production model found, training from scratch")
+
+# Check the script parameters with the parser of train.py before submitting
+if experiment_settings["entry_script"] == "train.py":
+    print("Checking script parameters")
+    sys.path.insert(0, experiment_settings["source_directory"])
+    from options import parse_args
+    parse_args([str(value) for item in experiment_settings["script_parameters"].items() for value in item])
+
 # Create Estimator for Experiment
 print("Creating Estimator object according to settings")
 if experiment_settings["framework"]["name"] == "chainer":
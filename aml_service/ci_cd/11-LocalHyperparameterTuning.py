@@ -0,0 +1,89 @@
+"""
+Copyright (C) Microsoft Corporation. All rights reserved.​
+ ​
+Microsoft Corporation (“Microsoft”) grants you a nonexclusive, perpetual,
+royalty-free right to use, copy, and modify the software code provided by us
+("Software Code"). You may not sublicense the Software Code or any use of it
+(except to your affiliates and to vendors to perform work on your behalf)
+through distribution, network access, service agreement, lease, rental, or
+otherwise. This license does not purport to express any claim of ownership over
+data you may have shared with Microsoft in the creation of the Software Code.
+Unless applicable law gives you more rights, Microsoft reserves all other
+rights not expressly granted herein, whether by implication, estoppel or
+otherwise. ​
+ ​
+THE SOFTWARE CODE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+MICROSOFT OR ITS LICENSORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ARISING IN ANY WAY OUT OF THE USE OF THE SOFTWARE CODE, EVEN IF ADVISED OF THE
+POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import os, json, sys, argparse
+from helper.local_search import LocalHyperparameterSearch, get_sampler, get_policy
+
+print("Current directory: " + os.getcwd())
+
+# Parse Arguments
+print("Parsing arguments")
+parser = argparse.ArgumentParser(description="Azure Machine Learning Service - CI/CD")
+parser.add_argument("--max-concurrent-runs", type=int, dest="max_concurrent_runs", default=None, help="Number of trials running in parallel, defaults to max_concurrent_runs of the settings")
+parser.add_argument("--max-total-runs", type=int, dest="max_total_runs", default=None, help="Number of trials, defaults to max_total_runs of the settings")
+parser.add_argument("--seed", type=int, dest="seed", default=None, help="Seed of the parameter sampling")
+parser.add_argument("--output-directory", type=str, dest="output_directory", default=os.path.join("aml_service", "local_search"), help="Folder with one working directory per trial")
+args = parser.parse_args()
+
+# Load settings
+print("Loading settings")
+with open(os.path.join("aml_service", "settings.json")) as f:
+    settings = json.load(f)
+experiment_settings = settings["experiment"]
+hyperparameter_settings = experiment_settings["hyperparameter_sampling"]
+
+if not hyperparameter_settings["primary_metric_name"]:
+    print("No primary_metric_name defined in the hyperparameter_sampling settings")
+    sys.exit(1)
+
+# Create sampler and early termination policy
+print("Creating parameter sampler and early termination policy")
+goal = hyperparameter_settings["primary_metric_goal"].lower()
+sampler = get_sampler(sampling_method=(hyperparameter_settings["method"] or "random").lower(),
+                      parameter_settings=hyperparameter_settings["parameters"],
+                      goal=goal,
+                      seed=args.seed)
+policy = get_policy(policy_settings=hyperparameter_settings["policy"], goal=goal)
+
+# Run the trials as local processes
+print("Running local hyperparameter search")
+search = LocalHyperparameterSearch(
+    entry_script=os.path.join(experiment_settings["source_directory"], experiment_settings["entry_script"]),
+    script_parameters=experiment_settings["script_parameters"],
+    sampler=sampler,
+    policy=policy,
+    primary_metric_name=hyperparameter_settings["primary_metric_name"],
+    goal=goal,
+    max_total_runs=args.max_total_runs or hyperparameter_settings["max_total_runs"],
+    max_concurrent_runs=args.max_concurrent_runs or hyperparameter_settings["max_concurrent_runs"],
+    max_duration_minutes=hyperparameter_settings["max_duration_minutes"],
+    output_directory=args.output_directory
+)
+best_trial = search.run()
+
+# Write out the results of all trials
+results = {"best_trial": best_trial.to_dict() if best_trial else None,
+           "trials": [trial.to_dict() for trial in search.trials]}
+results_path = os.path.join(args.output_directory, "local_search_results.json")
+with open(results_path, "w") as f:
+    json.dump(results, f, indent=4)
+print("Results of {} trials written to {}".format(len(search.trials), results_path))
+
+if best_trial is None:
+    print("No trial completed successfully")
+    sys.exit(1)
+print("Best trial {} with {} {} and parameters {}".format(best_trial.trial_id, hyperparameter_settings["primary_metric_name"],
+                                                          best_trial.metrics[-1], best_trial.parameters))
@@ -28,6 +28,8 @@ from azureml.core import Workspace, Experiment, Run
 from azureml.core.model import Model
 from azureml.core.authentication import AzureCliAuthentication
 
+PROFILE_FILE_NAME = "dataset_profile.artifact"
+
 # Load the JSON settings file and relevant section
 print("Loading settings")
 with open(os.path.join("aml_service", "settings.json")) as f:
@@ -98,10 +100,20 @@ if promote_new_model:
     print("Registering new Model, because it performs better")
     tags = deployment_settings["model"]["tags"]
     tags["run_id"] = run.id
+    # The dataset profile written by train.py is registered as part of the model folder,
+    # where score.py loads it under the same file name. The property only tells
+    # 30-ProfileModel.py whether the registered model has a profile
+    properties = dict(deployment_settings["model"]["properties"])
+    profile_path = deployment_settings["model"]["path"] + "/" + PROFILE_FILE_NAME
+    if profile_path in run.get_file_names():
+        print("Registering dataset profile {} with the model".format(profile_path))
+        properties["dataset_profile"] = PROFILE_FILE_NAME
+    else:
+        print("Run has no dataset profile")
     model = run.register_model(model_name=deployment_settings["model"]["name"],
                                model_path=deployment_settings["model"]["path"],
                                tags=tags,
-                               properties=deployment_settings["model"]["properties"],
+                               properties=properties,
                                model_framework=deployment_settings["model"]["model_framework"],
                                model_framework_version=deployment_settings["model"]["model_framework_version"],
                                description=deployment_settings["model"]["description"],
@@ -105,6 +105,11 @@ print(registered_env.name, "Version: " + registered_env.version, sep="\n")
 # Profile model
 print("Profiling Model")
 test_sample = test_functions.get_test_data_sample()
+if model.properties.get("dataset_profile"):
+    # Requests at the quantiles of the training data instead of a single fixed row
+    print("Creating profiling requests from the dataset profile of the model")
+    model_path = model.download(target_dir=os.path.join("aml_service", "profile_model"), exist_ok=True)
+    test_sample = test_functions.get_profile_data_sample(os.path.join(model_path, model.properties["dataset_profile"]))
 profile = Model.profile(workspace=ws,
                         profile_name=deployment_settings["image"]["name"],
                         models=[model],
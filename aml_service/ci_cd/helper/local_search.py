@@ -0,0 +1,339 @@
+"""
+Copyright (C) Microsoft Corporation. All rights reserved.​
+ ​
+Microsoft Corporation (“Microsoft”) grants you a nonexclusive, perpetual,
+royalty-free right to use, copy, and modify the software code provided by us
+("Software Code"). You may not sublicense the Software Code or any use of it
+(except to your affiliates and to vendors to perform work on your behalf)
+through distribution, network access, service agreement, lease, rental, or
+otherwise. This license does not purport to express any claim of ownership over
+data you may have shared with Microsoft in the creation of the Software Code.
+Unless applicable law gives you more rights, Microsoft reserves all other
+rights not expressly granted herein, whether by implication, estoppel or
+otherwise. ​
+ ​
+THE SOFTWARE CODE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+MICROSOFT OR ITS LICENSORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ARISING IN ANY WAY OUT OF THE USE OF THE SOFTWARE CODE, EVEN IF ADVISED OF THE
+POSSIBILITY OF SUCH DAMAGE.
+"""
+import os, sys, json, math, time, itertools, subprocess
+import numpy as np
+
+COMPLETED = "Completed"
+FAILED = "Failed"
+CANCELED = "Canceled"
+RUNNING = "Running"
+
+
+class LocalSearchException(Exception):
+    pass
+
+
+def sample_parameter(parameter_name, parameter_setting, rng):
+    """
+    Draws one value from the distributions of the hyperparameter_sampling
+    settings with the semantics of azureml.train.hyperdrive.
+    """
+    distribution = parameter_setting["distribution"]
+    parameters = parameter_setting["parameters"]
+    if distribution == "choice":
+        return parameters["options"][rng.randint(len(parameters["options"]))]
+    elif distribution == "randint":
+        return int(rng.randint(parameters["upper"]))
+    elif distribution in ("uniform", "quniform", "loguniform", "qloguniform"):
+        value = rng.uniform(parameters["min_value"], parameters["max_value"])
+    elif distribution in ("normal", "qnormal", "lognormal", "qlognormal"):
+        value = rng.normal(parameters["mu"], parameters["sigma"])
+    else:
+        raise LocalSearchException("Parameter distribution for parameter {} not defined in settings. Please choose between 'choice', 'randint', 'uniform', 'quniform', 'loguniform', 'qloguniform', 'normal', 'qnormal', 'lognormal' and 'qlognormal'".format(parameter_name))
+    if "log" in distribution:
+        value = math.exp(value)
+    if distribution.startswith("q"):
+        value = round(value / parameters["q"]) * parameters["q"]
+    return float(value)
+
+
+def encode_parameter(value, parameter_setting):
+    """
+    Maps a parameter value into [0, 1] for the surrogate model of the bayesian sampler.
+    """
+    distribution = parameter_setting["distribution"]
+    parameters = parameter_setting["parameters"]
+    if distribution == "choice":
+        options = parameters["options"]
+        return options.index(value) / float(max(len(options) - 1, 1))
+    elif distribution == "randint":
+        return value / float(max(parameters["upper"] - 1, 1))
+    if "log" in distribution:
+        value = math.log(max(value, 1e-300))
+    if "uniform" in distribution:
+        return (value - parameters["min_value"]) / float(parameters["max_value"] - parameters["min_value"])
+    return 0.5 * (1 + math.erf((value - parameters["mu"]) / (parameters["sigma"] * math.sqrt(2))))
+
+
+class RandomSampler(object):
+    def __init__(self, parameter_settings, seed=None):
+        self.parameter_settings = parameter_settings
+        self.rng = np.random.RandomState(seed)
+
+    def sample(self):
+        return {name: sample_parameter(name, setting, self.rng) for name, setting in self.parameter_settings.items()}
+
+    def suggest(self, trials):
+        return self.sample()
+
+
+class GridSampler(object):
+    def __init__(self, parameter_settings, seed=None):
+        for name, setting in parameter_settings.items():
+            if setting["distribution"] != "choice":
+                raise LocalSearchException("Grid sampling only supports 'choice' distributions, parameter {} uses '{}'".format(name, setting["distribution"]))
+        names = list(parameter_settings)
+        self._grid = iter([dict(zip(names, values)) for values in itertools.product(*[parameter_settings[name]["parameters"]["options"] for name in names])])
+
+    def suggest(self, trials):
+        return next(self._grid, None)
+
+
+class BayesianSampler(RandomSampler):
+    """
+    Gaussian process with expected improvement over random candidates. The
+    first trials are sampled randomly until there is enough data to fit it.
+    Running trials are added with the worst observed metric (a constant
+    liar), so that trials started in the same round get different
+    suggestions instead of all the point with the highest improvement.
+    """
+    def __init__(self, parameter_settings, goal, seed=None, candidates=500, length_scale=0.2):
+        super(BayesianSampler, self).__init__(parameter_settings, seed)
+        self.sign = -1.0 if goal == "max" else 1.0
+        self.candidates = candidates
+        self.length_scale = length_scale
+        self.initial_trials = max(3, 2 * len(parameter_settings))
+
+    def encode(self, parameters):
+        return [encode_parameter(parameters[name], setting) for name, setting in self.parameter_settings.items()]
+
+    def suggest(self, trials):
+        observed = [trial for trial in trials if trial.status in (COMPLETED, CANCELED) and trial.metrics]
+        if len(observed) < self.initial_trials:
+            return self.sample()
+        pending = [trial for trial in trials if trial.status == RUNNING]
+        X = np.array([self.encode(trial.parameters) for trial in observed + pending])
+        y = self.sign * np.array([trial.metrics[-1] for trial in observed])
+        y_mean, y_std = y.mean(), y.std() or 1.0
+        y = (y - y_mean) / y_std
+        y = np.append(y, np.full(len(pending), y.max()))
+        candidates = [self.sample() for _ in range(self.candidates)]
+        C = np.array([self.encode(candidate) for candidate in candidates])
+
+        kernel = lambda A, B: np.exp(-((A[:, np.newaxis, :] - B[np.newaxis, :, :]) ** 2).sum(axis=2) / (2 * self.length_scale ** 2))
+        L = np.linalg.cholesky(kernel(X, X) + 1e-6 * np.eye(len(X)))
+        alpha = np.linalg.solve(L.T, np.linalg.solve(L, y))
+        K_c = kernel(C, X)
+        mean = K_c.dot(alpha)
+        v = np.linalg.solve(L, K_c.T)
+        std = np.sqrt(np.maximum(1.0 - (v ** 2).sum(axis=0), 1e-12))
+
+        # Expected improvement over the best (lowest) normalized metric
+        z = (y.min() - mean) / std
+        cdf = 0.5 * (1 + np.vectorize(math.erf)(z / math.sqrt(2)))
+        pdf = np.exp(-0.5 * z ** 2) / math.sqrt(2 * math.pi)
+        return candidates[int(np.argmax((y.min() - mean) * cdf + std * pdf))]
+
+
+def get_sampler(sampling_method, parameter_settings, goal, seed=None):
+    if "random" in sampling_method:
+        return RandomSampler(parameter_settings, seed)
+    elif "grid" in sampling_method:
+        return GridSampler(parameter_settings, seed)
+    elif "bayesian" in sampling_method:
+        return BayesianSampler(parameter_settings, goal, seed)
+    raise LocalSearchException("Parameter Sampling Method not defined in settings. Please choose between 'random', 'grid' and 'bayesian'")
+
+
+class EarlyTerminationPolicy(object):
+    """
+    Base class of the local early termination policies. A running trial is
+    evaluated every evaluation_interval reports of the primary metric, after
+    the first delay_evaluation reports.
+    """
+    def __init__(self, goal, evaluation_interval=1, delay_evaluation=0):
+        self.goal = goal
+        self.evaluation_interval = max(evaluation_interval, 1)
+        self.delay_evaluation = delay_evaluation
+
+    def is_better(self, a, b):
+        return a > b if self.goal == "max" else a < b
+
+    def should_terminate(self, trial, trials):
+        reports = len(trial.metrics)
+        if reports <= self.delay_evaluation or reports % self.evaluation_interval:
+            return False
+        peers = [other for other in trials if other is not trial and len(other.metrics) >= reports]
+        return self.evaluate(trial, peers, reports)
+
+    def evaluate(self, trial, peers, reports):
+        return False
+
+
+class BanditPolicy(EarlyTerminationPolicy):
+    def __init__(self, goal, evaluation_interval=1, delay_evaluation=0, slack_factor=None, slack_amount=None):
+        super(BanditPolicy, self).__init__(goal, evaluation_interval, delay_evaluation)
+        self.slack_factor = slack_factor
+        self.slack_amount = slack_amount
+
+    def evaluate(self, trial, peers, reports):
+        if not peers:
+            return False
+        values = [peer.metrics[reports - 1] for peer in peers]
+        best = max(values) if self.goal == "max" else min(values)
+        value = trial.metrics[reports - 1]
+        if self.slack_factor is not None:
+            limit = best / (1 + self.slack_factor) if self.goal == "max" else best * (1 + self.slack_factor)
+        else:
+            limit = best - self.slack_amount if self.goal == "max" else best + self.slack_amount
+        return self.is_better(limit, value)
+
+
+class MedianStoppingPolicy(EarlyTerminationPolicy):
+    def evaluate(self, trial, peers, reports):
+        if not peers:
+            return False
+        median = np.median([np.mean(peer.metrics[:reports]) for peer in peers])
+        return self.is_better(median, np.mean(trial.metrics[:reports]))
+
+
+class TruncationSelectionPolicy(EarlyTerminationPolicy):
+    def __init__(self, goal, evaluation_interval=1, delay_evaluation=0, truncation_percentage=5):
+        super(TruncationSelectionPolicy, self).__init__(goal, evaluation_interval, delay_evaluation)
+        self.truncation_percentage = truncation_percentage
+
+    def evaluate(self, trial, peers, reports):
+        values = sorted([peer.metrics[reports - 1] for peer in peers] + [trial.metrics[reports - 1]], reverse=self.goal == "max")
+        truncated = int(len(values) * self.truncation_percentage / 100.0)
+        return truncated > 0 and not self.is_better(trial.metrics[reports - 1], values[-truncated])
+
+
+def get_policy(policy_settings, goal):
+    if "bandit" in policy_settings["name"]:
+        return BanditPolicy(goal, policy_settings["evaluation_interval"], policy_settings["delay_evaluation"],
+                            slack_factor=policy_settings["bandit"]["slack_factor"],
+                            slack_amount=policy_settings["bandit"]["slack_amount"])
+    elif "medianstopping" in policy_settings["name"]:
+        return MedianStoppingPolicy(goal, policy_settings["evaluation_interval"], policy_settings["delay_evaluation"])
+    elif "truncationselection" in policy_settings["name"]:
+        return TruncationSelectionPolicy(goal, policy_settings["evaluation_interval"], policy_settings["delay_evaluation"],
+                                         truncation_percentage=policy_settings["truncationselection"]["truncation_percentage"])
+    return EarlyTerminationPolicy(goal)
+
+
+class Trial(object):
+    def __init__(self, trial_id, parameters, directory):
+        self.trial_id = trial_id
+        self.parameters = parameters
+        self.directory = directory
+        self.metrics_file = os.path.join(directory, "metrics.jsonl")
+        self.metrics = []
+        self.status = RUNNING
+        self.process = None
+        self.start = None
+        self.end = None
+
+    def read_metrics(self, metric_name):
+        if not os.path.exists(self.metrics_file):
+            return
+        with open(self.metrics_file) as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        self.metrics = [record["value"] for record in records if record["name"] == metric_name]
+
+    def to_dict(self):
+        return {"trial_id": self.trial_id, "parameters": self.parameters, "status": self.status,
+                "metric": self.metrics[-1] if self.metrics else None, "reports": len(self.metrics),
+                "duration_seconds": round(self.end - self.start, 3) if self.end else None, "directory": self.directory}
+
+
+class LocalHyperparameterSearch(object):
+    """
+    Runs trials of an entry script as local processes, at most
+    max_concurrent_runs at a time. Every trial gets its own working
+    directory, its sampled parameters as '--name value' arguments and the
+    RUN_TRACKING_* environment variables of the local run tracking of
+    train.py, which make it write every metric immediately to the JSON
+    lines file read while the trial is running.
+    """
+    def __init__(self, entry_script, script_parameters, sampler, policy, primary_metric_name, goal,
+                 max_total_runs, max_concurrent_runs, max_duration_minutes, output_directory, poll_seconds=0.2):
+        self.entry_script = os.path.abspath(entry_script)
+        self.script_parameters = script_parameters
+        self.sampler = sampler
+        self.policy = policy
+        self.primary_metric_name = primary_metric_name
+        self.goal = goal
+        self.max_total_runs = max_total_runs
+        self.max_concurrent_runs = max(max_concurrent_runs, 1)
+        self.max_duration_seconds = max_duration_minutes * 60
+        self.output_directory = os.path.abspath(output_directory)
+        self.poll_seconds = poll_seconds
+        self.trials = []
+
+    def run(self):
+        start = time.time()
+        exhausted = False
+        while True:
+            running = [trial for trial in self.trials if trial.status == RUNNING]
+            timed_out = time.time() - start > self.max_duration_seconds
+            while not exhausted and not timed_out and len(running) < self.max_concurrent_runs and len(self.trials) < self.max_total_runs:
+                parameters = self.sampler.suggest(self.trials)
+                if parameters is None:
+                    exhausted = True
+                    break
+                running.append(self._start_trial(parameters))
+            if not running:
+                break
+            time.sleep(self.poll_seconds)
+            for trial in running:
+                self._update_trial(trial, timed_out)
+        return self.best_trial()
+
+    def best_trial(self):
+        completed = [trial for trial in self.trials if trial.status == COMPLETED and trial.metrics]
+        if not completed:
+            return None
+        key = lambda trial: trial.metrics[-1]
+        return max(completed, key=key) if self.goal == "max" else min(completed, key=key)
+
+    def _start_trial(self, parameters):
+        trial = Trial(len(self.trials), parameters, os.path.join(self.output_directory, "trial_{}".format(len(self.trials))))
+        os.makedirs(trial.directory, exist_ok=True)
+        arguments = [sys.executable, self.entry_script]
+        for name, value in list(self.script_parameters.items()) + [("--{}".format(name), value) for name, value in parameters.items()]:
+            arguments += [name, str(value)]
+        environment = dict(os.environ, RUN_TRACKING_BACKEND="jsonl", RUN_TRACKING_PATH=trial.metrics_file, RUN_TRACKING_BATCH_SIZE="1")
+        print("Starting trial {} with {}".format(trial.trial_id, parameters))
+        with open(os.path.join(trial.directory, "output.log"), "w") as log:
+            trial.process = subprocess.Popen(arguments, cwd=trial.directory, env=environment, stdout=log, stderr=subprocess.STDOUT)
+        trial.start = time.time()
+        self.trials.append(trial)
+        return trial
+
+    def _update_trial(self, trial, timed_out):
+        trial.read_metrics(self.primary_metric_name)
+        return_code = trial.process.poll()
+        if return_code is not None:
+            trial.status = COMPLETED if return_code == 0 else FAILED
+        elif timed_out or self.policy.should_terminate(trial, self.trials):
+            trial.process.terminate()
+            trial.process.wait()
+            trial.status = CANCELED
+        else:
+            return
+        trial.end = time.time()
+        print("Trial {} {} with {} {}".format(trial.trial_id, trial.status.lower(), self.primary_metric_name,
+                                              trial.metrics[-1] if trial.metrics else None))
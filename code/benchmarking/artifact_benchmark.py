@@ -0,0 +1,88 @@
+"""
+Copyright (C) Microsoft Corporation. All rights reserved.​
+ ​
+Microsoft Corporation (“Microsoft”) grants you a nonexclusive, perpetual,
+royalty-free right to use, copy, and modify the software code provided by us
+("Software Code"). You may not sublicense the Software Code or any use of it
+(except to your affiliates and to vendors to perform work on your behalf)
+through distribution, network access, service agreement, lease, rental, or
+otherwise. This license does not purport to express any claim of ownership over
+data you may have shared with Microsoft in the creation of the Software Code.
+Unless applicable law gives you more rights, Microsoft reserves all other
+rights not expressly granted herein, whether by implication, estoppel or
+otherwise. ​
+ ​
+THE SOFTWARE CODE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+MICROSOFT OR ITS LICENSORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ARISING IN ANY WAY OUT OF THE USE OF THE SOFTWARE CODE, EVEN IF ADVISED OF THE
+POSSIBILITY OF SUCH DAMAGE.
+"""
+import os, sys, json, timeit, tempfile
+import numpy as np
+import joblib
+from sklearn.datasets import load_diabetes
+from sklearn.linear_model import Ridge
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "training"))
+from artifact import write_artifact, read_artifact
+
+
+def diabetes_model():
+    X, y = load_diabetes(return_X_y=True)
+    return Ridge(alpha=0.5).fit(X, y)
+
+
+def wide_model():
+    # Multi-target model with a 1000 x 1000 coefficient matrix
+    rng = np.random.RandomState(42)
+    model = Ridge(alpha=0.5)
+    model.coef_ = rng.normal(size=(1000, 1000))
+    model.intercept_ = rng.normal(size=1000)
+    return model
+
+
+def formats(directory):
+    path = lambda name: os.path.join(directory, name)
+    arrays = lambda model: {"coef": model.coef_, "intercept": np.atleast_1d(model.intercept_)}
+    return [
+        ("joblib", path("model.pkl"),
+         lambda model: joblib.dump(model, path("model.pkl")),
+         lambda: joblib.load(path("model.pkl")).coef_),
+        ("joblib_compress_3", path("model_3.pkl"),
+         lambda model: joblib.dump(model, path("model_3.pkl"), compress=3),
+         lambda: joblib.load(path("model_3.pkl")).coef_),
+        ("artifact", path("model.artifact"),
+         lambda model: write_artifact(path("model.artifact"), arrays(model), {"alpha": 0.5}),
+         lambda: read_artifact(path("model.artifact"))[0]["coef"]),
+        ("artifact_no_verify", path("model.artifact"),
+         None,
+         lambda: read_artifact(path("model.artifact"), verify=False)[0]["coef"]),
+        ("artifact_zlib", path("model_zlib.artifact"),
+         lambda model: write_artifact(path("model_zlib.artifact"), arrays(model), {"alpha": 0.5}, compression="zlib"),
+         lambda: read_artifact(path("model_zlib.artifact"))[0]["coef"]),
+    ]
+
+
+def best_ms(function):
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return round(min(timer.repeat(repeat=5, number=number)) / number * 1000, 4)
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        for model_name, model in (("diabetes", diabetes_model()), ("wide", wide_model())):
+            result = {"model": model_name, "coefficients": int(np.size(model.coef_))}
+            for name, path, save, load in formats(directory):
+                if save is not None:
+                    result[name + "_save_ms"] = best_ms(lambda: save(model))
+                    result[name + "_bytes"] = os.path.getsize(path)
+                np.testing.assert_array_equal(load(), model.coef_)
+                result[name + "_load_ms"] = best_ms(load)
+            print(json.dumps(result))
@@ -0,0 +1,103 @@
+"""
+Copyright (C) Microsoft Corporation. All rights reserved.​
+ ​
+Microsoft Corporation (“Microsoft”) grants you a nonexclusive, perpetual,
+royalty-free right to use, copy, and modify the software code provided by us
+("Software Code"). You may not sublicense the Software Code or any use of it
+(except to your affiliates and to vendors to perform work on your behalf)
+through distribution, network access, service agreement, lease, rental, or
+otherwise. This license does not purport to express any claim of ownership over
+data you may have shared with Microsoft in the creation of the Software Code.
+Unless applicable law gives you more rights, Microsoft reserves all other
+rights not expressly granted herein, whether by implication, estoppel or
+otherwise. ​
+ ​
+THE SOFTWARE CODE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+MICROSOFT OR ITS LICENSORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ARISING IN ANY WAY OUT OF THE USE OF THE SOFTWARE CODE, EVEN IF ADVISED OF THE
+POSSIBILITY OF SUCH DAMAGE.
+"""
+import os, sys, time, json, threading
+import numpy as np
+from sklearn.datasets import load_diabetes
+from sklearn.linear_model import Ridge
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scoring"))
+from batching import MicroBatcher
+
+
+def run_clients(predict, rows, concurrency, requests_per_client):
+    """
+    Starts `concurrency` threads that each send `requests_per_client`
+    single-row requests through `predict` and returns latencies and wall time.
+    """
+    latencies = [[] for _ in range(concurrency)]
+
+    def client(index):
+        for i in range(requests_per_client):
+            row = rows[(index * requests_per_client + i) % len(rows)][np.newaxis, :]
+            start = time.perf_counter()
+            predict(row)
+            latencies[index].append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return np.concatenate(latencies), time.perf_counter() - start
+
+
+def summarize(name, latencies, elapsed):
+    result = {
+        "path": name,
+        "requests": len(latencies),
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)) * 1000, 3)
+    }
+    print(json.dumps(result))
+    return result
+
+
+if __name__ == "__main__":
+    concurrency = int(os.environ.get("BENCH_CONCURRENCY", 64))
+    requests_per_client = int(os.environ.get("BENCH_REQUESTS_PER_CLIENT", 200))
+    window_ms = float(os.environ.get("SCORING_BATCH_WINDOW_MS", 2.0))
+    max_batch_size = int(os.environ.get("SCORING_MAX_BATCH_SIZE", 256))
+
+    X, y = load_diabetes(return_X_y=True)
+    model = Ridge(alpha=0.5).fit(X, y)
+    print("Concurrency {}, {} requests per client".format(concurrency, requests_per_client))
+
+    latencies, elapsed = run_clients(model.predict, X, concurrency, requests_per_client)
+    summarize("per-request", latencies, elapsed)
+
+    batcher = MicroBatcher(model.predict, window_ms=window_ms, max_batch_size=max_batch_size)
+    latencies, elapsed = run_clients(batcher.predict, X, concurrency, requests_per_client)
+    summarize("micro-batched", latencies, elapsed)
+    print("Average batch size: {0:.1f} rows".format(batcher.rows / batcher.batches))
+    batcher.close()
+
+    # Callers that time out predict their request themselves, so the worker
+    # skips the queued requests of callers that stopped waiting
+    predicted = []
+    def slow_predict(data):
+        predicted.append(len(data))
+        time.sleep(0.2)
+        return model.predict(data)
+    batcher = MicroBatcher(slow_predict, window_ms=1.0, timeout_seconds=0.05)
+    first = threading.Thread(target=batcher.predict, args=(X[:1],))
+    first.start()
+    time.sleep(0.01)
+    batcher.predict(X[:2])
+    first.join()
+    batcher.close()
+    assert batcher.timeouts == 2 and sorted(predicted) == [1, 1, 2], predicted
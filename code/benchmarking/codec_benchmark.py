@@ -0,0 +1,68 @@
+"""
+Copyright (C) Microsoft Corporation. All rights reserved.​
+ ​
+Microsoft Corporation (“Microsoft”) grants you a nonexclusive, perpetual,
+royalty-free right to use, copy, and modify the software code provided by us
+("Software Code"). You may not sublicense the Software Code or any use of it
+(except to your affiliates and to vendors to perform work on your behalf)
+through distribution, network access, service agreement, lease, rental, or
+otherwise. This license does not purport to express any claim of ownership over
+data you may have shared with Microsoft in the creation of the Software Code.
+Unless applicable law gives you more rights, Microsoft reserves all other
+rights not expressly granted herein, whether by implication, estoppel or
+otherwise. ​
+ ​
+THE SOFTWARE CODE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+MICROSOFT OR ITS LICENSORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ARISING IN ANY WAY OUT OF THE USE OF THE SOFTWARE CODE, EVEN IF ADVISED OF THE
+POSSIBILITY OF SUCH DAMAGE.
+"""
+import os, sys, json, timeit
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scoring"))
+from codec import decode_binary, encode_binary, N_FEATURES
+
+
+def json_roundtrip(raw_data):
+    # Same steps as run() in score.py for JSON requests
+    data = np.array(json.loads(raw_data)["data"], dtype=np.float64)
+    return json.dumps({"result": data[:, 0].tolist()})
+
+
+def binary_roundtrip(raw_data):
+    data = decode_binary(raw_data)
+    return encode_binary(data[:, 0])
+
+
+def time_per_call(function, argument):
+    timer = timeit.Timer(lambda: function(argument))
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=5, number=number)) / number
+
+
+if __name__ == "__main__":
+    results = []
+    for rows in (1, 10, 100, 1000, 10000, 50000):
+        matrix = np.random.rand(rows, N_FEATURES) * 100
+        payload = json.dumps({"data": matrix.tolist()})
+        binary_payload = encode_binary(matrix)
+        assert np.array_equal(decode_binary(binary_payload), matrix)
+        json_seconds = time_per_call(json_roundtrip, payload)
+        binary = time_per_call(binary_roundtrip, binary_payload)
+        result = {
+            "rows": rows,
+            "json_us": round(json_seconds * 1e6, 1),
+            "binary_us": round(binary * 1e6, 1),
+            "saved_percent": round((1 - binary / json_seconds) * 100, 1),
+            "json_bytes": len(payload),
+            "binary_bytes": len(binary_payload)
+        }
+        print(json.dumps(result))
+        results.append(result)
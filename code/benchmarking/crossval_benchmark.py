@@ -0,0 +1,67 @@
+"""
+Copyright (C) Microsoft Corporation. All rights reserved.​
+ ​
+Microsoft Corporation (“Microsoft”) grants you a nonexclusive, perpetual,
+royalty-free right to use, copy, and modify the software code provided by us
+("Software Code"). You may not sublicense the Software Code or any use of it
+(except to your affiliates and to vendors to perform work on your behalf)
+through distribution, network access, service agreement, lease, rental, or
+otherwise. This license does not purport to express any claim of ownership over
+data you may have shared with Microsoft in the creation of the Software Code.
+Unless applicable law gives you more rights, Microsoft reserves all other
+rights not expressly granted herein, whether by implication, estoppel or
+otherwise. ​
+ ​
+THE SOFTWARE CODE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+MICROSOFT OR ITS LICENSORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ARISING IN ANY WAY OUT OF THE USE OF THE SOFTWARE CODE, EVEN IF ADVISED OF THE
+POSSIBILITY OF SUCH DAMAGE.
+"""
+import os, sys, json, timeit
+import numpy as np
+from sklearn.datasets import load_diabetes
+from sklearn.linear_model import Ridge
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "training"))
+from crossval import cross_validate
+
+ALPHAS = np.arange(0.0, 1.0, 0.05)
+FOLDS = 5
+
+
+def cross_validate_with_sklearn(X, y):
+    # Same shuffled contiguous folds as cross_validate, one fit per fold and alpha
+    order = np.random.RandomState(42).permutation(len(X))
+    X, y = X[order], y[order]
+    bounds = np.linspace(0, len(X), FOLDS + 1).astype(int)
+    mse = np.zeros((FOLDS, len(ALPHAS)))
+    for k in range(FOLDS):
+        test = np.zeros(len(X), dtype=bool)
+        test[bounds[k]:bounds[k + 1]] = True
+        for j, alpha in enumerate(ALPHAS):
+            predictions = Ridge(alpha=alpha).fit(X[~test], y[~test]).predict(X[test])
+            mse[k, j] = ((predictions - y[test]) ** 2).mean()
+    return mse
+
+
+if __name__ == "__main__":
+    X, y = load_diabetes(return_X_y=True)
+    X = np.tile(X, (100, 1))
+    y = np.tile(y, 100)
+    expected = cross_validate_with_sklearn(X, y)
+    for workers in (1, FOLDS):
+        np.testing.assert_allclose(cross_validate(X, y, ALPHAS, folds=FOLDS, workers=workers, random_state=42)[0], expected, rtol=1e-8)
+    result = {"rows": len(X), "folds": FOLDS, "alphas": len(ALPHAS), "cpu_count": os.cpu_count()}
+    for name, function in (("sklearn_fits_ms", lambda: cross_validate_with_sklearn(X, y)),
+                           ("shared_gram_1_worker_ms", lambda: cross_validate(X, y, ALPHAS, folds=FOLDS, workers=1, random_state=42)),
+                           ("shared_gram_{}_workers_ms".format(FOLDS), lambda: cross_validate(X, y, ALPHAS, folds=FOLDS, workers=FOLDS, random_state=42))):
+        timer = timeit.Timer(function)
+        number, _ = timer.autorange()
+        result[name] = round(min(timer.repeat(repeat=3, number=number)) / number * 1000, 3)
+    print(json.dumps(result))
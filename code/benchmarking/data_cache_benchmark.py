@@ -0,0 +1,91 @@
+"""
+Copyright (C) Microsoft Corporation. All rights reserved.​
+ ​
+Microsoft Corporation (“Microsoft”) grants you a nonexclusive, perpetual,
+royalty-free right to use, copy, and modify the software code provided by us
+("Software Code"). You may not sublicense the Software Code or any use of it
+(except to your affiliates and to vendors to perform work on your behalf)
+through distribution, network access, service agreement, lease, rental, or
+otherwise. This license does not purport to express any claim of ownership over
+data you may have shared with Microsoft in the creation of the Software Code.
+Unless applicable law gives you more rights, Microsoft reserves all other
+rights not expressly granted herein, whether by implication, estoppel or
+otherwise. ​
+ ​
+THE SOFTWARE CODE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+MICROSOFT OR ITS LICENSORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ARISING IN ANY WAY OUT OF THE USE OF THE SOFTWARE CODE, EVEN IF ADVISED OF THE
+POSSIBILITY OF SUCH DAMAGE.
+"""
+import os, sys, json, time, tempfile
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "training"))
+from dataset import FEATURE_NAMES, TARGET_NAME, read_csv_chunks, load_column_cache
+from parallel import accumulate_statistics, accumulate_cached_statistics
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "data", "diabetes.csv")
+SCALES = [1, 100, 1000]
+
+
+def write_scaled_csv(path, scale):
+    with open(DATA_PATH) as f:
+        header = f.readline()
+        rows = f.read()
+    if not rows.endswith("\n"):
+        rows += "\n"
+    with open(path, "w") as f:
+        f.write(header)
+        for _ in range(scale):
+            f.write(rows)
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return round(time.perf_counter() - start, 4), result
+
+
+def parse(path):
+    chunks = list(read_csv_chunks(path))
+    return np.concatenate([X for X, _ in chunks]), np.concatenate([y for _, y in chunks])
+
+
+def load(path, cache_dir):
+    columns = load_column_cache(path, cache_dir)
+    # Touch all pages, as parsing does
+    return np.column_stack([columns[name] for name in FEATURE_NAMES]), np.asarray(columns[TARGET_NAME])
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        cache_dir = os.path.join(directory, "cache")
+        for scale in SCALES:
+            path = os.path.join(directory, "diabetes_{}x.csv".format(scale))
+            write_scaled_csv(path, scale)
+            result = {"scale": scale, "file_mb": round(os.path.getsize(path) / 1024 ** 2, 2)}
+            result["parse_s"], (X, y) = timed(lambda: parse(path))
+            result["build_cache_s"], _ = timed(lambda: load_column_cache(path, cache_dir))
+            result["mmap_load_s"], (X_cached, y_cached) = timed(lambda: load(path, cache_dir))
+            np.testing.assert_array_equal(X_cached, X)
+            np.testing.assert_array_equal(y_cached, y)
+            # A changed file gets a new hash and the cache is rebuilt
+            with open(path, "a") as f:
+                f.write(",".join(["0.0"] * (len(FEATURE_NAMES) + 1)) + "\n")
+            result["rebuild_after_change_s"], (X_changed, _) = timed(lambda: load(path, cache_dir))
+            assert len(X_changed) == len(X) + 1
+            # Blank lines, e.g. a trailing one, are skipped like by the streaming reader
+            with open(path, "a") as f:
+                f.write("\n")
+            X_blank, y_blank = load(path, cache_dir)
+            np.testing.assert_array_equal(X_blank, X_changed)
+            np.testing.assert_array_equal(y_blank, parse(path)[1])
+            result["train_from_csv_s"], _ = timed(lambda: accumulate_statistics(path))
+            result["train_from_cache_s"], _ = timed(lambda: accumulate_cached_statistics(load_column_cache(path, cache_dir)))
+            print(json.dumps(result))
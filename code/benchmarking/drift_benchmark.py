@@ -0,0 +1,128 @@
+"""
+Copyright (C) Microsoft Corporation. All rights reserved.​
+ ​
+Microsoft Corporation (“Microsoft”) grants you a nonexclusive, perpetual,
+royalty-free right to use, copy, and modify the software code provided by us
+("Software Code"). You may not sublicense the Software Code or any use of it
+(except to your affiliates and to vendors to perform work on your behalf)
+through distribution, network access, service agreement, lease, rental, or
+otherwise. This license does not purport to express any claim of ownership over
+data you may have shared with Microsoft in the creation of the Software Code.
+Unless applicable law gives you more rights, Microsoft reserves all other
+rights not expressly granted herein, whether by implication, estoppel or
+otherwise. ​
+ ​
+THE SOFTWARE CODE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+MICROSOFT OR ITS LICENSORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ARISING IN ANY WAY OUT OF THE USE OF THE SOFTWARE CODE, EVEN IF ADVISED OF THE
+POSSIBILITY OF SUCH DAMAGE.
+"""
+import os, io, sys, json, time, timeit, threading, contextlib
+import numpy as np
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARK_DIR, "..", "scoring"))
+from drift import DriftMonitor
+from sketches import FeatureProfile
+from generate_dataset import DiabetesGenerator
+
+FEATURE_NAMES = ["AGE", "SEX", "BMI", "BP", "S1", "S2", "S3", "S4", "S5", "S6"]
+CONTRACT_PATH = os.path.join(BENCHMARK_DIR, "..", "training", "data_contract.json")
+DATA_PATH = os.path.join(BENCHMARK_DIR, "..", "..", "data", "diabetes.csv")
+
+
+def time_per_call(function, argument):
+    timer = timeit.Timer(lambda: function(argument))
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=5, number=number)) / number
+
+
+def baseline_profile():
+    """
+    The dataset profile train.py writes for the diabetes data.
+    """
+    with open(CONTRACT_PATH) as f:
+        contract = json.load(f)
+    lower, upper = np.array(contract["min"][:len(FEATURE_NAMES)]), np.array(contract["max"][:len(FEATURE_NAMES)])
+    tolerance = contract["range_tolerance"] * (upper - lower)
+    profile = FeatureProfile(lower - tolerance, upper + tolerance)
+    profile.update(np.loadtxt(DATA_PATH, delimiter=",", skiprows=1)[:, :len(FEATURE_NAMES)])
+    return profile.to_arrays()
+
+
+def monitor_scores(baseline, X, request_rows=10):
+    monitor = DriftMonitor(baseline, FEATURE_NAMES, window_seconds=0)
+    for start in range(0, len(X), request_rows):
+        monitor.observe(X[start:start + request_rows])
+    return monitor
+
+
+if __name__ == "__main__":
+    baseline = baseline_profile()
+    rows = np.concatenate(list(DiabetesGenerator().chunks(200000, chunk_rows=100000, seed=1)))[:, :len(FEATURE_NAMES)]
+
+    # Rows from the distribution of the training data don't drift, while a
+    # shifted AGE and the AGE=100 rows of diabetes_bad_dist.csv do
+    scores = monitor_scores(baseline, rows).scores()
+    assert scores["drifted"] == [], scores
+    shifted = rows.copy()
+    shifted[:, 0] += 0.5 * np.sqrt(baseline["variance"][0])
+    scores = monitor_scores(baseline, shifted).scores()
+    assert scores["drifted"] == ["AGE"], scores
+    bad = rows[:20000].copy()
+    bad[::10, 0] = 100
+    scores = monitor_scores(baseline, bad).scores()
+    assert scores["drifted"] == ["AGE"], scores
+    print(json.dumps({"case": "bad_dist", "AGE": scores["features"]["AGE"]}))
+
+    # A few rows are never flagged, however far they are from the baseline
+    scores = monitor_scores(baseline, rows[:17]).scores()
+    assert scores["rows"] == 17 and scores["drifted"] == [], scores
+    scores = monitor_scores(baseline, bad[:20]).scores()
+    assert scores["drifted"] == [], scores
+
+    # A shift after a long time of normal traffic shows in the next window,
+    # while it is diluted in a window over all rows
+    monitor = monitor_scores(baseline, rows)
+    monitor.report()
+    late = shifted[:5000]
+    monitor.observe(late)
+    single = monitor_scores(baseline, np.concatenate([rows, late])).scores()
+    assert monitor.report()["drifted"] == ["AGE"] and single["drifted"] == [], single
+    print(json.dumps({"case": "late_shift", "window_ks": monitor.last_window["features"]["AGE"]["ks"], "all_rows_ks": single["features"]["AGE"]["ks"]}))
+    assert monitor.scores()["rows"] == 0
+
+    # Requests that see the window elapse at the same time close it only once
+    monitor = DriftMonitor(baseline, FEATURE_NAMES, window_seconds=0.05)
+    monitor.observe(rows[:1000])
+    time.sleep(0.1)
+    barrier = threading.Barrier(8)
+    def close_window():
+        barrier.wait()
+        monitor.maybe_report()
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        threads = [threading.Thread(target=close_window) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert output.getvalue().count("Drift of") == 1 and monitor.last_window["rows"] == 1000, output.getvalue()
+
+    # Memory of the sketches grows with the logarithm of the rows only
+    for total in (10000, 100000, 1000000):
+        monitor = monitor_scores(baseline, np.resize(rows, (total, len(FEATURE_NAMES))), request_rows=1000)
+        sketch_rows = sum(len(values) for values in monitor.profile.sketch.levels)
+        print(json.dumps({"rows": total, "sketch_rows": sketch_rows, "sketch_kb": round(sketch_rows * len(FEATURE_NAMES) * 8 / 1024.0, 1)}))
+
+    monitor = DriftMonitor(baseline, FEATURE_NAMES, window_seconds=0)
+    for request_rows in (1, 10, 100, 1000):
+        data = np.ascontiguousarray(rows[:request_rows])
+        print(json.dumps({"request_rows": request_rows, "observe_us": round(time_per_call(monitor.observe, data) * 1e6, 2)}))
+    print(json.dumps({"scores_ms": round(time_per_call(lambda _: monitor.scores(), None) * 1e3, 2)}))
@@ -0,0 +1,153 @@
+"""
+Copyright (C) Microsoft Corporation. All rights reserved.​
+ ​
+Microsoft Corporation (“Microsoft”) grants you a nonexclusive, perpetual,
+royalty-free right to use, copy, and modify the software code provided by us
+("Software Code"). You may not sublicense the Software Code or any use of it
+(except to your affiliates and to vendors to perform work on your behalf)
+through distribution, network access, service agreement, lease, rental, or
+otherwise. This license does not purport to express any claim of ownership over
+data you may have shared with Microsoft in the creation of the Software Code.
+Unless applicable law gives you more rights, Microsoft reserves all other
+rights not expressly granted herein, whether by implication, estoppel or
+otherwise. ​
+ ​
+THE SOFTWARE CODE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+MICROSOFT OR ITS LICENSORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ARISING IN ANY WAY OUT OF THE USE OF THE SOFTWARE CODE, EVEN IF ADVISED OF THE
+POSSIBILITY OF SUCH DAMAGE.
+"""
+import os, sys, json, time, argparse
+import numpy as np
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "data", "diabetes.csv")
+FEATURE_NAMES = ["AGE", "SEX", "BMI", "BP", "S1", "S2", "S3", "S4", "S5", "S6"]
+TARGET_NAME = "Y"
+# Columns with fewer distinct values, e.g. SEX, are sampled from their values only
+DISCRETE_MAX_VALUES = 10
+# Correlation of every extra feature with the feature whose marginal it uses
+EXTRA_FEATURE_CORRELATION = 0.5
+
+
+def normal_cdf(z):
+    # Abramowitz and Stegun 7.1.26, absolute error below 1e-7
+    x = np.abs(z) / np.sqrt(2)
+    t = 1 / (1 + 0.3275911 * x)
+    erf = 1 - t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429)))) * np.exp(-x * x)
+    return 0.5 * (1 + np.sign(z) * erf)
+
+
+class DiabetesGenerator(object):
+    """
+    Generates rows with the schema of diabetes.csv with a Gaussian copula:
+    correlated standard normal scores, whose correlation is estimated from
+    the normal scores of diabetes.csv, are mapped to uniforms and through
+    the empirical quantile function of every column. This keeps the
+    marginal distributions as well as the rank correlations, so that Y can
+    still be predicted from the features. extra_features adds columns
+    F11, F12, ... which reuse the marginals of AGE..S6.
+    """
+    def __init__(self, path=DATA_PATH, extra_features=0):
+        data = np.loadtxt(path, delimiter=",", skiprows=1)
+        self.columns = FEATURE_NAMES + ["F{}".format(len(FEATURE_NAMES) + 1 + i) for i in range(extra_features)] + [TARGET_NAME]
+        self.extra_features = extra_features
+        self.sorted_values = [np.sort(data[:, i]) for i in range(data.shape[1])]
+        self.discrete = [len(np.unique(values)) < DISCRETE_MAX_VALUES for values in self.sorted_values]
+        ranks = (np.argsort(np.argsort(data, axis=0), axis=0) + 0.5) / len(data)
+        scores = np.sqrt(2) * self._inverse_erf(2 * ranks - 1)
+        self.cholesky = np.linalg.cholesky(np.corrcoef(scores, rowvar=False) + 1e-9 * np.eye(data.shape[1]))
+
+    @staticmethod
+    def _inverse_erf(x):
+        # Winitzki's approximation, only used to estimate the correlation
+        a = 0.147
+        log_term = np.log(1 - x * x)
+        first = 2 / (np.pi * a) + log_term / 2
+        return np.sign(x) * np.sqrt(np.sqrt(first * first - log_term / a) - first)
+
+    def quantile(self, column, u):
+        values = self.sorted_values[column]
+        if self.discrete[column]:
+            return values[np.minimum((u * len(values)).astype(int), len(values) - 1)]
+        return np.interp(u * (len(values) - 1), np.arange(len(values)), values)
+
+    def generate(self, rows, rng):
+        """
+        Returns a (rows, len(self.columns)) array with the target in the last column.
+        """
+        n_base = len(self.sorted_values)
+        scores = rng.standard_normal((rows, n_base)).dot(self.cholesky.T)
+        uniforms = normal_cdf(scores)
+        result = np.empty((rows, len(self.columns)))
+        for i in range(n_base - 1):
+            result[:, i] = self.quantile(i, uniforms[:, i])
+        result[:, -1] = self.quantile(n_base - 1, uniforms[:, -1])
+        for i in range(self.extra_features):
+            base = i % (n_base - 1)
+            extra_scores = EXTRA_FEATURE_CORRELATION * scores[:, base] + np.sqrt(1 - EXTRA_FEATURE_CORRELATION ** 2) * rng.standard_normal(rows)
+            result[:, n_base - 1 + i] = self.quantile(base, normal_cdf(extra_scores))
+        return result
+
+    def chunks(self, rows, chunk_rows=100000, seed=42):
+        """
+        Yields arrays of at most chunk_rows rows. The same seed and chunk_rows
+        always give the same rows.
+        """
+        rng = np.random.RandomState(seed)
+        for start in range(0, rows, chunk_rows):
+            yield self.generate(min(chunk_rows, rows - start), rng)
+
+
+def write_csv(path, rows, chunk_rows=100000, seed=42, extra_features=0, append=False, fmt="%.10g"):
+    """
+    Streams rows generated chunk by chunk to a CSV file with a header line,
+    or appends them to an existing file without one.
+    """
+    generator = DiabetesGenerator(extra_features=extra_features)
+    # Formatting a whole chunk at once is about twice as fast as np.savetxt
+    row_format = ",".join([fmt] * len(generator.columns)) + "\n"
+    with open(path, "a" if append else "w") as f:
+        if not append:
+            f.write(",".join(generator.columns) + "\n")
+        for chunk in generator.chunks(rows, chunk_rows=chunk_rows, seed=seed):
+            f.write((row_format * len(chunk)) % tuple(chunk.ravel().tolist()))
+    return generator.columns
+
+
+def ks_distances(sample, path=DATA_PATH):
+    """
+    Returns the Kolmogorov-Smirnov distance between every column of sample
+    and the same column of diabetes.csv.
+    """
+    data = np.loadtxt(path, delimiter=",", skiprows=1)
+    distances = []
+    for i in range(data.shape[1]):
+        grid = np.unique(np.concatenate([data[:, i], sample[:, i]]))
+        data_cdf = np.searchsorted(np.sort(data[:, i]), grid, side="right") / float(len(data))
+        sample_cdf = np.searchsorted(np.sort(sample[:, i]), grid, side="right") / float(len(sample))
+        distances.append(round(float(np.abs(data_cdf - sample_cdf).max()), 4))
+    return distances
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Synthetic datasets with the schema and marginal distributions of data/diabetes.csv")
+    parser.add_argument("--rows", type=int, default=1000000, help="Number of rows")
+    parser.add_argument("--output", type=str, default=os.path.join("data", "diabetes_synthetic.csv"), help="CSV file to write")
+    parser.add_argument("--extra-features", type=int, default=0, dest="extra_features", help="Additional feature columns F11, F12, ...")
+    parser.add_argument("--chunk-rows", type=int, default=100000, dest="chunk_rows", help="Rows generated and written at once")
+    parser.add_argument("--seed", type=int, default=42, help="Seed of the generator")
+    args = parser.parse_args()
+
+    print("Generating {} rows to {}: {}".format(args.rows, args.output, time.strftime("%H:%M:%S")), file=sys.stderr)
+    start = time.perf_counter()
+    write_csv(args.output, args.rows, chunk_rows=args.chunk_rows, seed=args.seed, extra_features=args.extra_features)
+    seconds = time.perf_counter() - start
+    sample = next(DiabetesGenerator().chunks(min(args.rows, 100000), chunk_rows=100000, seed=args.seed))
+    print(json.dumps({"rows": args.rows, "file_mb": round(os.path.getsize(args.output) / 1024 ** 2, 1), "seconds": round(seconds, 2),
+                      "rows_per_second": int(args.rows / seconds), "ks_distances": ks_distances(sample)}))
@@ -0,0 +1,160 @@
+"""
+Copyright (C) Microsoft Corporation. All rights reserved.​
+ ​
+Microsoft Corporation (“Microsoft”) grants you a nonexclusive, perpetual,
+royalty-free right to use, copy, and modify the software code provided by us
+("Software Code"). You may not sublicense the Software Code or any use of it
+(except to your affiliates and to vendors to perform work on your behalf)
+through distribution, network access, service agreement, lease, rental, or
+otherwise. This license does not purport to express any claim of ownership over
+data you may have shared with Microsoft in the creation of the Software Code.
+Unless applicable law gives you more rights, Microsoft reserves all other
+rights not expressly granted herein, whether by implication, estoppel or
+otherwise. ​
+ ​
+THE SOFTWARE CODE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+MICROSOFT OR ITS LICENSORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ARISING IN ANY WAY OUT OF THE USE OF THE SOFTWARE CODE, EVEN IF ADVISED OF THE
+POSSIBILITY OF SUCH DAMAGE.
+"""
+import os, sys, json, shutil, timeit, tempfile
+import numpy as np
+from sklearn.linear_model import Ridge
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARK_DIR, "..", "training"))
+from sketches import FeatureProfile
+from artifact import write_artifact
+from parallel import accumulate_statistics
+from dataset import FEATURE_NAMES, parse_csv_lines, test_mask
+from validation import CONTRACT_PATH, load_contract, contract_bounds
+from generate_dataset import DiabetesGenerator
+from scoring_benchmark import BenchmarkRequest, install_stubs
+
+ROWS = 200000
+MISSING_FRACTION = 0.05
+ALPHA = 0.5
+
+
+def time_per_call(function, argument):
+    timer = timeit.Timer(lambda: function(argument))
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=5, number=number)) / number
+
+
+def write_missing_csv(path, rows, fraction, seed=1):
+    # Same layout as diabetes_missing_values.csv, with empty feature fields
+    rng = np.random.RandomState(seed)
+    with open(path, "w") as f:
+        f.write(",".join(FEATURE_NAMES + ["Y"]) + "\n")
+        for row in rows:
+            fields = ["%.10g" % value for value in row]
+            for column in np.nonzero(rng.rand(len(FEATURE_NAMES)) < fraction)[0]:
+                fields[column] = ""
+            f.write(",".join(fields) + "\n")
+
+
+def init_score(score, **settings):
+    # score.py logs every request, the output is discarded while it runs
+    os.environ.update({"SCORING_" + name.upper(): value for name, value in settings.items()})
+    stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+    try:
+        score.init()
+    finally:
+        sys.stdout = stdout
+
+
+def run_quietly(score, request):
+    stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+    try:
+        return score.run(request)
+    finally:
+        sys.stdout = stdout
+
+
+def predictions(response):
+    if isinstance(response, str):
+        return np.array(json.loads(response)["result"])
+    return response
+
+
+if __name__ == "__main__":
+    rows = np.concatenate(list(DiabetesGenerator().chunks(ROWS, chunk_rows=100000, seed=1)))
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "missing.csv")
+        write_missing_csv(path, rows, MISSING_FRACTION)
+
+        # Streaming training with imputation from the correction terms equals
+        # Ridge.fit on the rows imputed with the same medians beforehand
+        profile = FeatureProfile(*contract_bounds(load_contract(), FEATURE_NAMES))
+        train_stats, test_stats, _ = accumulate_statistics(path, profile=profile)
+        medians = profile.medians()
+        coef, intercept = train_stats.impute(medians).solve(ALPHA)
+        with open(path) as f:
+            lines = f.readlines()[1:]
+        X, y = parse_csv_lines(lines, list(range(len(FEATURE_NAMES) + 1)))
+        missing = np.isnan(X)
+        print(json.dumps({"rows": len(X), "missing_values": int(missing.sum()), "missing_rows": int(missing.any(axis=1).sum())}))
+        train = ~test_mask(0, len(X))
+        reg = Ridge(alpha=ALPHA).fit(np.where(missing, medians, X)[train], y[train])
+        assert np.allclose(coef, reg.coef_, rtol=1e-6, atol=1e-6) and np.isclose(intercept, reg.intercept_), (coef, reg.coef_)
+        assert np.allclose(np.nanmedian(X[~missing.any(axis=1)], axis=0), medians, atol=0.01)
+
+        # Chunks with empty fields are filled with nan and parsed by loadtxt,
+        # genfromtxt is the parser they took before
+        complete = ["%s\n" % ",".join("%.10g" % value for value in row) for row in rows[:100000]]
+        columns = list(range(len(FEATURE_NAMES) + 1))
+        genfromtxt = lambda c, columns: np.genfromtxt(c, delimiter=",", usecols=columns, dtype=np.float64)
+        np.testing.assert_array_equal(np.column_stack(parse_csv_lines(lines[:100000], columns)), genfromtxt(lines[:100000], columns))
+        for name, parse, chunk in (("complete", parse_csv_lines, complete), ("missing", parse_csv_lines, lines[:100000]),
+                                   ("missing_genfromtxt", genfromtxt, lines[:100000])):
+            print(json.dumps({"parse_chunk": name, "rows": len(chunk), "seconds": round(time_per_call(lambda c: parse(c, columns), chunk), 3)}))
+
+        # The files of the model folder that train.py writes and init() loads
+        model_dir = os.path.join(directory, "model")
+        os.makedirs(model_dir)
+        write_artifact(os.path.join(model_dir, "mymodel.artifact"), {"coef": coef, "intercept": np.atleast_1d(intercept), "impute": medians},
+                       metadata={"model": "Ridge", "alpha": ALPHA, "imputation": "median"})
+        shutil.copy(CONTRACT_PATH, os.path.join(model_dir, "data_contract.json"))
+        install_stubs(model_dir)
+        import score
+        from codec import BINARY_CONTENT_TYPE, encode_binary, decode_binary
+
+        # Requests with missing values are scored with the medians, complete
+        # ones are predicted as they are
+        init_score(score, input_validation="true", imputation="true", latency_stats="false")
+        request = X[~missing.any(axis=1)][:4].copy()
+        request[1, 0], request[3, 2] = np.nan, np.nan
+        expected = reg.predict(np.where(np.isnan(request), medians, request))
+        payload = json.dumps({"data": [[None if np.isnan(value) else value for value in row] for row in request.tolist()]})
+        assert np.allclose(predictions(run_quietly(score, payload)), expected)
+        binary = run_quietly(score, BenchmarkRequest(encode_binary(request.astype(np.float32)), BINARY_CONTENT_TYPE))
+        assert np.allclose(decode_binary(binary.response, n_features=1)[:, 0], expected, atol=1e-3)
+        assert score.get_stats()["imputer"]["imputed_rows"] == 4
+        init_score(score, input_validation="false", imputation="true")
+        assert np.allclose(predictions(run_quietly(score, payload)), expected)
+        init_score(score, input_validation="true", imputation="false")
+        assert run_quietly(score, payload).status == 400
+
+        # Requests without missing values only pay for the check of the
+        # validator, which they passed before as well
+        for request_rows in (1, 10, 100, 1000):
+            data = X[~missing.any(axis=1)][:request_rows]
+            partial = data.copy()
+            partial[::2, 0] = np.nan
+            complete_payload = json.dumps({"data": data.tolist()})
+            partial_payload = json.dumps({"data": [[None if np.isnan(value) else value for value in row] for row in partial.tolist()]})
+            result = {"request_rows": request_rows}
+            for validation in ("true", "false"):
+                for imputation in ("false", "true"):
+                    init_score(score, input_validation=validation, imputation=imputation, latency_stats="false")
+                    name = "{}validate_{}impute_us".format("" if validation == "true" else "no_", "" if imputation == "true" else "no_")
+                    result[name] = round(time_per_call(lambda payload: run_quietly(score, payload), complete_payload) * 1e6, 1)
+            result["missing_validate_impute_us"] = round(time_per_call(lambda payload: run_quietly(score, payload), partial_payload) * 1e6, 1)
+            print(json.dumps(result))
@@ -0,0 +1,55 @@
+"""
+Copyright (C) Microsoft Corporation. All rights reserved.​
+ ​
+Microsoft Corporation (“Microsoft”) grants you a nonexclusive, perpetual,
+royalty-free right to use, copy, and modify the software code provided by us
+("Software Code"). You may not sublicense the Software Code or any use of it
+(except to your affiliates and to vendors to perform work on your behalf)
+through distribution, network access, service agreement, lease, rental, or
+otherwise. This license does not purport to express any claim of ownership over
+data you may have shared with Microsoft in the creation of the Software Code.
+Unless applicable law gives you more rights, Microsoft reserves all other
+rights not expressly granted herein, whether by implication, estoppel or
+otherwise. ​
+ ​
+THE SOFTWARE CODE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+MICROSOFT OR ITS LICENSORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ARISING IN ANY WAY OUT OF THE USE OF THE SOFTWARE CODE, EVEN IF ADVISED OF THE
+POSSIBILITY OF SUCH DAMAGE.
+"""
+import os, sys, json, timeit
+import numpy as np
+from sklearn.datasets import load_diabetes
+from sklearn.linear_model import Ridge
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scoring"))
+from kernel import LinearKernel
+
+
+def time_per_call(function, argument):
+    timer = timeit.Timer(lambda: function(argument))
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=5, number=number)) / number
+
+
+if __name__ == "__main__":
+    X, y = load_diabetes(return_X_y=True)
+    model = Ridge(alpha=0.5).fit(X, y)
+    kernels = {"float64": LinearKernel.from_model(model), "float32": LinearKernel.from_model(model, dtype=np.float32)}
+
+    # Parity with model.predict before timing anything
+    np.testing.assert_allclose(kernels["float64"].predict(X), model.predict(X), rtol=1e-12)
+    np.testing.assert_allclose(kernels["float32"].predict(X), model.predict(X), rtol=1e-5)
+
+    for rows in (1, 1000):
+        data = np.ascontiguousarray(np.resize(X, (rows, X.shape[1])))
+        result = {"rows": rows, "sklearn_predict_us": round(time_per_call(model.predict, data) * 1e6, 2)}
+        for name, kernel in kernels.items():
+            result["kernel_{}_us".format(name)] = round(time_per_call(lambda X: kernel.predict(X, check_shape=False), data) * 1e6, 2)
+        print(json.dumps(result))
@@ -0,0 +1,71 @@
+"""
+Copyright (C) Microsoft Corporation. All rights reserved.​
+ ​
+Microsoft Corporation (“Microsoft”) grants you a nonexclusive, perpetual,
+royalty-free right to use, copy, and modify the software code provided by us
+("Software Code"). You may not sublicense the Software Code or any use of it
+(except to your affiliates and to vendors to perform work on your behalf)
+through distribution, network access, service agreement, lease, rental, or
+otherwise. This license does not purport to express any claim of ownership over
+data you may have shared with Microsoft in the creation of the Software Code.
+Unless applicable law gives you more rights, Microsoft reserves all other
+rights not expressly granted herein, whether by implication, estoppel or
+otherwise. ​
+ ​
+THE SOFTWARE CODE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+MICROSOFT OR ITS LICENSORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ARISING IN ANY WAY OUT OF THE USE OF THE SOFTWARE CODE, EVEN IF ADVISED OF THE
+POSSIBILITY OF SUCH DAMAGE.
+"""
+import os, sys, json, tempfile
+import multiprocessing
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scoring"))
+from kernel import LinearKernel
+from memory import get_memory_usage
+
+
+def worker(path, mmap_mode, barrier, results):
+    before = get_memory_usage()
+    weights = np.load(path, mmap_mode=mmap_mode)
+    kernel = LinearKernel(weights[:-1], weights[-1])
+    # Touch every page of the weights like a real prediction does
+    kernel.predict(np.ones((1, kernel.n_features)))
+    # Keep all workers alive at the same time so shared pages are counted once
+    barrier.wait()
+    after = get_memory_usage()
+    results.put({key: after[key] - before[key] for key in after})
+    barrier.wait()
+
+
+def measure(path, mmap_mode, workers):
+    barrier = multiprocessing.Barrier(workers)
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=worker, args=(path, mmap_mode, barrier, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    deltas = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return {key: round(float(np.mean([delta[key] for delta in deltas])), 1) for key in deltas[0]}
+
+
+if __name__ == "__main__":
+    workers = int(os.environ.get("BENCH_WORKERS", 4))
+    n_features = int(os.environ.get("BENCH_N_FEATURES", 8 * 1024 * 1024))
+    if not get_memory_usage():
+        sys.exit("/proc/self/smaps_rollup is required for this benchmark")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "weights.npy")
+        np.save(path, np.random.rand(n_features + 1))
+        print("Weights: {0:.1f} MB, {1} workers".format((n_features + 1) * 8 / 1024.0 ** 2, workers))
+        for name, mmap_mode in (("private copy", None), ("memory-mapped", "r")):
+            result = {"load": name, "per_worker_mb": measure(path, mmap_mode, workers)}
+            print(json.dumps(result))
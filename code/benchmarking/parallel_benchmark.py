@@ -0,0 +1,68 @@
+"""
+Copyright (C) Microsoft Corporation. All rights reserved.​
+ ​
+Microsoft Corporation (“Microsoft”) grants you a nonexclusive, perpetual,
+royalty-free right to use, copy, and modify the software code provided by us
+("Software Code"). You may not sublicense the Software Code or any use of it
+(except to your affiliates and to vendors to perform work on your behalf)
+through distribution, network access, service agreement, lease, rental, or
+otherwise. This license does not purport to express any claim of ownership over
+data you may have shared with Microsoft in the creation of the Software Code.
+Unless applicable law gives you more rights, Microsoft reserves all other
+rights not expressly granted herein, whether by implication, estoppel or
+otherwise. ​
+ ​
+THE SOFTWARE CODE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+MICROSOFT OR ITS LICENSORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ARISING IN ANY WAY OUT OF THE USE OF THE SOFTWARE CODE, EVEN IF ADVISED OF THE
+POSSIBILITY OF SUCH DAMAGE.
+"""
+import os, sys, json, time, argparse, tempfile
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "training"))
+from parallel import accumulate_statistics
+from generate_dataset import write_csv
+
+
+def scaling_report(path, worker_counts, chunk_rows):
+    """
+    Returns the time, speedup and scaling efficiency (speedup / workers) of
+    accumulating the statistics of path for every number of workers.
+    """
+    baseline = None
+    report = []
+    for workers in worker_counts:
+        start = time.perf_counter()
+        train_stats, test_stats, _ = accumulate_statistics(path, chunk_rows=chunk_rows, workers=workers)
+        seconds = time.perf_counter() - start
+        if baseline is None:
+            baseline = (seconds, train_stats.solve(0.5))
+        else:
+            # Chunks are merged in file order, so the solution does not depend on the workers
+            np.testing.assert_allclose(train_stats.solve(0.5)[0], baseline[1][0], rtol=1e-10)
+        speedup = baseline[0] / seconds
+        report.append({"workers": workers, "seconds": round(seconds, 3), "speedup": round(speedup, 2),
+                       "efficiency": round(speedup / workers, 2)})
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scaling of data-parallel sufficient statistics training")
+    parser.add_argument("--rows", type=int, default=1000000, help="Rows of the synthetic dataset derived from data/diabetes.csv")
+    parser.add_argument("--chunk-rows", type=int, default=50000, dest="chunk_rows", help="Rows per chunk")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count(), dest="max_workers", help="Largest number of worker processes")
+    args = parser.parse_args()
+
+    worker_counts = sorted(set([1] + [2 ** i for i in range(1, args.max_workers.bit_length())] + [args.max_workers]))
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "synthetic.csv")
+        write_csv(path, args.rows)
+        print(json.dumps({"rows": args.rows, "chunk_rows": args.chunk_rows, "cpu_count": os.cpu_count(),
+                          "scaling": scaling_report(path, worker_counts, args.chunk_rows)}))
@@ -0,0 +1,57 @@
+"""
+Copyright (C) Microsoft Corporation. All rights reserved.​
+ ​
+Microsoft Corporation (“Microsoft”) grants you a nonexclusive, perpetual,
+royalty-free right to use, copy, and modify the software code provided by us
+("Software Code"). You may not sublicense the Software Code or any use of it
+(except to your affiliates and to vendors to perform work on your behalf)
+through distribution, network access, service agreement, lease, rental, or
+otherwise. This license does not purport to express any claim of ownership over
+data you may have shared with Microsoft in the creation of the Software Code.
+Unless applicable law gives you more rights, Microsoft reserves all other
+rights not expressly granted herein, whether by implication, estoppel or
+otherwise. ​
+ ​
+THE SOFTWARE CODE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+MICROSOFT OR ITS LICENSORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ARISING IN ANY WAY OUT OF THE USE OF THE SOFTWARE CODE, EVEN IF ADVISED OF THE
+POSSIBILITY OF SUCH DAMAGE.
+"""
+import os, sys, json, timeit
+import numpy as np
+from sklearn.datasets import load_diabetes
+from sklearn.linear_model import Ridge
+from sklearn.metrics import mean_squared_error
+from sklearn.model_selection import train_test_split
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "training"))
+from ridge import ridge_path, mse_path
+
+ALPHAS = np.arange(0.0, 1.0, 0.05)
+
+
+def sweep_with_sklearn(X_train, X_test, y_train, y_test):
+    return np.array([mean_squared_error(Ridge(alpha=alpha).fit(X_train, y_train).predict(X_test), y_test) for alpha in ALPHAS])
+
+
+def sweep_with_path(X_train, X_test, y_train, y_test):
+    coefs, intercepts = ridge_path(X_train, y_train, ALPHAS)
+    return mse_path(coefs, intercepts, X_test, y_test)
+
+
+if __name__ == "__main__":
+    X, y = load_diabetes(return_X_y=True)
+    split = train_test_split(X, y, test_size=0.2, random_state=42)
+    np.testing.assert_allclose(sweep_with_path(*split), sweep_with_sklearn(*split), rtol=1e-8)
+    result = {"alphas": len(ALPHAS)}
+    for name, sweep in (("sklearn_fits_ms", sweep_with_sklearn), ("ridge_path_ms", sweep_with_path)):
+        timer = timeit.Timer(lambda: sweep(*split))
+        number, _ = timer.autorange()
+        result[name] = round(min(timer.repeat(repeat=5, number=number)) / number * 1000, 3)
+    print(json.dumps(result))
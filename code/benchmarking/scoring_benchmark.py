@@ -0,0 +1,233 @@
+"""
+Copyright (C) Microsoft Corporation. All rights reserved.​
+ ​
+Microsoft Corporation (“Microsoft”) grants you a nonexclusive, perpetual,
+royalty-free right to use, copy, and modify the software code provided by us
+("Software Code"). You may not sublicense the Software Code or any use of it
+(except to your affiliates and to vendors to perform work on your behalf)
+through distribution, network access, service agreement, lease, rental, or
+otherwise. This license does not purport to express any claim of ownership over
+data you may have shared with Microsoft in the creation of the Software Code.
+Unless applicable law gives you more rights, Microsoft reserves all other
+rights not expressly granted herein, whether by implication, estoppel or
+otherwise. ​
+ ​
+THE SOFTWARE CODE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+MICROSOFT OR ITS LICENSORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ARISING IN ANY WAY OUT OF THE USE OF THE SOFTWARE CODE, EVEN IF ADVISED OF THE
+POSSIBILITY OF SUCH DAMAGE.
+"""
+import os, sys, json, time, types, shutil, argparse, platform, subprocess, tempfile, threading
+import multiprocessing
+import numpy as np
+
+SCORING_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scoring")
+
+
+class BenchmarkRequest(object):
+    """
+    Minimal stand-in for the request object that the rawhttp decorator passes to run().
+    """
+    def __init__(self, body, content_type):
+        self.headers = {"Content-Type": content_type}
+        self.body = body
+
+    def get_data(self):
+        return self.body
+
+
+def install_stubs(model_dir):
+    """
+    Replaces the AML services used by score.py with in-process stubs, so that
+    init() and run() can be called without a workspace or a scoring container.
+    """
+    class Model(object):
+        @staticmethod
+        def get_model_path(model_name):
+            return model_dir
+
+    class ModelDataCollector(object):
+        def __init__(self, model_name, feature_names):
+            pass
+
+        def collect(self, input_data):
+            pass
+
+    for name in ("azureml", "azureml.core"):
+        sys.modules.setdefault(name, types.ModuleType(name))
+    sys.modules["azureml.core.model"] = types.ModuleType("azureml.core.model")
+    sys.modules["azureml.core.model"].Model = Model
+    sys.modules["azureml.monitoring"] = types.ModuleType("azureml.monitoring")
+    sys.modules["azureml.monitoring"].ModelDataCollector = ModelDataCollector
+    try:
+        import azureml.contrib.services.aml_request
+    except ImportError:
+        class AMLResponse(object):
+            def __init__(self, response, status, headers=None):
+                self.response = response
+                self.status = status
+                self.headers = headers or {}
+
+        for name in ("azureml.contrib", "azureml.contrib.services"):
+            sys.modules[name] = types.ModuleType(name)
+        sys.modules["azureml.contrib.services.aml_request"] = types.ModuleType("azureml.contrib.services.aml_request")
+        sys.modules["azureml.contrib.services.aml_request"].rawhttp = lambda function: function
+        sys.modules["azureml.contrib.services.aml_response"] = types.ModuleType("azureml.contrib.services.aml_response")
+        sys.modules["azureml.contrib.services.aml_response"].AMLResponse = AMLResponse
+    os.environ.pop("AZUREML_MODEL_DIR", None)
+    sys.path.insert(0, SCORING_DIR)
+
+
+def export_model(model_dir):
+    """
+    Trains the Ridge model of train.py and writes the files that init() loads.
+    """
+    import joblib
+    from sklearn.datasets import load_diabetes
+    from sklearn.linear_model import Ridge
+    X, y = load_diabetes(return_X_y=True)
+    model = Ridge(alpha=0.5).fit(X, y)
+    joblib.dump(model, os.path.join(model_dir, "mymodel.pkl"))
+    np.save(os.path.join(model_dir, "mymodel_coef.npy"), np.append(model.coef_, model.intercept_))
+    sys.path.insert(0, SCORING_DIR)
+    from artifact import write_artifact
+    write_artifact(os.path.join(model_dir, "mymodel.artifact"), {"coef": model.coef_, "intercept": np.atleast_1d(model.intercept_),
+                                                                   "impute": np.median(X, axis=0)},
+                   metadata={"model": "Ridge", "alpha": 0.5, "imputation": "median"})
+    shutil.copy(os.path.join(SCORING_DIR, "..", "training", "data_contract.json"), os.path.join(model_dir, "data_contract.json"))
+    from sketches import FeatureProfile
+    profile = FeatureProfile(X.min(axis=0), X.max(axis=0))
+    profile.update(X)
+    write_artifact(os.path.join(model_dir, "dataset_profile.artifact"), profile.to_arrays())
+    return X
+
+
+def build_payload(X, batch_size, payload_format):
+    from codec import encode_binary, BINARY_CONTENT_TYPE
+    rows = np.resize(X, (batch_size, X.shape[1]))
+    if payload_format == "binary":
+        return BenchmarkRequest(encode_binary(rows), BINARY_CONTENT_TYPE)
+    return json.dumps({"data": rows.tolist()})
+
+
+def worker(model_dir, X, config, threads, barrier, results):
+    # score.py logs every request; keep the cost of print() but not the output
+    sys.stdout = open(os.devnull, "w")
+    install_stubs(model_dir)
+    import score
+    from memory import get_peak_rss
+    score.init()
+    payload = build_payload(X, config["batch_size"], config["format"])
+    latencies = [[] for _ in range(threads)]
+    errors = [0] * threads
+
+    def client(index):
+        for _ in range(config["requests"]):
+            start = time.perf_counter()
+            response = score.run(payload)
+            latencies[index].append(time.perf_counter() - start)
+            if isinstance(response, str) and response.startswith('{"error"'):
+                errors[index] += 1
+
+    clients = [threading.Thread(target=client, args=(i,)) for i in range(threads)]
+    barrier.wait()
+    start = time.time()
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    end = time.time()
+    results.put({"latencies": np.concatenate(latencies).tolist(), "errors": sum(errors), "start": start, "end": end,
+                 "peak_rss_mb": get_peak_rss()})
+
+
+def run_config(context, model_dir, X, config):
+    processes = config["concurrency"] if config["mode"] == "processes" else 1
+    threads = 1 if config["mode"] == "processes" else config["concurrency"]
+    barrier = context.Barrier(processes)
+    results = context.Queue()
+    workers = [context.Process(target=worker, args=(model_dir, X, config, threads, barrier, results)) for _ in range(processes)]
+    for process in workers:
+        process.start()
+    outcomes = [results.get() for _ in workers]
+    for process in workers:
+        process.join()
+    latencies = np.concatenate([outcome["latencies"] for outcome in outcomes])
+    elapsed = max(outcome["end"] for outcome in outcomes) - min(outcome["start"] for outcome in outcomes)
+    result = dict(config)
+    result.update({
+        "total_requests": len(latencies),
+        "errors": sum(outcome["errors"] for outcome in outcomes),
+        "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 3),
+        "p95_ms": round(float(np.percentile(latencies, 95)) * 1000, 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)) * 1000, 3),
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "rows_per_second": round(len(latencies) * config["batch_size"] / elapsed, 1),
+        "peak_rss_mb": round(max(outcome["peak_rss_mb"] for outcome in outcomes), 1)
+    })
+    return result
+
+
+def get_environment():
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=SCORING_DIR, stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"commit": commit, "python": platform.python_version(), "numpy": np.__version__,
+            "cpu_count": os.cpu_count(), "scoring_settings": {key: value for key, value in os.environ.items() if key.startswith("SCORING_")}}
+
+
+def config_key(result):
+    return (result["mode"], result["concurrency"], result["batch_size"], result["format"])
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {config_key(result): result for result in json.load(f)["results"]}
+    print("Comparison against " + baseline_path)
+    for result in results:
+        previous = baseline.get(config_key(result))
+        if previous:
+            print("{}: rows/s x{:.2f}, p99 x{:.2f}".format(config_key(result),
+                  result["rows_per_second"] / previous["rows_per_second"], result["p99_ms"] / previous["p99_ms"]))
+
+
+def parse_list(value, cast=str):
+    return [cast(item) for item in value.split(",") if item]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="In-process load generator for code/scoring/score.py")
+    parser.add_argument("--batch-sizes", default="1,100,1000", help="Comma separated rows per request")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma separated number of concurrent clients")
+    parser.add_argument("--modes", default="threads,processes", help="threads and/or processes")
+    parser.add_argument("--formats", default="json,binary", help="json and/or binary payloads")
+    parser.add_argument("--requests", type=int, default=200, help="Requests sent by every client")
+    parser.add_argument("--output", default="scoring_benchmark.json", help="File the JSON report is written to")
+    parser.add_argument("--compare", default=None, help="Report of an earlier run to compare against")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    report = {"environment": get_environment(), "results": []}
+    with tempfile.TemporaryDirectory() as model_dir:
+        X = export_model(model_dir)
+        for mode in parse_list(args.modes):
+            for concurrency in parse_list(args.concurrency, int):
+                for batch_size in parse_list(args.batch_sizes, int):
+                    for payload_format in parse_list(args.formats):
+                        config = {"mode": mode, "concurrency": concurrency, "batch_size": batch_size,
+                                  "format": payload_format, "requests": args.requests}
+                        result = run_config(context, model_dir, X, config)
+                        print(json.dumps(result))
+                        report["results"].append(result)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print("Report written to " + args.output)
+    if args.compare:
+        compare(report["results"], args.compare)
@@ -0,0 +1,87 @@
+"""
+Copyright (C) Microsoft Corporation. All rights reserved.​
+ ​
+Microsoft Corporation (“Microsoft”) grants you a nonexclusive, perpetual,
+royalty-free right to use, copy, and modify the software code provided by us
+("Software Code"). You may not sublicense the Software Code or any use of it
+(except to your affiliates and to vendors to perform work on your behalf)
+through distribution, network access, service agreement, lease, rental, or
+otherwise. This license does not purport to express any claim of ownership over
+data you may have shared with Microsoft in the creation of the Software Code.
+Unless applicable law gives you more rights, Microsoft reserves all other
+rights not expressly granted herein, whether by implication, estoppel or
+otherwise. ​
+ ​
+THE SOFTWARE CODE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+MICROSOFT OR ITS LICENSORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ARISING IN ANY WAY OUT OF THE USE OF THE SOFTWARE CODE, EVEN IF ADVISED OF THE
+POSSIBILITY OF SUCH DAMAGE.
+"""
+import os, sys, json, time, tempfile, tracemalloc
+import numpy as np
+from sklearn.linear_model import Ridge
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "training"))
+from ridge import SufficientStatistics
+from dataset import FEATURE_NAMES, read_csv_chunks, test_mask
+from generate_dataset import write_csv
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "data", "diabetes.csv")
+ALPHAS = [0.0, 0.05, 0.5, 1.0]
+CHUNK_ROWS = [1, 7, 100, 10000]
+SYNTHETIC_ROWS = 500000
+
+
+def fit_streaming(path, chunk_rows):
+    stats = SufficientStatistics(len(FEATURE_NAMES))
+    n_rows = 0
+    for X_chunk, y_chunk in read_csv_chunks(path, chunk_rows=chunk_rows):
+        train = ~test_mask(n_rows, len(X_chunk))
+        stats.update(X_chunk[train], y_chunk[train])
+        n_rows += len(X_chunk)
+    return stats
+
+
+def fit_in_memory(path, alpha):
+    data = np.loadtxt(path, delimiter=",", skiprows=1)
+    train = ~test_mask(0, len(data))
+    return Ridge(alpha=alpha).fit(data[train, :-1], data[train, -1])
+
+
+def measure(fit):
+    start = time.perf_counter()
+    fit()
+    seconds = time.perf_counter() - start
+    # tracemalloc slows down the allocation of every line several times, so
+    # the peak memory is taken from a second run
+    tracemalloc.start()
+    fit()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": round(seconds, 3), "peak_mb": round(peak / 1024 ** 2, 2)}
+
+
+if __name__ == "__main__":
+    # The streamed solution must match Ridge.fit on the same rows for any chunk size
+    for alpha in ALPHAS:
+        model = fit_in_memory(DATA_PATH, alpha)
+        for chunk_rows in CHUNK_ROWS:
+            coef, intercept = fit_streaming(DATA_PATH, chunk_rows).solve(alpha)
+            np.testing.assert_allclose(coef, model.coef_, rtol=1e-8, atol=1e-8)
+            np.testing.assert_allclose(intercept, model.intercept_, rtol=1e-8)
+    print(json.dumps({"parity": "ok", "alphas": ALPHAS, "chunk_rows": CHUNK_ROWS}))
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "synthetic.csv")
+        write_csv(path, SYNTHETIC_ROWS)
+        result = {"rows": SYNTHETIC_ROWS, "file_mb": round(os.path.getsize(path) / 1024 ** 2, 1)}
+        result["in_memory"] = measure(lambda: fit_in_memory(path, 0.5))
+        for chunk_rows in (1000, 10000, 100000):
+            result["streaming_{}".format(chunk_rows)] = measure(lambda: fit_streaming(path, chunk_rows).solve(0.5))
+        print(json.dumps(result))
@@ -0,0 +1,64 @@
+"""
+Copyright (C) Microsoft Corporation. All rights reserved.​
+ ​
+Microsoft Corporation (“Microsoft”) grants you a nonexclusive, perpetual,
+royalty-free right to use, copy, and modify the software code provided by us
+("Software Code"). You may not sublicense the Software Code or any use of it
+(except to your affiliates and to vendors to perform work on your behalf)
+through distribution, network access, service agreement, lease, rental, or
+otherwise. This license does not purport to express any claim of ownership over
+data you may have shared with Microsoft in the creation of the Software Code.
+Unless applicable law gives you more rights, Microsoft reserves all other
+rights not expressly granted herein, whether by implication, estoppel or
+otherwise. ​
+ ​
+THE SOFTWARE CODE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+MICROSOFT OR ITS LICENSORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ARISING IN ANY WAY OUT OF THE USE OF THE SOFTWARE CODE, EVEN IF ADVISED OF THE
+POSSIBILITY OF SUCH DAMAGE.
+"""
+import os, sys, json, time, tempfile, subprocess
+
+TRAINING_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "training")
+sys.path.insert(0, TRAINING_DIR)
+from tracking import JsonLinesRun, SQLiteRun
+
+METRICS = 10000
+
+
+def time_logging(run_class, path, batch_size):
+    run = run_class(path, batch_size=batch_size)
+    start = time.perf_counter()
+    for i in range(METRICS):
+        run.log("mse", float(i))
+    run.flush()
+    return round((time.perf_counter() - start) / METRICS * 1e6, 2)
+
+
+def time_startup(code, directory):
+    # Best of 5 fresh interpreters
+    timings = []
+    for _ in range(5):
+        start = time.perf_counter()
+        subprocess.check_call([sys.executable, "-c", code], cwd=directory,
+                              env=dict(os.environ, RUN_TRACKING_BACKEND="jsonl", PYTHONPATH=TRAINING_DIR))
+        timings.append(time.perf_counter() - start)
+    return round(min(timings) * 1000, 1)
+
+
+if __name__ == "__main__":
+    result = {"metrics": METRICS}
+    with tempfile.TemporaryDirectory() as directory:
+        for name, run_class, extension in (("jsonl", JsonLinesRun, "jsonl"), ("sqlite", SQLiteRun, "db")):
+            for batch_size in (1, 100):
+                path = os.path.join(directory, "{}_{}.{}".format(name, batch_size, extension))
+                result["{}_batch_{}_us_per_log".format(name, batch_size)] = time_logging(run_class, path, batch_size)
+        result["interpreter_ms"] = time_startup("pass", directory)
+        result["local_run_startup_ms"] = time_startup("import tracking; tracking.get_run().log('mse', 1.0)", directory)
+    print(json.dumps(result))
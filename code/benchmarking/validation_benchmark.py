@@ -0,0 +1,77 @@
+"""
+Copyright (C) Microsoft Corporation. All rights reserved.​
+ ​
+Microsoft Corporation (“Microsoft”) grants you a nonexclusive, perpetual,
+royalty-free right to use, copy, and modify the software code provided by us
+("Software Code"). You may not sublicense the Software Code or any use of it
+(except to your affiliates and to vendors to perform work on your behalf)
+through distribution, network access, service agreement, lease, rental, or
+otherwise. This license does not purport to express any claim of ownership over
+data you may have shared with Microsoft in the creation of the Software Code.
+Unless applicable law gives you more rights, Microsoft reserves all other
+rights not expressly granted herein, whether by implication, estoppel or
+otherwise. ​
+ ​
+THE SOFTWARE CODE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+MICROSOFT OR ITS LICENSORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ARISING IN ANY WAY OUT OF THE USE OF THE SOFTWARE CODE, EVEN IF ADVISED OF THE
+POSSIBILITY OF SUCH DAMAGE.
+"""
+import os, sys, json, timeit
+import numpy as np
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARK_DIR, "..", "scoring"))
+from validator import InputValidator
+from kernel import LinearKernel
+
+FEATURE_NAMES = ["AGE", "SEX", "BMI", "BP", "S1", "S2", "S3", "S4", "S5", "S6"]
+CONTRACT_PATH = os.path.join(BENCHMARK_DIR, "..", "training", "data_contract.json")
+DATA_PATH = os.path.join(BENCHMARK_DIR, "..", "..", "data", "diabetes.csv")
+
+
+def time_per_call(function, argument):
+    timer = timeit.Timer(lambda: function(argument))
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=5, number=number)) / number
+
+
+if __name__ == "__main__":
+    with open(CONTRACT_PATH) as f:
+        validator = InputValidator.from_contract(json.load(f), FEATURE_NAMES)
+    X = np.loadtxt(DATA_PATH, delimiter=",", skiprows=1)[:, :len(FEATURE_NAMES)]
+    kernel = LinearKernel(np.linspace(-1, 1, len(FEATURE_NAMES)), 150.0)
+
+    # The training data is valid and every kind of invalid request is rejected
+    # with the offending row and column before timing anything
+    assert validator.is_valid(X) and validator.is_valid(X.astype(np.float32))
+    invalid = X[:4].copy()
+    invalid[0, 0], invalid[2, 2], invalid[3, 5] = 100, np.nan, np.inf
+    assert not validator.is_valid(invalid)
+    assert [(error["row"], error["column"]) for error in validator.errors(invalid)] == [(0, "AGE"), (2, "BMI"), (3, "S2")]
+    assert not validator.is_valid(X[:, 1:])
+    assert not validator.is_valid(X.astype(np.int64))
+    payload = json.dumps({"data": [X[0, 1:].tolist(), X[1].tolist(), [None] * 3 + X[2, 3:].tolist()]})
+    assert [error.get("row") for error in validator.payload_errors(payload)] == [0]
+    missing = np.array(json.loads(json.dumps({"data": [[None] * 3 + X[2, 3:].tolist()]}))["data"], dtype=np.float64)
+    assert [error["column"] for error in validator.errors(missing)] == ["AGE", "SEX", "BMI"]
+
+    for rows in (1, 10, 100, 1000, 10000):
+        data = np.ascontiguousarray(np.resize(X, (rows, X.shape[1])))
+        # The kernel skips its own finite check when the validator ran before
+        unvalidated = time_per_call(lambda X: kernel.predict(X, check_shape=False), data)
+        validate = time_per_call(validator.is_valid, data)
+        validated = time_per_call(lambda X: validator.is_valid(X) and kernel.predict(X, check_shape=False, check_finite=False), data)
+        print(json.dumps({
+            "rows": rows,
+            "is_valid_us": round(validate * 1e6, 2),
+            "predict_us": round(unvalidated * 1e6, 2),
+            "validate_and_predict_us": round(validated * 1e6, 2),
+            "overhead_us": round((validated - unvalidated) * 1e6, 2)
+        }))
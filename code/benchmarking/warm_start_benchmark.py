@@ -0,0 +1,87 @@
+"""
+Copyright (C) Microsoft Corporation. All rights reserved.​
+ ​
+Microsoft Corporation (“Microsoft”) grants you a nonexclusive, perpetual,
+royalty-free right to use, copy, and modify the software code provided by us
+("Software Code"). You may not sublicense the Software Code or any use of it
+(except to your affiliates and to vendors to perform work on your behalf)
+through distribution, network access, service agreement, lease, rental, or
+otherwise. This license does not purport to express any claim of ownership over
+data you may have shared with Microsoft in the creation of the Software Code.
+Unless applicable law gives you more rights, Microsoft reserves all other
+rights not expressly granted herein, whether by implication, estoppel or
+otherwise. ​
+ ​
+THE SOFTWARE CODE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+MICROSOFT OR ITS LICENSORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ARISING IN ANY WAY OUT OF THE USE OF THE SOFTWARE CODE, EVEN IF ADVISED OF THE
+POSSIBILITY OF SUCH DAMAGE.
+"""
+import os, sys, json, time, tempfile
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "training"))
+from ridge import SufficientStatistics
+from artifact import write_artifact, read_artifact
+from parallel import accumulate_statistics
+from generate_dataset import write_csv
+
+BASE_ROWS = 500000
+DELTA_FRACTIONS = [0.01, 0.1]
+ALPHA = 0.5
+# A row without a target and a blank line, which are not used for training
+# but must not shift the train and test split of the rows after them
+SKIPPED_LINES = ",".join(["0.01"] * 10) + ",\n\n"
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return round(time.perf_counter() - start, 3), result
+
+
+def warm_start(path, artifact_path):
+    # Same steps as train.py --warm-start
+    arrays, metadata = read_artifact(artifact_path, mmap=False)
+    train_stats, test_stats, _ = accumulate_statistics(path, start_row=metadata["data_rows"], offset=metadata["data_bytes"],
+                                                       end=os.path.getsize(path))
+    return (SufficientStatistics.from_arrays(arrays, "train_").merge(train_stats),
+            SufficientStatistics.from_arrays(arrays, "test_").merge(test_stats))
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        for fraction in DELTA_FRACTIONS:
+            path = os.path.join(directory, "data.csv")
+            artifact_path = os.path.join(directory, "model.artifact")
+            write_csv(path, BASE_ROWS)
+            with open(path, "a") as f:
+                f.write(SKIPPED_LINES)
+            train_stats, test_stats, rows = accumulate_statistics(path)
+            assert rows == BASE_ROWS + 1
+            arrays = dict(train_stats.to_arrays("train_"), **test_stats.to_arrays("test_"))
+            write_artifact(artifact_path, arrays, {"data_rows": rows, "data_bytes": os.path.getsize(path)})
+
+            write_csv(path, int(BASE_ROWS * fraction), append=True, seed=43)
+            with open(path, "a") as f:
+                f.write(SKIPPED_LINES)
+            result = {"base_rows": BASE_ROWS, "delta_rows": int(BASE_ROWS * fraction)}
+            result["full_refit_s"], (full_train_stats, full_test_stats, _) = timed(lambda: accumulate_statistics(path))
+            result["warm_start_s"], (warm_train_stats, warm_test_stats) = timed(lambda: warm_start(path, artifact_path))
+
+            # Equivalence of the incremental and the full training
+            assert (warm_train_stats.n, warm_test_stats.n) == (full_train_stats.n, full_test_stats.n)
+            full_coef, full_intercept = full_train_stats.solve(ALPHA)
+            warm_coef, warm_intercept = warm_train_stats.solve(ALPHA)
+            np.testing.assert_allclose(warm_coef, full_coef, rtol=1e-9)
+            np.testing.assert_allclose(warm_intercept, full_intercept, rtol=1e-9)
+            np.testing.assert_allclose(warm_test_stats.mse_path(warm_coef[np.newaxis], np.array([warm_intercept])),
+                                       full_test_stats.mse_path(full_coef[np.newaxis], np.array([full_intercept])), rtol=1e-9)
+            result["max_coef_difference"] = float(np.abs(warm_coef - full_coef).max())
+            print(json.dumps(result))
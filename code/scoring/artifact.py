@@ -0,0 +1,117 @@
+"""
+Copyright (C) Microsoft Corporation. All rights reserved.​
+ ​
+Microsoft Corporation (“Microsoft”) grants you a nonexclusive, perpetual,
+royalty-free right to use, copy, and modify the software code provided by us
+("Software Code"). You may not sublicense the Software Code or any use of it
+(except to your affiliates and to vendors to perform work on your behalf)
+through distribution, network access, service agreement, lease, rental, or
+otherwise. This license does not purport to express any claim of ownership over
+data you may have shared with Microsoft in the creation of the Software Code.
+Unless applicable law gives you more rights, Microsoft reserves all other
+rights not expressly granted herein, whether by implication, estoppel or
+otherwise. ​
+ ​
+THE SOFTWARE CODE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+MICROSOFT OR ITS LICENSORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ARISING IN ANY WAY OUT OF THE USE OF THE SOFTWARE CODE, EVEN IF ADVISED OF THE
+POSSIBILITY OF SUCH DAMAGE.
+"""
+# This file is shipped with both the training and the scoring source
+# directories, code/training/artifact.py and code/scoring/artifact.py must
+# be kept identical, which aml_service/ci_cd/05-CheckSharedModules.py checks.
+import json, zlib, struct
+import numpy as np
+
+# Artifacts are a 24 byte little-endian header (magic, format version,
+# flags, metadata length, payload length, CRC-32 of metadata and payload)
+# followed by the JSON metadata and the payload with the raw arrays. The
+# checksum detects corrupted files, it does not protect against tampering.
+ARTIFACT_MAGIC = b"MDLA"
+ARTIFACT_VERSION = 1
+FLAG_ZLIB = 1
+COMPRESSIONS = {"none": 0, "zlib": FLAG_ZLIB}
+_ARTIFACT_HEADER = struct.Struct("<4sHHIQI")
+# Arrays start at multiples of 64 bytes of the payload
+_ALIGNMENT = 64
+
+
+def write_artifact(path, arrays, metadata=None, compression="none"):
+    """
+    Writes a dict of numpy arrays and a JSON serializable metadata dict into
+    a single versioned file. Uncompressed artifacts can be memory-mapped by
+    read_artifact. Returns the number of bytes written.
+    """
+    manifest = []
+    parts = []
+    offset = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        array = array.astype(array.dtype.newbyteorder("<"), copy=False)
+        parts.append(b"\0" * (-offset % _ALIGNMENT))
+        offset += len(parts[-1])
+        manifest.append({"name": name, "dtype": array.dtype.str, "shape": list(array.shape), "offset": offset})
+        parts.append(array.reshape(-1).view(np.uint8).data)
+        offset += array.nbytes
+    flags = COMPRESSIONS[compression]
+    if flags & FLAG_ZLIB:
+        compressor = zlib.compressobj(6)
+        parts = [compressor.compress(part) for part in parts] + [compressor.flush()]
+    meta = json.dumps({"arrays": manifest, "metadata": metadata or {}}, sort_keys=True).encode("utf-8")
+    meta += b" " * (-(_ARTIFACT_HEADER.size + len(meta)) % _ALIGNMENT)
+    checksum = zlib.crc32(meta)
+    for part in parts:
+        checksum = zlib.crc32(part, checksum)
+    payload_length = sum(len(part) for part in parts)
+    with open(path, "wb") as f:
+        f.write(_ARTIFACT_HEADER.pack(ARTIFACT_MAGIC, ARTIFACT_VERSION, flags, len(meta), payload_length, checksum))
+        f.write(meta)
+        for part in parts:
+            f.write(part)
+    return _ARTIFACT_HEADER.size + len(meta) + payload_length
+
+
+def read_artifact(path, mmap=True, verify=True):
+    """
+    Returns the arrays and the metadata of an artifact. The arrays of
+    uncompressed artifacts are read-only memory maps when mmap is true, so
+    that worker processes share their pages.
+    """
+    with open(path, "rb") as f:
+        header = f.read(_ARTIFACT_HEADER.size)
+        if len(header) < _ARTIFACT_HEADER.size:
+            raise ValueError("{} is not a model artifact".format(path))
+        magic, version, flags, meta_length, payload_length, checksum = _ARTIFACT_HEADER.unpack(header)
+        if magic != ARTIFACT_MAGIC:
+            raise ValueError("{} is not a model artifact".format(path))
+        if version > ARTIFACT_VERSION:
+            raise ValueError("Model artifact format version {} is newer than the supported version {}".format(version, ARTIFACT_VERSION))
+        meta = f.read(meta_length)
+        payload_offset = _ARTIFACT_HEADER.size + meta_length
+        if mmap and not flags & FLAG_ZLIB:
+            payload = np.memmap(path, dtype=np.uint8, mode="r", offset=payload_offset, shape=(payload_length,)) if payload_length else b""
+        else:
+            payload = f.read(payload_length)
+    if len(payload) != payload_length:
+        raise ValueError("Model artifact {} is truncated".format(path))
+    if verify and zlib.crc32(payload, zlib.crc32(meta)) != checksum:
+        raise ValueError("Checksum of model artifact {} does not match".format(path))
+    if flags & FLAG_ZLIB:
+        payload = zlib.decompress(payload)
+    meta = json.loads(meta.decode("utf-8"))
+    arrays = {}
+    for entry in meta["arrays"]:
+        dtype = np.dtype(entry["dtype"])
+        count = int(np.prod(entry["shape"]))
+        if isinstance(payload, np.memmap):
+            array = payload[entry["offset"]:entry["offset"] + count * dtype.itemsize].view(dtype)
+        else:
+            array = np.frombuffer(payload, dtype=dtype, count=count, offset=entry["offset"])
+        arrays[entry["name"]] = array.reshape(entry["shape"])
+    return arrays, meta["metadata"]
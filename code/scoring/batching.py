@@ -0,0 +1,129 @@
+"""
+Copyright (C) Microsoft Corporation. All rights reserved.​
+ ​
+Microsoft Corporation (“Microsoft”) grants you a nonexclusive, perpetual,
+royalty-free right to use, copy, and modify the software code provided by us
+("Software Code"). You may not sublicense the Software Code or any use of it
+(except to your affiliates and to vendors to perform work on your behalf)
+through distribution, network access, service agreement, lease, rental, or
+otherwise. This license does not purport to express any claim of ownership over
+data you may have shared with Microsoft in the creation of the Software Code.
+Unless applicable law gives you more rights, Microsoft reserves all other
+rights not expressly granted herein, whether by implication, estoppel or
+otherwise. ​
+ ​
+THE SOFTWARE CODE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+MICROSOFT OR ITS LICENSORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ARISING IN ANY WAY OUT OF THE USE OF THE SOFTWARE CODE, EVEN IF ADVISED OF THE
+POSSIBILITY OF SUCH DAMAGE.
+"""
+import threading, queue, time
+import numpy as np
+
+
+class _PendingRequest(object):
+    def __init__(self, data):
+        self.data = data
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+        # Set when the caller stopped waiting and predicted the request itself
+        self.abandoned = False
+
+
+class MicroBatcher(object):
+    """
+    Coalesces concurrent scoring requests into a single predict call. Callers
+    block in predict() while a worker thread gathers requests for at most
+    window_ms milliseconds or until max_batch_size rows are queued, stacks
+    them into one matrix, predicts once and hands every caller its own slice
+    of the result. Callers that wait longer than timeout_seconds, e.g.
+    because the worker died, and callers after close() predict directly.
+    The worker skips the requests of callers that stopped waiting.
+    """
+    def __init__(self, predict_fn, window_ms=2.0, max_batch_size=256, timeout_seconds=1.0):
+        self.predict_fn = predict_fn
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self.timeout = timeout_seconds
+        self.batches = 0
+        self.rows = 0
+        self.timeouts = 0
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._loop, name="micro-batcher", daemon=True)
+        self._worker.start()
+
+    def predict(self, data):
+        if not self._worker.is_alive():
+            return self.predict_fn(data)
+        request = _PendingRequest(data)
+        self._queue.put(request)
+        if not request.done.wait(self.timeout):
+            with self._lock:
+                self.timeouts += 1
+                request.abandoned = True
+            return self.predict_fn(data)
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def close(self):
+        self._queue.put(None)
+        self._worker.join(self.timeout)
+
+    def _loop(self):
+        running = True
+        while running:
+            request = self._queue.get()
+            if request is None:
+                break
+            batch = [request]
+            rows = len(request.data)
+            deadline = time.monotonic() + self.window
+            while rows < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if request is None:
+                    running = False
+                    break
+                batch.append(request)
+                rows += len(request.data)
+            self._process(batch)
+
+    def _process(self, batch):
+        with self._lock:
+            batch = [request for request in batch if not request.abandoned]
+        if not batch:
+            return
+        try:
+            data = batch[0].data if len(batch) == 1 else np.concatenate([request.data for request in batch])
+            result = self.predict_fn(data)
+            offset = 0
+            for request in batch:
+                request.result = result[offset:offset + len(request.data)]
+                offset += len(request.data)
+            self.batches += 1
+            self.rows += len(data)
+        except Exception:
+            # A single malformed request must not fail its neighbours, so the
+            # batch is replayed request by request to attribute the error.
+            for request in batch:
+                try:
+                    request.result = self.predict_fn(request.data)
+                except Exception as e:
+                    request.error = e
+        finally:
+            for request in batch:
+                request.done.set()
@@ -0,0 +1,93 @@
+"""
+Copyright (C) Microsoft Corporation. All rights reserved.​
+ ​
+Microsoft Corporation (“Microsoft”) grants you a nonexclusive, perpetual,
+royalty-free right to use, copy, and modify the software code provided by us
+("Software Code"). You may not sublicense the Software Code or any use of it
+(except to your affiliates and to vendors to perform work on your behalf)
+through distribution, network access, service agreement, lease, rental, or
+otherwise. This license does not purport to express any claim of ownership over
+data you may have shared with Microsoft in the creation of the Software Code.
+Unless applicable law gives you more rights, Microsoft reserves all other
+rights not expressly granted herein, whether by implication, estoppel or
+otherwise. ​
+ ​
+THE SOFTWARE CODE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+MICROSOFT OR ITS LICENSORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ARISING IN ANY WAY OUT OF THE USE OF THE SOFTWARE CODE, EVEN IF ADVISED OF THE
+POSSIBILITY OF SUCH DAMAGE.
+"""
+import threading, time
+from collections import OrderedDict
+import numpy as np
+
+
+class PredictionCache(object):
+    """
+    In-process cache of single row predictions keyed on the bytes of the
+    float64 row. Entries are evicted least recently used first once max_size
+    rows are cached and expire ttl_seconds after they were computed. Only the
+    rows of a request that miss the cache are passed to predict_fn.
+    """
+    def __init__(self, max_size=10000, ttl_seconds=300.0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def predict(self, data, predict_fn):
+        rows = np.ascontiguousarray(data, dtype=np.float64)
+        keys = [row.tobytes() for row in rows]
+        result = np.empty(len(keys), dtype=np.float64)
+        missing = []
+        now = time.monotonic()
+        with self._lock:
+            for index, key in enumerate(keys):
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] <= now:
+                    del self._entries[key]
+                    self.expirations += 1
+                    entry = None
+                if entry is None:
+                    missing.append(index)
+                else:
+                    self._entries.move_to_end(key)
+                    result[index] = entry[0]
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+        if missing:
+            predictions = predict_fn(data if len(missing) == len(keys) else data[missing])
+            result[missing] = predictions
+            expires = time.monotonic() + self.ttl_seconds
+            with self._lock:
+                for index, prediction in zip(missing, result[missing].tolist()):
+                    self._entries[keys[index]] = (prediction, expires)
+                    self._entries.move_to_end(keys[index])
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return result
+
+    def invalidate(self):
+        """
+        Drops all cached predictions, e.g. after a new model version was loaded.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "expirations": self.expirations, "invalidations": self.invalidations}
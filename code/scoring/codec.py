@@ -0,0 +1,90 @@
+"""
+Copyright (C) Microsoft Corporation. All rights reserved.​
+ ​
+Microsoft Corporation (“Microsoft”) grants you a nonexclusive, perpetual,
+royalty-free right to use, copy, and modify the software code provided by us
+("Software Code"). You may not sublicense the Software Code or any use of it
+(except to your affiliates and to vendors to perform work on your behalf)
+through distribution, network access, service agreement, lease, rental, or
+otherwise. This license does not purport to express any claim of ownership over
+data you may have shared with Microsoft in the creation of the Software Code.
+Unless applicable law gives you more rights, Microsoft reserves all other
+rights not expressly granted herein, whether by implication, estoppel or
+otherwise. ​
+ ​
+THE SOFTWARE CODE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+MICROSOFT OR ITS LICENSORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ARISING IN ANY WAY OUT OF THE USE OF THE SOFTWARE CODE, EVEN IF ADVISED OF THE
+POSSIBILITY OF SUCH DAMAGE.
+"""
+import struct
+import numpy as np
+
+N_FEATURES = 10
+
+JSON_CONTENT_TYPE = "application/json"
+BINARY_CONTENT_TYPE = "application/x-ndarray"
+
+# Binary payloads are a 16 byte little-endian header (magic, format version,
+# dtype code, columns, rows) followed by the row-major matrix values.
+BINARY_MAGIC = b"NDAR"
+BINARY_VERSION = 1
+_BINARY_HEADER = struct.Struct("<4sBcHQ")
+_BINARY_DTYPES = {b"f": np.dtype("<f4"), b"d": np.dtype("<f8")}
+_BINARY_CODES = {dtype: code for code, dtype in _BINARY_DTYPES.items()}
+
+
+def read_request(request):
+    """
+    Returns the body, the content type and the negotiated response type of a
+    scoring request. Plain strings, as passed to run() outside of the web
+    service, are treated as JSON which stays the default format.
+    """
+    if isinstance(request, (str, bytes)):
+        return request, JSON_CONTENT_TYPE, JSON_CONTENT_TYPE
+    content_type = request.headers.get("Content-Type", JSON_CONTENT_TYPE).split(";")[0].strip().lower()
+    if content_type != BINARY_CONTENT_TYPE:
+        content_type = JSON_CONTENT_TYPE
+    accept = request.headers.get("Accept", "").lower()
+    if BINARY_CONTENT_TYPE in accept or (content_type == BINARY_CONTENT_TYPE and JSON_CONTENT_TYPE not in accept):
+        response_type = BINARY_CONTENT_TYPE
+    else:
+        response_type = JSON_CONTENT_TYPE
+    return request.get_data(), content_type, response_type
+
+
+def decode_binary(buffer, n_features=N_FEATURES):
+    """
+    Decodes a binary payload into a read-only (rows, n_features) matrix that
+    shares memory with the request buffer.
+    """
+    if len(buffer) < _BINARY_HEADER.size:
+        raise ValueError("Binary payload is shorter than its header")
+    magic, version, code, columns, rows = _BINARY_HEADER.unpack_from(buffer)
+    if magic != BINARY_MAGIC or version != BINARY_VERSION or code not in _BINARY_DTYPES:
+        raise ValueError("Binary payload has an invalid header")
+    if columns != n_features:
+        raise ValueError("Expected data of shape (rows, {}), got {}".format(n_features, (rows, columns)))
+    data = np.frombuffer(buffer, dtype=_BINARY_DTYPES[code], count=rows * columns, offset=_BINARY_HEADER.size)
+    return data.reshape(rows, columns)
+
+
+def encode_binary(array, dtype=None):
+    """
+    Encodes a 1-d or 2-d float array as a binary payload. Arrays that are not
+    float32 or float64 are written as float64 unless dtype says otherwise.
+    """
+    array = np.asarray(array)
+    if dtype is None:
+        dtype = array.dtype if array.dtype in _BINARY_CODES else np.float64
+    array = np.ascontiguousarray(array, dtype=np.dtype(dtype).newbyteorder("<"))
+    if array.ndim == 1:
+        array = array.reshape(-1, 1)
+    rows, columns = array.shape
+    return _BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, _BINARY_CODES[array.dtype], columns, rows) + array.tobytes()
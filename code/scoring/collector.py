@@ -0,0 +1,170 @@
+"""
+Copyright (C) Microsoft Corporation. All rights reserved.​
+ ​
+Microsoft Corporation (“Microsoft”) grants you a nonexclusive, perpetual,
+royalty-free right to use, copy, and modify the software code provided by us
+("Software Code"). You may not sublicense the Software Code or any use of it
+(except to your affiliates and to vendors to perform work on your behalf)
+through distribution, network access, service agreement, lease, rental, or
+otherwise. This license does not purport to express any claim of ownership over
+data you may have shared with Microsoft in the creation of the Software Code.
+Unless applicable law gives you more rights, Microsoft reserves all other
+rights not expressly granted herein, whether by implication, estoppel or
+otherwise. ​
+ ​
+THE SOFTWARE CODE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+MICROSOFT OR ITS LICENSORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ARISING IN ANY WAY OUT OF THE USE OF THE SOFTWARE CODE, EVEN IF ADVISED OF THE
+POSSIBILITY OF SUCH DAMAGE.
+"""
+import os, threading, queue, time, atexit
+import numpy as np
+
+DROP_NEWEST = "drop_newest"
+DROP_OLDEST = "drop_oldest"
+BLOCK = "block"
+
+
+class ModelDataCollectorSink(object):
+    """
+    Forwards batches of inputs and predictions to a pair of AML
+    ModelDataCollector objects with one collect() call per batch.
+    """
+    def __init__(self, inputs_dc, prediction_dc):
+        self.inputs_dc = inputs_dc
+        self.prediction_dc = prediction_dc
+
+    def write(self, inputs, predictions):
+        self.inputs_dc.collect(inputs)
+        self.prediction_dc.collect(predictions)
+
+    def close(self):
+        pass
+
+
+class FileSink(object):
+    """
+    Appends batches of inputs and predictions as CSV rows to a local file,
+    used when the service runs outside of AML.
+    """
+    def __init__(self, path, feature_names, prediction_names):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        write_header = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, "a")
+        if write_header:
+            self._file.write(",".join(feature_names + prediction_names) + "\n")
+
+    def write(self, inputs, predictions):
+        np.savetxt(self._file, np.column_stack([inputs, predictions]), delimiter=",", fmt="%.17g")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class BackgroundCollector(object):
+    """
+    Takes model data collection off the request path. collect() puts the
+    inputs and predictions of a request on a bounded queue and a worker
+    thread writes them to the sink in batches of up to batch_size records,
+    or at least every flush_seconds. When the queue is full the drop policy
+    decides whether the new record is dropped, the oldest queued record is
+    dropped or the caller blocks until there is room.
+    """
+    def __init__(self, sink, queue_size=1000, batch_size=100, flush_seconds=1.0, drop_policy=DROP_NEWEST):
+        if drop_policy not in (DROP_NEWEST, DROP_OLDEST, BLOCK):
+            raise ValueError("Unknown drop policy {}".format(drop_policy))
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.drop_policy = drop_policy
+        self.collected = 0
+        self.dropped = 0
+        self.flushed = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._closed = False
+        self._worker = threading.Thread(target=self._loop, name="data-collector", daemon=True)
+        self._worker.start()
+        atexit.register(self.close)
+
+    def collect(self, inputs, predictions):
+        if self._closed:
+            self._count("dropped", 1)
+            return
+        record = (inputs, predictions)
+        if self.drop_policy == BLOCK:
+            self._queue.put(record)
+        else:
+            while True:
+                try:
+                    self._queue.put_nowait(record)
+                    break
+                except queue.Full:
+                    if self.drop_policy == DROP_NEWEST:
+                        self._count("dropped", 1)
+                        return
+                    try:
+                        self._queue.get_nowait()
+                        self._count("dropped", 1)
+                    except queue.Empty:
+                        pass
+        self._count("collected", 1)
+
+    def stats(self):
+        with self._lock:
+            return {"collected": self.collected, "dropped": self.dropped, "flushed": self.flushed,
+                    "failed": self.failed, "queued": self._queue.qsize()}
+
+    def close(self):
+        """
+        Flushes every queued record and stops the worker thread.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        atexit.unregister(self.close)
+        self._queue.put(None)
+        self._worker.join()
+        self.sink.close()
+
+    def _count(self, counter, value):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + value)
+
+    def _loop(self):
+        running = True
+        while running:
+            batch = []
+            deadline = time.monotonic() + self.flush_seconds
+            while len(batch) < self.batch_size:
+                try:
+                    record = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if record is None:
+                    running = False
+                    break
+                batch.append(record)
+            if batch:
+                self._flush(batch)
+
+    def _flush(self, batch):
+        try:
+            inputs = np.concatenate([np.atleast_2d(record[0]) for record in batch])
+            predictions = np.concatenate([np.ravel(record[1]) for record in batch])
+            self.sink.write(inputs, predictions)
+            self._count("flushed", len(batch))
+        except Exception as e:
+            self._count("failed", len(batch))
+            print("Data collection failed: " + str(e) + " " + time.strftime("%H:%M:%S"))
@@ -0,0 +1,168 @@
+"""
+Copyright (C) Microsoft Corporation. All rights reserved.​
+ ​
+Microsoft Corporation (“Microsoft”) grants you a nonexclusive, perpetual,
+royalty-free right to use, copy, and modify the software code provided by us
+("Software Code"). You may not sublicense the Software Code or any use of it
+(except to your affiliates and to vendors to perform work on your behalf)
+through distribution, network access, service agreement, lease, rental, or
+otherwise. This license does not purport to express any claim of ownership over
+data you may have shared with Microsoft in the creation of the Software Code.
+Unless applicable law gives you more rights, Microsoft reserves all other
+rights not expressly granted herein, whether by implication, estoppel or
+otherwise. ​
+ ​
+THE SOFTWARE CODE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+MICROSOFT OR ITS LICENSORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ARISING IN ANY WAY OUT OF THE USE OF THE SOFTWARE CODE, EVEN IF ADVISED OF THE
+POSSIBILITY OF SUCH DAMAGE.
+"""
+import time, threading
+import numpy as np
+from sketches import FeatureProfile, QUANTILES
+
+# Added to the bin fractions so that empty bins don't make the PSI infinite
+PSI_EPSILON = 1e-4
+# A PSI above 0.2 or a KS distance above 0.1 is commonly read as a significant shift
+PSI_THRESHOLD = 0.2
+KS_THRESHOLD = 0.1
+# Windows with fewer rows are too noisy to flag, a KS distance of 0.1 is
+# within the sampling error of about 200 rows
+MIN_ROWS = 500
+
+
+class DriftMonitor(object):
+    """
+    Compares the features of scored requests with the dataset profile of
+    the training data, without keeping the requests. Rows are copied into a
+    buffer and added to a FeatureProfile with the histogram bins of the
+    baseline buffer_rows at a time, so a request only pays for the copy and
+    memory stays constant. scores() returns per feature the shift of the
+    mean in baseline standard deviations, the ratio of the standard
+    deviations, the population stability index over the histogram bins and
+    the Kolmogorov-Smirnov distance between the quantile sketches.
+    The rows are compared in tumbling windows of window_seconds, which are
+    reported and reset by maybe_report(), so that a shift after hours of
+    traffic is not diluted by the rows before it. Windows with fewer than
+    min_rows rows are scored but never flagged as drifted.
+    """
+    def __init__(self, baseline, feature_names, buffer_rows=1024, window_seconds=300.0, min_rows=MIN_ROWS,
+                 psi_threshold=PSI_THRESHOLD, ks_threshold=KS_THRESHOLD):
+        self.feature_names = list(feature_names)
+        self.baseline_mean = np.asarray(baseline["mean"], dtype=np.float64)
+        self.baseline_std = np.sqrt(np.asarray(baseline["variance"], dtype=np.float64))
+        baseline_histogram = np.asarray(baseline["histogram"], dtype=np.float64)
+        self.baseline_fractions = baseline_histogram / np.maximum(baseline_histogram.sum(axis=1, keepdims=True), 1)
+        self.baseline_quantiles = np.asarray(baseline["quantiles"], dtype=np.float64)
+        # Both distributions are compared at the baseline quantiles, where
+        # the CDF of the baseline rises by 1 / (len(QUANTILES) - 1) per quantile
+        steps = len(QUANTILES) - 1
+        self.baseline_cdf = np.column_stack([np.clip(np.searchsorted(quantiles, quantiles, side="right") - 1, 0, steps)
+                                             for quantiles in self.baseline_quantiles.T]) / float(steps)
+        self._histogram_lower = baseline["histogram_lower"]
+        self._histogram_upper = baseline["histogram_upper"]
+        self._bins = baseline_histogram.shape[1] - 2
+        self.profile = self._new_profile()
+        self.psi_threshold = psi_threshold
+        self.ks_threshold = ks_threshold
+        self.min_rows = min_rows
+        self.window_seconds = window_seconds
+        self.last_window = None
+        self._buffer = np.empty((buffer_rows, len(self.feature_names)))
+        self._rows = 0
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+
+    def _new_profile(self):
+        return FeatureProfile(self._histogram_lower, self._histogram_upper, bins=self._bins)
+
+    def observe(self, X):
+        with self._lock:
+            start = 0
+            while start < len(X):
+                rows = min(len(X) - start, len(self._buffer) - self._rows)
+                self._buffer[self._rows:self._rows + rows] = X[start:start + rows]
+                self._rows += rows
+                start += rows
+                if self._rows == len(self._buffer):
+                    self._flush()
+
+    def _flush(self):
+        if self._rows:
+            self.profile.update(self._buffer[:self._rows])
+            self._rows = 0
+
+    def scores(self):
+        """
+        Returns the drift scores of the current window.
+        """
+        with self._lock:
+            self._flush()
+            return self._scores(self.profile)
+
+    def _scores(self, profile):
+        count = profile.moments.count
+        if not count:
+            return {"rows": 0, "features": {}, "drifted": []}
+        mean = profile.moments.mean
+        std = np.sqrt(profile.moments.variance())
+        fractions = profile.histogram.counts / float(count) + PSI_EPSILON
+        baseline_fractions = self.baseline_fractions + PSI_EPSILON
+        psi = ((fractions - baseline_fractions) * np.log(fractions / baseline_fractions)).sum(axis=1)
+        ks = np.abs(profile.sketch.cdf(self.baseline_quantiles) - self.baseline_cdf).max(axis=0)
+        std_safe = np.where(self.baseline_std > 0, self.baseline_std, 1.0)
+        features = {}
+        for i, name in enumerate(self.feature_names):
+            features[name] = {
+                "mean_shift": round(float((mean[i] - self.baseline_mean[i]) / std_safe[i]), 4),
+                "std_ratio": round(float(std[i] / std_safe[i]), 4),
+                "psi": round(float(psi[i]), 4),
+                "ks": round(float(ks[i]), 4)
+            }
+        drifted = []
+        if count >= self.min_rows:
+            drifted = [name for i, name in enumerate(self.feature_names) if psi[i] > self.psi_threshold or ks[i] > self.ks_threshold]
+        return {"rows": int(count), "features": features, "drifted": drifted}
+
+    def report(self):
+        """
+        Returns the drift scores of the current window, which is then
+        replaced by an empty one and kept as last_window.
+        """
+        with self._lock:
+            return self._close_window()
+
+    def _close_window(self):
+        # Called with the lock held
+        self._flush()
+        profile, self.profile = self.profile, self._new_profile()
+        self._window_start = time.monotonic()
+        self.last_window = self._scores(profile)
+        return self.last_window
+
+    def maybe_report(self):
+        """
+        Closes the current window and prints its drift scores when
+        window_seconds have passed since it started. With window_seconds 0
+        the window only closes when report() is called.
+        """
+        if not self.window_seconds or time.monotonic() - self._window_start < self.window_seconds:
+            return
+        with self._lock:
+            # Another request may have closed the window since the check above
+            if time.monotonic() - self._window_start < self.window_seconds:
+                return
+            scores = self._close_window()
+        print("Drift of {} rows: ".format(scores["rows"]) + ", ".join("{0} psi {1} ks {2}".format(name, values["psi"], values["ks"])
+                                                                   for name, values in scores["features"].items())
+              + (" drifted: " + ", ".join(scores["drifted"]) if scores["drifted"] else "")
+              + (" below {} rows".format(self.min_rows) if scores["rows"] < self.min_rows else "") + " " + time.strftime("%H:%M:%S"))
+
+    def stats(self):
+        return {"window": self.scores(), "last_window": self.last_window}
@@ -0,0 +1,51 @@
+"""
+Copyright (C) Microsoft Corporation. All rights reserved.​
+ ​
+Microsoft Corporation (“Microsoft”) grants you a nonexclusive, perpetual,
+royalty-free right to use, copy, and modify the software code provided by us
+("Software Code"). You may not sublicense the Software Code or any use of it
+(except to your affiliates and to vendors to perform work on your behalf)
+through distribution, network access, service agreement, lease, rental, or
+otherwise. This license does not purport to express any claim of ownership over
+data you may have shared with Microsoft in the creation of the Software Code.
+Unless applicable law gives you more rights, Microsoft reserves all other
+rights not expressly granted herein, whether by implication, estoppel or
+otherwise. ​
+ ​
+THE SOFTWARE CODE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+MICROSOFT OR ITS LICENSORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ARISING IN ANY WAY OUT OF THE USE OF THE SOFTWARE CODE, EVEN IF ADVISED OF THE
+POSSIBILITY OF SUCH DAMAGE.
+"""
+import numpy as np
+
+
+class Imputer(object):
+    """
+    Replaces missing values of a decoded request by the values fitted in
+    training, the medians of the features stored in the model artifact.
+    Requests without missing values are returned as they are after a
+    single np.isnan() check, the others are filled with one np.where().
+    """
+    def __init__(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        # Values in the dtype of the request keep float32 requests float32
+        self.values = {np.dtype(np.float64): values, np.dtype(np.float32): values.astype(np.float32)}
+        self.n_features = len(values)
+        self.imputed_rows = 0
+
+    def transform(self, X):
+        values = self.values.get(X.dtype)
+        if values is None or X.ndim != 2 or X.shape[1] != self.n_features:
+            return X
+        missing = np.isnan(X)
+        if not missing.any():
+            return X
+        self.imputed_rows += int(missing.any(axis=1).sum())
+        return np.where(missing, values, X)
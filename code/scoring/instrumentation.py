@@ -0,0 +1,123 @@
+"""
+Copyright (C) Microsoft Corporation. All rights reserved.​
+ ​
+Microsoft Corporation (“Microsoft”) grants you a nonexclusive, perpetual,
+royalty-free right to use, copy, and modify the software code provided by us
+("Software Code"). You may not sublicense the Software Code or any use of it
+(except to your affiliates and to vendors to perform work on your behalf)
+through distribution, network access, service agreement, lease, rental, or
+otherwise. This license does not purport to express any claim of ownership over
+data you may have shared with Microsoft in the creation of the Software Code.
+Unless applicable law gives you more rights, Microsoft reserves all other
+rights not expressly granted herein, whether by implication, estoppel or
+otherwise. ​
+ ​
+THE SOFTWARE CODE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+MICROSOFT OR ITS LICENSORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ARISING IN ANY WAY OUT OF THE USE OF THE SOFTWARE CODE, EVEN IF ADVISED OF THE
+POSSIBILITY OF SUCH DAMAGE.
+"""
+import bisect, time
+
+# Upper bounds of the histogram buckets in seconds, the last bucket collects
+# everything above 1 second
+BUCKET_BOUNDS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+class LatencyHistograms(object):
+    """
+    Fixed-bucket latency histograms per stage of run(). Recording a duration
+    is a bisect over BUCKET_BOUNDS and a counter increment, so it can stay on
+    the hot path. Percentiles are estimated from the bucket upper bounds.
+    The total time of every request is also recorded under "total_" and the
+    status of its response, e.g. "total_invalid" for rejected requests.
+    """
+    def __init__(self, stages, statuses=(), log_seconds=60.0, bounds=BUCKET_BOUNDS):
+        self.stages = list(stages) + ["total_" + status for status in statuses]
+        self.bounds = bounds
+        self.log_seconds = log_seconds
+        self._counts = {stage: [0] * (len(bounds) + 1) for stage in self.stages}
+        self._totals = {stage: 0.0 for stage in self.stages}
+        self._maxima = {stage: 0.0 for stage in self.stages}
+        self._last_log = time.monotonic()
+
+    def clock(self):
+        return StageClock(self)
+
+    def record(self, stage, seconds):
+        # Counters are updated without a lock to keep this cheap; under
+        # concurrent requests an increment can rarely get lost, which is
+        # acceptable for monitoring
+        self._counts[stage][bisect.bisect_left(self.bounds, seconds)] += 1
+        self._totals[stage] += seconds
+        if seconds > self._maxima[stage]:
+            self._maxima[stage] = seconds
+
+    def snapshot(self):
+        counts = {stage: list(values) for stage, values in self._counts.items()}
+        totals = dict(self._totals)
+        maxima = dict(self._maxima)
+        stats = {}
+        for stage in self.stages:
+            count = sum(counts[stage])
+            stats[stage] = {
+                "count": count,
+                "mean_ms": round(totals[stage] / count * 1000, 4) if count else None,
+                "p50_ms": self._percentile(counts[stage], count, 0.50, maxima[stage]),
+                "p95_ms": self._percentile(counts[stage], count, 0.95, maxima[stage]),
+                "p99_ms": self._percentile(counts[stage], count, 0.99, maxima[stage]),
+                "max_ms": round(maxima[stage] * 1000, 4),
+                "buckets": counts[stage]
+            }
+        return stats
+
+    def maybe_log(self):
+        """
+        Prints one summary line when log_seconds have passed since the last one.
+        """
+        now = time.monotonic()
+        if not self.log_seconds or now - self._last_log < self.log_seconds:
+            return
+        self._last_log = now
+        stats = self.snapshot()
+        print("Latency " + ", ".join("{0} p50 {1}ms p99 {2}ms".format(stage, stats[stage]["p50_ms"], stats[stage]["p99_ms"])
+                                     for stage in self.stages) + " " + time.strftime("%H:%M:%S"))
+
+    def _percentile(self, counts, count, quantile, maximum):
+        if not count:
+            return None
+        threshold = quantile * count
+        cumulative = 0
+        for bucket, value in enumerate(counts):
+            cumulative += value
+            if cumulative >= threshold:
+                upper = self.bounds[bucket] if bucket < len(self.bounds) else maximum
+                return round(min(upper, maximum) * 1000, 4)
+
+
+class StageClock(object):
+    """
+    Measures consecutive stages of one request, each lap() records the time
+    since the previous lap under the given stage.
+    """
+    def __init__(self, histograms):
+        self.histograms = histograms
+        self.start = self.last = time.perf_counter()
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        self.histograms.record(stage, now - self.last)
+        self.last = now
+
+    def stop(self, status=None, stage="total"):
+        seconds = time.perf_counter() - self.start
+        self.histograms.record(stage, seconds)
+        if status is not None:
+            self.histograms.record("total_" + status, seconds)
@@ -0,0 +1,80 @@
+"""
+Copyright (C) Microsoft Corporation. All rights reserved.​
+ ​
+Microsoft Corporation (“Microsoft”) grants you a nonexclusive, perpetual,
+royalty-free right to use, copy, and modify the software code provided by us
+("Software Code"). You may not sublicense the Software Code or any use of it
+(except to your affiliates and to vendors to perform work on your behalf)
+through distribution, network access, service agreement, lease, rental, or
+otherwise. This license does not purport to express any claim of ownership over
+data you may have shared with Microsoft in the creation of the Software Code.
+Unless applicable law gives you more rights, Microsoft reserves all other
+rights not expressly granted herein, whether by implication, estoppel or
+otherwise. ​
+ ​
+THE SOFTWARE CODE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+MICROSOFT OR ITS LICENSORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ARISING IN ANY WAY OUT OF THE USE OF THE SOFTWARE CODE, EVEN IF ADVISED OF THE
+POSSIBILITY OF SUCH DAMAGE.
+"""
+import threading
+import numpy as np
+
+
+class LinearKernel(object):
+    """
+    Inference kernel for linear models that computes X @ coef + intercept
+    directly on contiguous coefficients instead of going through the input
+    validation and dispatch of the estimator's predict(). In float32 mode
+    requests are cast into per-thread scratch buffers of scratch_rows rows
+    that are reused between calls.
+    """
+    def __init__(self, coef, intercept, dtype=np.float64, scratch_rows=1024):
+        self.dtype = np.dtype(dtype)
+        self.coef = np.ascontiguousarray(np.ravel(coef), dtype=self.dtype)
+        self.intercept = self.dtype.type(intercept)
+        self.n_features = self.coef.shape[0]
+        self.scratch_rows = scratch_rows
+        self._local = threading.local()
+
+    @classmethod
+    def from_model(cls, model, dtype=np.float64, scratch_rows=1024):
+        coef = np.asarray(model.coef_)
+        if coef.ndim != 1:
+            raise ValueError("LinearKernel only supports single target models, got coef_ of shape {}".format(coef.shape))
+        return cls(coef, model.intercept_, dtype=dtype, scratch_rows=scratch_rows)
+
+    def predict(self, X, check_shape=True, check_finite=True):
+        """
+        Predicts X. check_shape can be turned off by callers that already
+        made sure X is a 2-d array with n_features columns. Non-finite values
+        are rejected like in scikit-learn unless check_finite is turned off
+        by callers that validated X already.
+        """
+        if check_shape:
+            X = np.asarray(X)
+            if X.ndim != 2 or X.shape[1] != self.n_features:
+                raise ValueError("Expected data of shape (rows, {}), got {}".format(self.n_features, X.shape))
+        if X.dtype != self.dtype:
+            X = self._cast(X)
+        if check_finite and not np.isfinite(X).all():
+            raise ValueError("Input contains NaN, infinity or a value too large for {}.".format(self.dtype))
+        result = X.dot(self.coef)
+        result += self.intercept
+        return result
+
+    def _cast(self, X):
+        rows = X.shape[0]
+        if rows > self.scratch_rows:
+            return X.astype(self.dtype)
+        scratch = getattr(self._local, "scratch", None)
+        if scratch is None:
+            scratch = self._local.scratch = np.empty((self.scratch_rows, self.n_features), dtype=self.dtype)
+        np.copyto(scratch[:rows], X, casting="unsafe")
+        return scratch[:rows]
@@ -0,0 +1,74 @@
+"""
+Copyright (C) Microsoft Corporation. All rights reserved.​
+ ​
+Microsoft Corporation (“Microsoft”) grants you a nonexclusive, perpetual,
+royalty-free right to use, copy, and modify the software code provided by us
+("Software Code"). You may not sublicense the Software Code or any use of it
+(except to your affiliates and to vendors to perform work on your behalf)
+through distribution, network access, service agreement, lease, rental, or
+otherwise. This license does not purport to express any claim of ownership over
+data you may have shared with Microsoft in the creation of the Software Code.
+Unless applicable law gives you more rights, Microsoft reserves all other
+rights not expressly granted herein, whether by implication, estoppel or
+otherwise. ​
+ ​
+THE SOFTWARE CODE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+MICROSOFT OR ITS LICENSORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ARISING IN ANY WAY OUT OF THE USE OF THE SOFTWARE CODE, EVEN IF ADVISED OF THE
+POSSIBILITY OF SUCH DAMAGE.
+"""
+import os
+
+_SMAPS_ROLLUP = "/proc/self/smaps_rollup"
+_STATUS = "/proc/self/status"
+
+
+def get_memory_usage():
+    """
+    Returns the resident memory of the current process in MB, split into
+    pages shared with other processes (e.g. a memory-mapped model used by
+    several workers) and pages private to this process. Pss charges every
+    shared page proportionally to the processes mapping it. An empty dict is
+    returned on platforms without /proc/self/smaps_rollup.
+    """
+    if not os.path.exists(_SMAPS_ROLLUP):
+        return {}
+    values = {}
+    with open(_SMAPS_ROLLUP) as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                values[parts[0].rstrip(":")] = int(parts[1]) / 1024.0
+    return {
+        "rss": values.get("Rss", 0.0),
+        "pss": values.get("Pss", 0.0),
+        "shared": values.get("Shared_Clean", 0.0) + values.get("Shared_Dirty", 0.0),
+        "private": values.get("Private_Clean", 0.0) + values.get("Private_Dirty", 0.0)
+    }
+
+
+def get_peak_rss():
+    """
+    Returns the peak resident memory of the current process in MB. Unlike
+    ru_maxrss, VmHWM is not inherited from the parent of a spawned process.
+    """
+    if os.path.exists(_STATUS):
+        with open(_STATUS) as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024.0
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def format_memory_delta(before, after):
+    if not before or not after:
+        return "memory usage not available"
+    return "RSS {0:+.1f} MB (private {1:+.1f} MB, shared {2:+.1f} MB, PSS {3:+.1f} MB)".format(
+        *(after[key] - before[key] for key in ("rss", "private", "shared", "pss")))
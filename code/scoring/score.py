@@ -23,44 +23,276 @@ IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
 ARISING IN ANY WAY OUT OF THE USE OF THE SOFTWARE CODE, EVEN IF ADVISED OF THE
 POSSIBILITY OF SUCH DAMAGE.
 """
-import pickle, json, time
+import time
+IMPORT_START = time.perf_counter()
+import os, json, functools
 import numpy as np
-from sklearn.externals import joblib
-from sklearn.linear_model import Ridge
-from azureml.core.model import Model
-from azureml.monitoring import ModelDataCollector
+# sklearn, azureml.core and azureml.monitoring are imported in init() only
+# when they are needed, as they dominate the cold start of a new replica
+from azureml.contrib.services.aml_request import rawhttp
+from azureml.contrib.services.aml_response import AMLResponse
+from batching import MicroBatcher
+from cache import PredictionCache
+from kernel import LinearKernel
+from artifact import read_artifact
+from validator import InputValidator
+from imputation import Imputer
+from drift import DriftMonitor
+from memory import get_memory_usage, format_memory_delta
+from instrumentation import LatencyHistograms
+from collector import BackgroundCollector, ModelDataCollectorSink, FileSink
+from codec import JSON_CONTENT_TYPE, BINARY_CONTENT_TYPE, read_request, decode_binary, encode_binary
 #from inference_schema.schema_decorators import input_schema, output_schema
 #from inference_schema.parameter_types.numpy_parameter_type import NumpyParameterType
 
+FEATURE_NAMES = ["AGE", "SEX", "BMI", "BP", "S1", "S2", "S3", "S4", "S5", "S6"]
+PREDICTION_NAMES = ["Y"]
+STAGES = ["decode", "predict", "collect", "encode", "total"]
+# Responses are counted as ok, rejected as invalid input or failed with an error
+STATUSES = ["ok", "invalid", "error"]
+MODEL_NAME = "mymodel"
+MODEL_FOLDER = "outputs"
+MODEL_FILE_NAME = "mymodel.pkl"
+COEFFICIENTS_FILE_NAME = "mymodel_coef.npy"
+ARTIFACT_FILE_NAME = "mymodel.artifact"
+CONTRACT_FILE_NAME = "data_contract.json"
+PROFILE_FILE_NAME = "dataset_profile.artifact"
+IMPORT_SECONDS = time.perf_counter() - IMPORT_START
+
+# Kept across calls of init() so that its counters survive model reloads
+cache = None
+# Stopped by the next call of init()
+batcher = None
+collector = None
+
+def get_model_dir():
+    # AZUREML_MODEL_DIR is set in the scoring container and resolves the
+    # registered folder without importing azureml.core
+    model_dir = os.environ.get("AZUREML_MODEL_DIR")
+    if model_dir:
+        return os.path.join(model_dir, MODEL_FOLDER)
+    from azureml.core.model import Model
+    return Model.get_model_path(model_name=MODEL_NAME)
+
 def init():
+    init_start = time.perf_counter()
     global model
     print("Model Initialized: " + time.strftime("%H:%M:%S"))
     # load the model from file into a global object
-    model_path = Model.get_model_path(model_name="mymodel")
-    model = joblib.load(model_path)
+    model_dir = get_model_dir()
+    fast_startup = os.environ.get("SCORING_FAST_STARTUP", "true").lower() == "true"
+    coefficients_path = os.path.join(model_dir, COEFFICIENTS_FILE_NAME)
+    artifact_path = os.path.join(model_dir, ARTIFACT_FILE_NAME)
+    kernel_dtype = os.environ.get("SCORING_KERNEL_DTYPE", "float64")
+    scratch_rows = int(os.environ.get("SCORING_KERNEL_SCRATCH_ROWS", 1024))
+    memory_before = get_memory_usage()
+    arrays = None
+    if fast_startup and os.path.exists(artifact_path):
+        # Uncompressed artifacts are memory-mapped like the coefficients file
+        model = None
+        arrays, metadata = read_artifact(artifact_path, mmap=True)
+        print("Loading model artifact of a {} model trained with alpha {}".format(metadata.get("model"), metadata.get("alpha")))
+        kernel = LinearKernel(arrays["coef"], arrays["intercept"][0], dtype=kernel_dtype, scratch_rows=scratch_rows)
+    elif fast_startup and os.path.exists(coefficients_path):
+        # Pages of the memory-mapped file are shared by all worker processes
+        # as long as the kernel runs in float64 and does not copy them
+        print("Loading memory-mapped coefficients for fast startup")
+        model = None
+        weights = np.load(coefficients_path, mmap_mode="r")
+        kernel = LinearKernel(weights[:-1], weights[-1], dtype=kernel_dtype, scratch_rows=scratch_rows)
+    else:
+        try:
+            import joblib
+        except ImportError:
+            from sklearn.externals import joblib
+        # Arrays of uncompressed joblib files are memory-mapped as well
+        mmap_mode = "r" if os.environ.get("SCORING_MMAP_MODEL", "true").lower() == "true" else None
+        model = joblib.load(os.path.join(model_dir, MODEL_FILE_NAME), mmap_mode=mmap_mode)
+        kernel = None
+        if os.environ.get("SCORING_LINEAR_KERNEL", "true").lower() == "true" and np.ndim(getattr(model, "coef_", None)) == 1:
+            print("Initialize Linear Inference Kernel")
+            kernel = LinearKernel.from_model(model, dtype=kernel_dtype, scratch_rows=scratch_rows)
+    print("Model loading changed " + format_memory_delta(memory_before, get_memory_usage()))
+    global validator
+    validator = None
+    if os.environ.get("SCORING_INPUT_VALIDATION", "true").lower() == "true":
+        contract_path = os.path.join(model_dir, CONTRACT_FILE_NAME)
+        if os.path.exists(contract_path):
+            print("Initialize Input Validation with the value ranges of the training data")
+            with open(contract_path) as f:
+                validator = InputValidator.from_contract(json.load(f), FEATURE_NAMES)
+        else:
+            print("Initialize Input Validation")
+            validator = InputValidator(FEATURE_NAMES)
+    global imputer
+    imputer = None
+    if os.environ.get("SCORING_IMPUTATION", "true").lower() == "true":
+        if arrays is None and os.path.exists(artifact_path):
+            arrays = read_artifact(artifact_path, mmap=True)[0]
+        if arrays is not None and "impute" in arrays:
+            print("Initialize Imputation of missing values with the medians of the training data")
+            imputer = Imputer(arrays["impute"])
+    global predict_fn
+    # The validator already rejected requests of the wrong shape and with
+    # NaN or infinite values
+    predict_fn = functools.partial(kernel.predict, check_shape=validator is None, check_finite=validator is None) if kernel else model.predict
+    global batcher
+    if batcher:
+        # init() runs again when the model is updated, the worker of the old model is stopped
+        batcher.close()
+    batcher = None
+    if os.environ.get("SCORING_MICRO_BATCHING", "false").lower() == "true":
+        print("Initialize Micro-Batching")
+        batcher = MicroBatcher(predict_fn,
+                               window_ms=float(os.environ.get("SCORING_BATCH_WINDOW_MS", 2.0)),
+                               max_batch_size=int(os.environ.get("SCORING_MAX_BATCH_SIZE", 256)),
+                               timeout_seconds=float(os.environ.get("SCORING_BATCH_TIMEOUT_SECONDS", 1.0)))
+    global cache
+    if os.environ.get("SCORING_PREDICTION_CACHE", "false").lower() == "true":
+        if cache is None:
+            print("Initialize Prediction Cache")
+            cache = PredictionCache(max_size=int(os.environ.get("SCORING_CACHE_SIZE", 10000)),
+                                    ttl_seconds=float(os.environ.get("SCORING_CACHE_TTL_SECONDS", 300.0)))
+        else:
+            print("Invalidating Prediction Cache for the new model")
+            cache.invalidate()
+    else:
+        cache = None
     print("Initialize Data Collectors")
-    global inputs_dc, prediction_dc
-    inputs_dc = ModelDataCollector(model_name="sklearn_regression_model", feature_names=["AGE", "SEX", "BMI", "BP", "S1", "S2", "S3", "S4", "S5", "S6"])
-    prediction_dc = ModelDataCollector(model_name="sklearn_regression_model", feature_names=["Y"])
+    global inputs_dc, prediction_dc, collector
+    if collector:
+        # Flushes the records of the old model and closes its sink
+        collector.close()
+    async_collection = os.environ.get("SCORING_ASYNC_COLLECTION", "false").lower() == "true"
+    file_sink = os.environ.get("SCORING_COLLECTION_SINK", "model_data_collector").lower() == "file"
+    inputs_dc = prediction_dc = collector = None
+    if not (async_collection and file_sink):
+        from azureml.monitoring import ModelDataCollector
+        inputs_dc = ModelDataCollector(model_name="sklearn_regression_model", feature_names=FEATURE_NAMES)
+        prediction_dc = ModelDataCollector(model_name="sklearn_regression_model", feature_names=PREDICTION_NAMES)
+    if async_collection:
+        print("Initialize Background Data Collection")
+        if file_sink:
+            sink = FileSink(os.environ.get("SCORING_COLLECTION_PATH", os.path.join("outputs", "collected_data.csv")),
+                            FEATURE_NAMES, PREDICTION_NAMES)
+        else:
+            sink = ModelDataCollectorSink(inputs_dc, prediction_dc)
+        collector = BackgroundCollector(sink,
+                                        queue_size=int(os.environ.get("SCORING_COLLECTION_QUEUE_SIZE", 1000)),
+                                        batch_size=int(os.environ.get("SCORING_COLLECTION_BATCH_SIZE", 100)),
+                                        flush_seconds=float(os.environ.get("SCORING_COLLECTION_FLUSH_SECONDS", 1.0)),
+                                        drop_policy=os.environ.get("SCORING_COLLECTION_DROP_POLICY", "drop_newest").lower())
+    global drift_monitor
+    drift_monitor = None
+    profile_path = os.path.join(model_dir, PROFILE_FILE_NAME)
+    if os.environ.get("SCORING_DRIFT_MONITOR", "true").lower() == "true" and os.path.exists(profile_path):
+        print("Initialize Drift Monitor against the dataset profile of the training data")
+        # The profile is memory-mapped, only its histograms and quantiles are read
+        baseline, _ = read_artifact(profile_path, mmap=True)
+        drift_monitor = DriftMonitor(baseline, FEATURE_NAMES,
+                                     buffer_rows=int(os.environ.get("SCORING_DRIFT_BUFFER_ROWS", 1024)),
+                                     window_seconds=float(os.environ.get("SCORING_DRIFT_WINDOW_SECONDS", 300.0)),
+                                     min_rows=int(os.environ.get("SCORING_DRIFT_MIN_ROWS", 500)))
+    global histograms
+    histograms = None
+    if os.environ.get("SCORING_LATENCY_STATS", "true").lower() == "true":
+        histograms = LatencyHistograms(STAGES, STATUSES, log_seconds=float(os.environ.get("SCORING_STATS_LOG_SECONDS", 60.0)))
+    global first_prediction
+    first_prediction = True
+    print("Import took {0:.3f}s and init took {1:.3f}s".format(IMPORT_SECONDS, time.perf_counter() - init_start))
 
 #input_sample = np.array([[10.0,9.0,8.0,7.0,6.0,5.0,4.0,3.0,2.0,1.0]])
 #output_sample = np.array([3726.995])
 
 #@input_schema('data', NumpyParameterType(input_sample))
 #@output_schema(NumpyParameterType(output_sample))
-def run(raw_data):
-    global inputs_dc, prediction_dc
+@rawhttp
+def run(request):
+    global inputs_dc, prediction_dc, collector, first_prediction
+    if getattr(request, "method", None) == "GET":
+        return AMLResponse(json.dumps(get_stats()), 200, {"Content-Type": JSON_CONTENT_TYPE})
+    clock = histograms.clock() if histograms else None
+    status = "error"
     try:
-        data = json.loads(raw_data)["data"]
-        data = np.array(data)
-        result = model.predict(data)
+        raw_data, content_type, response_type = read_request(request)
+        try:
+            if content_type == BINARY_CONTENT_TYPE:
+                data = decode_binary(raw_data)
+            else:
+                data = np.array(json.loads(raw_data)["data"], dtype=np.float64)
+        except (ValueError, KeyError, TypeError) as e:
+            # e.g. rows with the wrong number of values, which are reported per row
+            if validator is None:
+                raise
+            status = "invalid"
+            if content_type == BINARY_CONTENT_TYPE:
+                validator.rejected += 1
+                return invalid_input([{"error": str(e)}])
+            return invalid_input(validator.payload_errors(raw_data))
+        if validator is None or not validator.is_valid(data):
+            # Only requests the validator rejects can have missing values
+            if imputer:
+                data = imputer.transform(data)
+            if validator and not validator.is_valid(data):
+                status = "invalid"
+                return invalid_input(validator.errors(data))
+        if clock:
+            clock.lap("decode")
+        predict = batcher.predict if batcher else predict_fn
+        result = cache.predict(data, predict) if cache else predict(data)
+        if clock:
+            clock.lap("predict")
 
-        print("Saving Data " + time.strftime("%H:%M:%S"))
-        inputs_dc.collect(data)
-        prediction_dc.collect(result)
+        if collector:
+            collector.collect(data, result)
+        else:
+            print("Saving Data " + time.strftime("%H:%M:%S"))
+            inputs_dc.collect(data)
+            prediction_dc.collect(result)
+        if drift_monitor:
+            drift_monitor.observe(data)
+            drift_monitor.maybe_report()
+        if clock:
+            clock.lap("collect")
 
-        return json.dumps({"result": result.tolist()})
+        if first_prediction:
+            first_prediction = False
+            print("Time to first prediction: {0:.3f}s".format(time.perf_counter() - IMPORT_START))
+
+        if response_type == BINARY_CONTENT_TYPE:
+            response = AMLResponse(encode_binary(result, dtype=data.dtype), 200, {"Content-Type": BINARY_CONTENT_TYPE})
+        else:
+            response = json.dumps({"result": result.tolist()})
+        if clock:
+            clock.lap("encode")
+        status = "ok"
+        return response
     except Exception as e:
         error = str(e)
         print(error + time.strftime("%H:%M:%S"))
-        return json.dumps({"error": error})
\ No newline at end of file
+        return json.dumps({"error": error})
+    finally:
+        # Rejected and failed requests are counted as well
+        if clock:
+            clock.stop(status)
+            histograms.maybe_log()
+
+def invalid_input(errors):
+    print("Invalid input " + time.strftime("%H:%M:%S"))
+    return AMLResponse(json.dumps({"error": "Invalid input", "errors": errors}), 400, {"Content-Type": JSON_CONTENT_TYPE})
+
+def get_stats():
+    """
+    Returns the latency histograms, the counters of the optional scoring
+    components and the drift scores. A GET request to the scoring endpoint
+    returns this as JSON.
+    """
+    return {
+        "latency": histograms.snapshot() if histograms else None,
+        "cache": cache.stats() if cache else None,
+        "collector": collector.stats() if collector else None,
+        "batcher": {"batches": batcher.batches, "rows": batcher.rows, "timeouts": batcher.timeouts} if batcher else None,
+        "validator": {"rejected": validator.rejected} if validator else None,
+        "imputer": {"imputed_rows": imputer.imputed_rows} if imputer else None,
+        "drift": drift_monitor.stats() if drift_monitor else None
+    }
\ No newline at end of file
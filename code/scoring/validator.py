@@ -0,0 +1,137 @@
+"""
+Copyright (C) Microsoft Corporation. All rights reserved.​
+ ​
+Microsoft Corporation (“Microsoft”) grants you a nonexclusive, perpetual,
+royalty-free right to use, copy, and modify the software code provided by us
+("Software Code"). You may not sublicense the Software Code or any use of it
+(except to your affiliates and to vendors to perform work on your behalf)
+through distribution, network access, service agreement, lease, rental, or
+otherwise. This license does not purport to express any claim of ownership over
+data you may have shared with Microsoft in the creation of the Software Code.
+Unless applicable law gives you more rights, Microsoft reserves all other
+rights not expressly granted herein, whether by implication, estoppel or
+otherwise. ​
+ ​
+THE SOFTWARE CODE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+MICROSOFT OR ITS LICENSORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ARISING IN ANY WAY OUT OF THE USE OF THE SOFTWARE CODE, EVEN IF ADVISED OF THE
+POSSIBILITY OF SUCH DAMAGE.
+"""
+import json
+import numpy as np
+
+# Errors of at most this many values are returned per request
+MAX_ERRORS = 100
+# Values may exceed the range of the training data by this fraction of the range
+RANGE_TOLERANCE = 0.1
+EMPTY_ERROR = "data must contain at least one row"
+
+
+class InputValidator(object):
+    """
+    Request validator built once in init() from the schema of the training
+    data. is_valid() checks shape, dtype, missing and infinite values and
+    the value range of a decoded request in a single vectorized comparison,
+    as NaN fails every comparison and infinity is outside of the finite
+    bounds. errors() is only called for invalid requests and returns the
+    offending values per row.
+    """
+    def __init__(self, feature_names, lower=None, upper=None, max_errors=MAX_ERRORS):
+        self.feature_names = list(feature_names)
+        self.n_features = len(self.feature_names)
+        largest = np.finfo(np.float64).max
+        lower = np.full(self.n_features, -largest) if lower is None else np.asarray(lower, dtype=np.float64)
+        upper = np.full(self.n_features, largest) if upper is None else np.asarray(upper, dtype=np.float64)
+        # Bounds in the dtype of the request avoid casting it for the comparison
+        self.bounds = {np.dtype(np.float64): (lower, upper),
+                       np.dtype(np.float32): (self._to_float32(lower, np.nextafter), self._to_float32(upper, np.nextafter, True))}
+        self.max_errors = max_errors
+        self.rejected = 0
+
+    @staticmethod
+    def _to_float32(bounds, nextafter, upper=False):
+        # Rounded outwards, so that float32 requests accept the same values
+        bounds32 = np.clip(bounds, np.finfo(np.float32).min, np.finfo(np.float32).max).astype(np.float32)
+        rounded_in = bounds32 < bounds if upper else bounds32 > bounds
+        return np.where(rounded_in, nextafter(bounds32, np.float32(np.inf if upper else -np.inf)), bounds32)
+
+    @classmethod
+    def from_contract(cls, contract, feature_names, max_errors=MAX_ERRORS):
+        """
+        Builds a validator from the data contract written by train.py,
+        whose ranges are widened by its range tolerance.
+        """
+        columns = [contract["columns"].index(name) for name in feature_names]
+        reference_min = np.array(contract["min"])[columns]
+        reference_max = np.array(contract["max"])[columns]
+        tolerance = contract.get("range_tolerance", RANGE_TOLERANCE) * (reference_max - reference_min)
+        return cls(feature_names, reference_min - tolerance, reference_max + tolerance, max_errors=max_errors)
+
+    def is_valid(self, X):
+        bounds = self.bounds.get(X.dtype)
+        if bounds is None or X.ndim != 2 or X.shape[1] != self.n_features or not len(X):
+            return False
+        lower, upper = bounds
+        return bool(((X >= lower) & (X <= upper)).all())
+
+    def errors(self, X):
+        """
+        Returns a list of errors of a decoded request, each with the row and
+        column of the offending value, or an error of the whole request.
+        """
+        self.rejected += 1
+        if X.dtype not in self.bounds:
+            return [{"error": "Expected float32 or float64 data, got {}".format(X.dtype)}]
+        if not X.size:
+            return [{"error": EMPTY_ERROR}]
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            return [{"error": "Expected data of shape (rows, {}), got {}".format(self.n_features, X.shape)}]
+        lower, upper = self.bounds[X.dtype]
+        missing = np.isnan(X)
+        infinite = np.isinf(X)
+        out_of_range = ~missing & ~infinite & ((X < lower) | (X > upper))
+        rows, columns = np.nonzero(missing | infinite | out_of_range)
+        errors = []
+        for row, column in zip(rows[:self.max_errors].tolist(), columns[:self.max_errors].tolist()):
+            if missing[row, column]:
+                error = "Missing value"
+            elif infinite[row, column]:
+                error = "Infinite value"
+            else:
+                error = "Value {:.6g} outside of [{:.6g}, {:.6g}]".format(X[row, column], lower[column], upper[column])
+            errors.append({"row": row, "column": self.feature_names[column], "error": error})
+        return errors
+
+    def payload_errors(self, raw_data):
+        """
+        Returns the errors of a JSON payload that could not be decoded into
+        a matrix, e.g. because of rows with the wrong number of values.
+        """
+        self.rejected += 1
+        try:
+            rows = json.loads(raw_data)["data"]
+        except (ValueError, KeyError, TypeError):
+            return [{"error": "Expected a JSON object with the rows in \"data\""}]
+        if not isinstance(rows, list):
+            return [{"error": "Expected a list of rows in \"data\""}]
+        if not rows:
+            return [{"error": EMPTY_ERROR}]
+        errors = []
+        for row, values in enumerate(rows):
+            if not isinstance(values, list):
+                errors.append({"row": row, "error": "Expected a list of {} values".format(self.n_features)})
+            elif len(values) != self.n_features:
+                errors.append({"row": row, "error": "Expected {} values, got {}".format(self.n_features, len(values))})
+            else:
+                for column, value in enumerate(values):
+                    if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+                        errors.append({"row": row, "column": self.feature_names[column], "error": "Expected a number, got {}".format(json.dumps(value))})
+            if len(errors) >= self.max_errors:
+                break
+        return errors[:self.max_errors]
@@ -23,7 +23,7 @@ IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
 ARISING IN ANY WAY OUT OF THE USE OF THE SOFTWARE CODE, EVEN IF ADVISED OF THE
 POSSIBILITY OF SUCH DAMAGE.
 """
-import json
+import os, sys, json
 
 def get_test_data_sample():
     """
@@ -31,5 +31,23 @@ def get_test_data_sample():
     to the deployed web service for testing purposes. Adjust this function to
     return the correct data sample. 
     """
-    test_sample = {'data': [[1,2,3,4,5,6,7,8,9,10]]}
-    return json.dumps(test_sample)
\ No newline at end of file
+    # First row of data/diabetes.csv, as values outside of the ranges of the
+    # training data are rejected by the input validation of score.py
+    test_sample = {'data': [[0.0380759064334241, 0.0506801187398187, 0.0616962065186885, 0.0218723549949558, -0.0442234984244464,
+                             -0.0348207628376986, -0.0434008456520269, -0.00259226199818282, 0.0199084208763183, -0.0176461251598052]]}
+    return json.dumps(test_sample)
+
+def get_profile_data_sample(profile_path, rows=10):
+    """
+    This function returns a data sample in json format with rows at evenly
+    spaced quantiles of every feature, read from the dataset profile that
+    train.py saves next to the model.
+    """
+    import numpy as np
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scoring"))
+    from artifact import read_artifact
+    profile, _ = read_artifact(profile_path)
+    quantiles = np.asarray(profile["quantiles"])
+    levels = np.linspace(0.05, 0.95, rows) * (len(quantiles) - 1)
+    sample = np.array([np.interp(levels, np.arange(len(quantiles)), quantiles[:, i]) for i in range(quantiles.shape[1])]).T
+    return json.dumps({'data': sample.tolist()})
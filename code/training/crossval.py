@@ -0,0 +1,105 @@
+"""
+Copyright (C) Microsoft Corporation. All rights reserved.​
+ ​
+Microsoft Corporation (“Microsoft”) grants you a nonexclusive, perpetual,
+royalty-free right to use, copy, and modify the software code provided by us
+("Software Code"). You may not sublicense the Software Code or any use of it
+(except to your affiliates and to vendors to perform work on your behalf)
+through distribution, network access, service agreement, lease, rental, or
+otherwise. This license does not purport to express any claim of ownership over
+data you may have shared with Microsoft in the creation of the Software Code.
+Unless applicable law gives you more rights, Microsoft reserves all other
+rights not expressly granted herein, whether by implication, estoppel or
+otherwise. ​
+ ​
+THE SOFTWARE CODE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+MICROSOFT OR ITS LICENSORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ARISING IN ANY WAY OUT OF THE USE OF THE SOFTWARE CODE, EVEN IF ADVISED OF THE
+POSSIBILITY OF SUCH DAMAGE.
+"""
+import multiprocessing
+import numpy as np
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    # Python before 3.8, forked workers inherit the data instead
+    shared_memory = None
+from ridge import SufficientStatistics
+from parallel import get_pool_context
+
+# Data of the running cross_validate() when there is no shared memory
+fork_data = None
+
+
+def fold_statistics(shared_memory_name, shape, start, stop):
+    """
+    Returns the sufficient statistics of the rows start:stop of the data in
+    the shared memory block, whose last column is the target, or of
+    fork_data when the block name is None.
+    """
+    if shared_memory_name is None:
+        return SufficientStatistics(shape[1] - 1).update(fork_data[start:stop, :-1], fork_data[start:stop, -1])
+    block = shared_memory.SharedMemory(name=shared_memory_name)
+    try:
+        data = np.ndarray(shape, dtype=np.float64, buffer=block.buf)
+        stats = SufficientStatistics(shape[1] - 1).update(data[start:stop, :-1], data[start:stop, -1])
+        del data
+    finally:
+        block.close()
+    return stats
+
+
+def cross_validate(X, y, alphas, folds=5, workers=1, random_state=None):
+    """
+    K-fold cross-validation of ridge regression for all alphas. The shuffled
+    data is copied once into shared memory, from which worker processes
+    compute the statistics of every fold in parallel. Without
+    multiprocessing.shared_memory the workers are forked after the copy and
+    inherit it, or the folds are computed in this process if they can't be. The train statistics
+    of a fold are merged from the statistics of the other folds, and a
+    single eigendecomposition per fold is reused across all alphas.
+    Returns the mse and r2 of shape (folds, n_alphas).
+    """
+    order = np.random.RandomState(random_state).permutation(len(X))
+    bounds = np.linspace(0, len(X), folds + 1).astype(int)
+    global fork_data
+    shape = (len(X), X.shape[1] + 1)
+    block = shared_memory.SharedMemory(create=True, size=shape[0] * shape[1] * 8) if shared_memory else None
+    try:
+        data = np.ndarray(shape, dtype=np.float64, buffer=block.buf) if block else np.empty(shape)
+        data[:, :-1] = X[order]
+        data[:, -1] = y[order]
+        if block is None:
+            fork_data = data
+            if "fork" not in multiprocessing.get_all_start_methods():
+                workers = 1
+        tasks = [(block.name if block else None, shape, bounds[k], bounds[k + 1]) for k in range(folds)]
+        if workers > 1:
+            with get_pool_context().Pool(min(workers, folds)) as pool:
+                stats = pool.starmap(fold_statistics, tasks)
+        else:
+            stats = [fold_statistics(*task) for task in tasks]
+        del data
+    finally:
+        fork_data = None
+        if block:
+            block.close()
+            block.unlink()
+
+    mse = np.zeros((folds, len(alphas)))
+    r2 = np.zeros((folds, len(alphas)))
+    for k in range(folds):
+        train_stats = SufficientStatistics(X.shape[1])
+        for other in range(folds):
+            if other != k:
+                train_stats.merge(stats[other])
+        coefs, intercepts = train_stats.solve_path(alphas)
+        mse[k] = stats[k].mse_path(coefs, intercepts)
+        r2[k] = 1 - mse[k] * stats[k].n / stats[k].yty
+    return mse, r2
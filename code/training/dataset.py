@@ -0,0 +1,219 @@
+"""
+Copyright (C) Microsoft Corporation. All rights reserved.​
+ ​
+Microsoft Corporation (“Microsoft”) grants you a nonexclusive, perpetual,
+royalty-free right to use, copy, and modify the software code provided by us
+("Software Code"). You may not sublicense the Software Code or any use of it
+(except to your affiliates and to vendors to perform work on your behalf)
+through distribution, network access, service agreement, lease, rental, or
+otherwise. This license does not purport to express any claim of ownership over
+data you may have shared with Microsoft in the creation of the Software Code.
+Unless applicable law gives you more rights, Microsoft reserves all other
+rights not expressly granted herein, whether by implication, estoppel or
+otherwise. ​
+ ​
+THE SOFTWARE CODE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+MICROSOFT OR ITS LICENSORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ARISING IN ANY WAY OUT OF THE USE OF THE SOFTWARE CODE, EVEN IF ADVISED OF THE
+POSSIBILITY OF SUCH DAMAGE.
+"""
+import os, json, zlib, shutil, hashlib, functools, itertools
+import numpy as np
+
+FEATURE_NAMES = ["AGE", "SEX", "BMI", "BP", "S1", "S2", "S3", "S4", "S5", "S6"]
+TARGET_NAME = "Y"
+# Every TEST_EVERY-th row of a streamed file is held out for testing
+TEST_EVERY = 5
+CACHE_INDEX_NAME = "index.json"
+CACHE_META_NAME = "meta.json"
+
+
+def read_csv_line_chunks(path, chunk_rows=100000, feature_names=FEATURE_NAMES, target_name=TARGET_NAME, offset=None, end=None):
+    """
+    Yields the column indices of the features and the target together with
+    lists of at most chunk_rows unparsed lines of a CSV file with a header
+    line, so that parsing can be done by other processes. offset and end
+    restrict the lines to a byte range of the file, e.g. the rows appended
+    since the last training.
+    """
+    with open(path, "rb") as f:
+        header = f.readline().decode("utf-8").strip().split(",")
+        missing = [name for name in feature_names + [target_name] if name not in header]
+        if missing:
+            raise ValueError("Columns {} not found in {}".format(missing, path))
+        columns = [header.index(name) for name in feature_names + [target_name]]
+        if offset is not None:
+            f.seek(max(offset, f.tell()))
+        lines = iter(f) if end is None else read_lines_until(f, end)
+        while True:
+            chunk = list(itertools.islice(lines, chunk_rows))
+            if not chunk:
+                break
+            yield columns, chunk
+
+
+def read_lines_until(f, end):
+    position = f.tell()
+    for line in f:
+        if position >= end:
+            break
+        position += len(line)
+        yield line
+
+
+def count_csv_rows(lines):
+    """
+    Returns the number of rows parse_csv_lines returns for lines, which
+    skips blank lines. Rows are indexed by this count, so that the train
+    and test split does not depend on where a file was split into chunks.
+    """
+    return sum(1 for line in lines if line.strip())
+
+
+def fill_empty_fields(lines):
+    """
+    Returns the lines of a chunk with nan in their empty fields. Only the
+    lines with an empty field are split, which are few even in files with
+    many missing values.
+    """
+    text = isinstance(lines[0], str)
+    comma, nan, newline = (",", "nan", "\r\n") if text else (b",", b"nan", b"\r\n")
+    ends = (comma, comma + newline[1:], comma + newline)
+    filled = []
+    for line in lines:
+        if comma + comma in line or line.startswith(comma) or line.endswith(ends):
+            line = comma.join(field or nan for field in line.rstrip(newline).split(comma))
+        filled.append(line)
+    return filled
+
+
+def parse_csv_lines(lines, columns):
+    try:
+        chunk = np.loadtxt(lines, delimiter=",", usecols=columns, dtype=np.float64, ndmin=2)
+    except ValueError:
+        try:
+            chunk = np.loadtxt(fill_empty_fields(lines), delimiter=",", usecols=columns, dtype=np.float64, ndmin=2)
+        except ValueError:
+            # Only chunks with other unparseable fields take the slower
+            # parser, which returns them as NaN
+            chunk = np.genfromtxt(lines, delimiter=",", usecols=columns, dtype=np.float64).reshape(-1, len(columns))
+    return chunk[:, :-1], chunk[:, -1]
+
+
+def read_csv_chunks(path, chunk_rows=100000, feature_names=FEATURE_NAMES, target_name=TARGET_NAME, offset=None, end=None):
+    """
+    Yields (X, y) float64 arrays of at most chunk_rows rows of a CSV file
+    with a header line, so that only one chunk is held in memory at a time.
+    """
+    for columns, lines in read_csv_line_chunks(path, chunk_rows, feature_names, target_name, offset=offset, end=end):
+        yield parse_csv_lines(lines, columns)
+
+
+def test_mask(start_row, n_rows):
+    """
+    Returns the rows of a chunk starting at start_row that belong to the test set.
+    """
+    return np.arange(start_row, start_row + n_rows) % TEST_EVERY == TEST_EVERY - 1
+
+
+def prefix_checksum(path, end, size=4096):
+    """
+    Returns the CRC-32 of the first and the last size bytes before end, which
+    detects most files that were rewritten instead of appended to since
+    they were last read, without reading all of them again.
+    """
+    with open(path, "rb") as f:
+        checksum = zlib.crc32(f.read(min(size, end)))
+        f.seek(max(end - size, 0))
+        return zlib.crc32(f.read(min(size, end)), checksum)
+
+
+def read_blocks(path, block_size=1 << 20):
+    with open(path, "rb") as f:
+        for block in iter(functools.partial(f.read, block_size), b""):
+            yield block
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    for block in read_blocks(path):
+        digest.update(block)
+    return digest.hexdigest()
+
+
+def build_column_cache(path, directory, chunk_rows=100000, names=FEATURE_NAMES + [TARGET_NAME]):
+    """
+    Converts a CSV file into one .npy file per column in directory. The
+    files are written to a temporary folder first, so that concurrent runs
+    never see a partial cache.
+    """
+    temporary = "{}.tmp{}".format(directory, os.getpid())
+    os.makedirs(temporary, exist_ok=True)
+    # The first pass only splits lines to count the rows parse_csv_lines returns
+    n_rows = sum(count_csv_rows(lines) for _, lines in read_csv_line_chunks(path, chunk_rows, names[:-1], names[-1]))
+    columns = {name: np.lib.format.open_memmap(os.path.join(temporary, name + ".npy"), mode="w+", dtype=np.float64, shape=(n_rows,))
+               for name in names}
+    start = 0
+    for X, y in read_csv_chunks(path, chunk_rows=chunk_rows, feature_names=names[:-1], target_name=names[-1]):
+        for i, name in enumerate(names[:-1]):
+            columns[name][start:start + len(X)] = X[:, i]
+        columns[names[-1]][start:start + len(X)] = y
+        start += len(X)
+    if start != n_rows:
+        shutil.rmtree(temporary)
+        raise ValueError("Parsed {} rows from {}, but counted {} rows".format(start, path, n_rows))
+    for column in columns.values():
+        column.flush()
+    del columns
+    with open(os.path.join(temporary, CACHE_META_NAME), "w") as f:
+        json.dump({"source": os.path.abspath(path), "rows": n_rows, "columns": names}, f)
+    try:
+        os.rename(temporary, directory)
+    except OSError:
+        # Another run built the same cache in the meantime
+        shutil.rmtree(temporary)
+
+
+def load_column_cache(path, cache_dir, chunk_rows=100000, names=FEATURE_NAMES + [TARGET_NAME]):
+    """
+    Returns the columns of a CSV file as memory-mapped arrays from a
+    columnar cache in cache_dir, which is keyed by the sha256 of the file
+    content and built on the first call or after the file changed. The
+    hash of a file is only recomputed when its size or mtime changed.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    index_path = os.path.join(cache_dir, CACHE_INDEX_NAME)
+    index = {}
+    if os.path.exists(index_path):
+        with open(index_path) as f:
+            index = json.load(f)
+    stat = os.stat(path)
+    entry = index.get(os.path.abspath(path))
+    if entry is None or entry["size"] != stat.st_size or entry["mtime_ns"] != stat.st_mtime_ns:
+        entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": hash_file(path)}
+        index[os.path.abspath(path)] = entry
+        temporary_index_path = "{}.tmp{}".format(index_path, os.getpid())
+        with open(temporary_index_path, "w") as f:
+            json.dump(index, f)
+        os.replace(temporary_index_path, index_path)
+    directory = os.path.join(cache_dir, entry["hash"])
+    if not os.path.exists(os.path.join(directory, CACHE_META_NAME)):
+        print("Building columnar cache of {} in {}".format(path, directory))
+        build_column_cache(path, directory, chunk_rows=chunk_rows, names=names)
+    return {name: np.load(os.path.join(directory, name + ".npy"), mmap_mode="r") for name in names}
+
+
+def read_column_chunks(columns, chunk_rows=100000, feature_names=FEATURE_NAMES, target_name=TARGET_NAME):
+    """
+    Yields (X, y) float64 arrays of at most chunk_rows rows of memory-mapped columns.
+    """
+    n_rows = len(columns[target_name])
+    for start in range(0, n_rows, chunk_rows):
+        X = np.column_stack([columns[name][start:start + chunk_rows] for name in feature_names])
+        yield X, np.asarray(columns[target_name][start:start + chunk_rows])
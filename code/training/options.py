@@ -0,0 +1,66 @@
+"""
+Copyright (C) Microsoft Corporation. All rights reserved.​
+ ​
+Microsoft Corporation (“Microsoft”) grants you a nonexclusive, perpetual,
+royalty-free right to use, copy, and modify the software code provided by us
+("Software Code"). You may not sublicense the Software Code or any use of it
+(except to your affiliates and to vendors to perform work on your behalf)
+through distribution, network access, service agreement, lease, rental, or
+otherwise. This license does not purport to express any claim of ownership over
+data you may have shared with Microsoft in the creation of the Software Code.
+Unless applicable law gives you more rights, Microsoft reserves all other
+rights not expressly granted herein, whether by implication, estoppel or
+otherwise. ​
+ ​
+THE SOFTWARE CODE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+MICROSOFT OR ITS LICENSORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ARISING IN ANY WAY OUT OF THE USE OF THE SOFTWARE CODE, EVEN IF ADVISED OF THE
+POSSIBILITY OF SUCH DAMAGE.
+"""
+# Kept apart from train.py so that aml_service/ci_cd/10-Train.py can check
+# the script parameters before it submits a run
+import argparse
+from artifact import COMPRESSIONS
+
+
+def get_parser():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mode", choices=["random", "path"], default="random",
+                        help="'random' trains with one random alpha, 'path' evaluates all alphas in one pass and keeps the best")
+    parser.add_argument("--alpha", type=float, default=None, help="Fixed alpha, e.g. set by HyperDrive")
+    parser.add_argument("--data", type=str, default=None,
+                        help="CSV file with the columns AGE..S6 and Y, which is streamed in chunks instead of loading the diabetes dataset into memory")
+    parser.add_argument("--chunk-rows", type=int, default=100000, dest="chunk_rows", help="Rows per chunk when streaming --data")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processes parsing the chunks of --data in parallel, 0 uses all cores. Ignored when started by mpirun, where every rank reads its own part of the file")
+    parser.add_argument("--cache-dir", type=str, default=None, dest="cache_dir",
+                        help="Folder of a columnar .npy cache of --data, which is built once per file content and memory-mapped by later runs")
+    parser.add_argument("--cv", type=int, default=0,
+                        help="Number of cross-validation folds on the diabetes dataset, whose mean and std are logged instead of a single train test split")
+    parser.add_argument("--cv-workers", type=int, default=1, dest="cv_workers", help="Processes computing the folds in parallel, 0 uses all cores")
+    parser.add_argument("--artifact-compression", choices=sorted(COMPRESSIONS), default="none", dest="artifact_compression",
+                        help="Compression of the model artifact, uncompressed artifacts are memory-mapped by the scoring service")
+    parser.add_argument("--warm-start", type=str, default=None, dest="warm_start",
+                        help="Model artifact of an earlier training on --data, whose statistics are updated with the rows appended to --data since then")
+    parser.add_argument("--validate", action="store_true",
+                        help="Check the schema, missing values and value ranges of --data against data_contract.json in one pass before training")
+    return parser
+
+
+def parse_args(argv=None):
+    # HyperDrive passes all sampled parameters, unknown ones are ignored
+    parser = get_parser()
+    args, _ = parser.parse_known_args(argv)
+    if args.cv and args.data:
+        parser.error("--cv is not supported together with --data")
+    if args.warm_start and (not args.data or args.cache_dir):
+        parser.error("--warm-start requires --data and is not supported together with --cache-dir")
+    if args.validate and not args.data:
+        parser.error("--validate requires --data")
+    return args
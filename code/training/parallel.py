@@ -0,0 +1,180 @@
+"""
+Copyright (C) Microsoft Corporation. All rights reserved.​
+ ​
+Microsoft Corporation (“Microsoft”) grants you a nonexclusive, perpetual,
+royalty-free right to use, copy, and modify the software code provided by us
+("Software Code"). You may not sublicense the Software Code or any use of it
+(except to your affiliates and to vendors to perform work on your behalf)
+through distribution, network access, service agreement, lease, rental, or
+otherwise. This license does not purport to express any claim of ownership over
+data you may have shared with Microsoft in the creation of the Software Code.
+Unless applicable law gives you more rights, Microsoft reserves all other
+rights not expressly granted herein, whether by implication, estoppel or
+otherwise. ​
+ ​
+THE SOFTWARE CODE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+MICROSOFT OR ITS LICENSORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ARISING IN ANY WAY OUT OF THE USE OF THE SOFTWARE CODE, EVEN IF ADVISED OF THE
+POSSIBILITY OF SUCH DAMAGE.
+"""
+import os, itertools, collections, multiprocessing
+from ridge import SufficientStatistics
+from sketches import FeatureProfile
+from dataset import FEATURE_NAMES, read_csv_line_chunks, count_csv_rows, parse_csv_lines, read_column_chunks, test_mask
+
+
+def get_pool_context():
+    # train.py has no main guard, so the workers must not re-import it as spawn would
+    return multiprocessing.get_context("fork" if "fork" in multiprocessing.get_all_start_methods() else None)
+
+
+def chunk_statistics(start_row, lines, columns, profile_bounds=None):
+    """
+    Parses one chunk of CSV lines and returns the sufficient statistics of
+    its train and test rows, the FeatureProfile of all its rows if
+    profile_bounds gives the lower and upper bounds of its histograms, and
+    the number of rows.
+    """
+    X, y = parse_csv_lines(lines, columns)
+    return split_statistics(X, y, start_row, profile_bounds)
+
+
+def split_statistics(X, y, start_row, profile_bounds=None):
+    test = test_mask(start_row, len(X))
+    profile = None
+    if profile_bounds is not None:
+        profile = FeatureProfile(*profile_bounds, seed=start_row % 2 ** 32)
+        profile.update(X)
+    return (SufficientStatistics(X.shape[1]).update(X[~test], y[~test]),
+            SufficientStatistics(X.shape[1]).update(X[test], y[test]),
+            profile, len(X))
+
+
+def merge_statistics(results, profile=None):
+    """
+    Merges the results of chunk_statistics in order, the profiles of the
+    chunks are merged into profile. Returns the train and test statistics
+    and the number of rows read, including the rows without a target,
+    which is the start_row of the rows after them.
+    """
+    train_stats = SufficientStatistics(len(FEATURE_NAMES))
+    test_stats = SufficientStatistics(len(FEATURE_NAMES))
+    rows = 0
+    for chunk_train_stats, chunk_test_stats, chunk_profile, chunk_rows in results:
+        train_stats.merge(chunk_train_stats)
+        test_stats.merge(chunk_test_stats)
+        if profile is not None:
+            profile.merge(chunk_profile)
+        rows += chunk_rows
+    return train_stats, test_stats, rows
+
+
+def get_profile_bounds(profile):
+    return None if profile is None else (profile.histogram.lower, profile.histogram.upper, profile.histogram.bins)
+
+
+def read_tasks(path, chunk_rows, start_row=0, offset=None, end=None, profile_bounds=None):
+    for columns, lines in read_csv_line_chunks(path, chunk_rows=chunk_rows, offset=offset, end=end):
+        yield start_row, lines, columns, profile_bounds
+        start_row += count_csv_rows(lines)
+
+
+def accumulate_statistics(path, chunk_rows=100000, workers=1, start_row=0, offset=None, end=None, profile=None):
+    """
+    Returns the train and test statistics of a CSV file and the number of
+    rows read, see merge_statistics. With more than one
+    worker the chunks are parsed by a process pool, while at most two chunks
+    per worker are in flight to keep memory bounded. Chunks are merged in
+    file order, so the result does not depend on the number of workers.
+    offset and end restrict the rows to a byte range of the file, whose
+    first row has the index start_row. The features of all rows are added
+    to profile in the same pass, if one is given.
+    """
+    tasks = read_tasks(path, chunk_rows, start_row=start_row, offset=offset, end=end, profile_bounds=get_profile_bounds(profile))
+    if workers <= 1:
+        return merge_statistics((chunk_statistics(*task) for task in tasks), profile)
+    # Pool.imap would read the whole file ahead of the workers
+    def results(pool):
+        pending = collections.deque()
+        for task in tasks:
+            pending.append(pool.apply_async(chunk_statistics, task))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+    with get_pool_context().Pool(workers) as pool:
+        return merge_statistics(results(pool), profile)
+
+
+def accumulate_cached_statistics(columns, chunk_rows=100000, profile=None):
+    """
+    Same as accumulate_statistics on memory-mapped columns of the cache,
+    which need no parsing and are processed in a single process.
+    """
+    def results():
+        start_row = 0
+        for X, y in read_column_chunks(columns, chunk_rows=chunk_rows):
+            yield split_statistics(X, y, start_row, get_profile_bounds(profile))
+            start_row += len(X)
+    return merge_statistics(results(), profile)
+
+
+def get_mpi_comm():
+    """
+    Returns the MPI communicator when the script was started by mpirun, e.g.
+    through distributed_training.mpi.process_count_per_node in the settings.
+    """
+    if int(os.environ.get("OMPI_COMM_WORLD_SIZE", os.environ.get("PMI_SIZE", 1))) <= 1:
+        return None
+    from mpi4py import MPI
+    return MPI.COMM_WORLD
+
+
+def line_boundaries(path, parts, offset=None, end=None):
+    """
+    Splits the rows of a CSV file between offset and end into parts byte
+    ranges of about the same size, which start at the beginning of a line.
+    Returns the parts + 1 boundaries of the ranges.
+    """
+    with open(path, "rb") as f:
+        f.readline()
+        start = max(offset or 0, f.tell())
+        end = os.path.getsize(path) if end is None else end
+        boundaries = [start]
+        for part in range(1, parts):
+            position = start + (end - start) * part // parts
+            if position > boundaries[-1]:
+                # Move to the start of the next line, unless position is one already
+                f.seek(position - 1)
+                f.readline()
+                position = min(f.tell(), end)
+            boundaries.append(max(position, boundaries[-1]))
+        boundaries.append(max(end, start))
+    return boundaries
+
+
+def accumulate_statistics_mpi(path, comm, chunk_rows=100000, start_row=0, offset=None, end=None, profile=None):
+    """
+    Every rank reads and parses only its own byte range of the file, see
+    line_boundaries. The ranges are counted in a first pass that only
+    splits lines, so that every rank knows the index of its first row.
+    The statistics are then gathered and merged in file order on rank 0.
+    Returns (None, None, None) on the other ranks.
+    """
+    rank, size = comm.Get_rank(), comm.Get_size()
+    boundaries = line_boundaries(path, size, offset=offset, end=end)
+    offset, end = boundaries[rank], boundaries[rank + 1]
+    rows = sum(count_csv_rows(lines) for _, lines in read_csv_line_chunks(path, chunk_rows=chunk_rows, offset=offset, end=end))
+    # exscan returns None on rank 0
+    start_row += comm.exscan(rows) or 0
+    tasks = read_tasks(path, chunk_rows, start_row=start_row, offset=offset, end=end, profile_bounds=get_profile_bounds(profile))
+    gathered = comm.gather([chunk_statistics(*task) for task in tasks], root=0)
+    if rank != 0:
+        return None, None, None
+    return merge_statistics(itertools.chain.from_iterable(gathered), profile)
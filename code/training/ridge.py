@@ -0,0 +1,199 @@
+"""
+Copyright (C) Microsoft Corporation. All rights reserved.​
+ ​
+Microsoft Corporation (“Microsoft”) grants you a nonexclusive, perpetual,
+royalty-free right to use, copy, and modify the software code provided by us
+("Software Code"). You may not sublicense the Software Code or any use of it
+(except to your affiliates and to vendors to perform work on your behalf)
+through distribution, network access, service agreement, lease, rental, or
+otherwise. This license does not purport to express any claim of ownership over
+data you may have shared with Microsoft in the creation of the Software Code.
+Unless applicable law gives you more rights, Microsoft reserves all other
+rights not expressly granted herein, whether by implication, estoppel or
+otherwise. ​
+ ​
+THE SOFTWARE CODE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+MICROSOFT OR ITS LICENSORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ARISING IN ANY WAY OUT OF THE USE OF THE SOFTWARE CODE, EVEN IF ADVISED OF THE
+POSSIBILITY OF SUCH DAMAGE.
+"""
+import numpy as np
+
+
+def ridge_path(X, y, alphas):
+    """
+    Fits ridge regression with intercept for all alphas at once. X and y are
+    centered and decomposed with a single SVD, after which every alpha only
+    rescales the singular values. Returns coefficients of shape
+    (n_alphas, n_features) and intercepts of shape (n_alphas,).
+    """
+    alphas = np.asarray(alphas, dtype=np.float64)
+    X_mean = X.mean(axis=0)
+    y_mean = y.mean()
+    U, s, Vt = np.linalg.svd(X - X_mean, full_matrices=False)
+    Uty = U.T.dot(y - y_mean)
+    denominator = s[np.newaxis, :] ** 2 + alphas[:, np.newaxis]
+    # Directions without variance get no weight, as in a least squares solver
+    d = np.divide(s[np.newaxis, :], denominator, out=np.zeros_like(denominator), where=denominator > 0)
+    coefs = (d * Uty).dot(Vt)
+    intercepts = y_mean - coefs.dot(X_mean)
+    return coefs, intercepts
+
+
+def mse_path(coefs, intercepts, X, y):
+    """
+    Returns the mean squared error on X and y for every row of coefs.
+    """
+    predictions = X.dot(coefs.T) + intercepts
+    return ((predictions - y[:, np.newaxis]) ** 2).mean(axis=0)
+
+
+class SufficientStatistics(object):
+    """
+    Centered sufficient statistics of ridge regression with intercept, which
+    are accumulated chunk by chunk so that memory is bounded by the chunk
+    size. Chunks are combined with the pairwise update of Chan et al. instead
+    of summing raw X'X, which would lose precision on uncentered data.
+    Missing feature values are accumulated as zeros together with the raw
+    sums impute() needs to replace them by constants once these are known,
+    e.g. the medians of the features at the end of the pass. Rows with a
+    missing target are skipped.
+    """
+    def __init__(self, n_features):
+        self.n = 0
+        self.X_mean = np.zeros(n_features)
+        self.y_mean = 0.0
+        self.XtX = np.zeros((n_features, n_features))
+        self.Xty = np.zeros(n_features)
+        self.yty = 0.0
+        # Missing values per column, sums of x_i over the rows where column
+        # j is missing, rows where both columns are missing and sums of y
+        # over the rows where a column is missing
+        self.missing = np.zeros(n_features)
+        self.X_missing = np.zeros((n_features, n_features))
+        self.missing_missing = np.zeros((n_features, n_features))
+        self.missing_y = np.zeros(n_features)
+
+    def update(self, X, y):
+        if np.isnan(y).any():
+            X, y = X[~np.isnan(y)], y[~np.isnan(y)]
+        if len(X) == 0:
+            return self
+        chunk = SufficientStatistics(X.shape[1])
+        missing = np.isnan(X)
+        if missing.any():
+            X = np.where(missing, 0.0, X)
+            missing = missing.astype(np.float64)
+            chunk.missing = missing.sum(axis=0)
+            chunk.X_missing = X.T.dot(missing)
+            chunk.missing_missing = missing.T.dot(missing)
+            chunk.missing_y = missing.T.dot(y)
+        chunk.n = len(X)
+        chunk.X_mean = X.mean(axis=0)
+        chunk.y_mean = y.mean()
+        X_centered = X - chunk.X_mean
+        y_centered = y - chunk.y_mean
+        chunk.XtX = X_centered.T.dot(X_centered)
+        chunk.Xty = X_centered.T.dot(y_centered)
+        chunk.yty = y_centered.dot(y_centered)
+        return self.merge(chunk)
+
+    def merge(self, other):
+        if other.n == 0:
+            return self
+        n = self.n + other.n
+        X_delta = other.X_mean - self.X_mean
+        y_delta = other.y_mean - self.y_mean
+        weight = self.n * other.n / float(n)
+        self.XtX = self.XtX + other.XtX + weight * np.outer(X_delta, X_delta)
+        self.Xty = self.Xty + other.Xty + weight * X_delta * y_delta
+        self.yty = self.yty + other.yty + weight * y_delta * y_delta
+        self.X_mean = self.X_mean + X_delta * other.n / float(n)
+        self.y_mean = self.y_mean + y_delta * other.n / float(n)
+        self.n = n
+        self.missing = self.missing + other.missing
+        self.X_missing = self.X_missing + other.X_missing
+        self.missing_missing = self.missing_missing + other.missing_missing
+        self.missing_y = self.missing_y + other.missing_y
+        return self
+
+    def impute(self, values):
+        """
+        Returns the statistics of the same rows with the missing values of
+        every column replaced by values, as if they had been imputed before
+        the rows were accumulated. Only statistics with missing values go
+        through raw sums, the others are returned as they are.
+        """
+        if not self.missing.any():
+            return self
+        values = np.asarray(values, dtype=np.float64)
+        XtX = (self.XtX + self.n * np.outer(self.X_mean, self.X_mean) + self.X_missing * values + (self.X_missing * values).T
+               + self.missing_missing * np.outer(values, values))
+        Xty = self.Xty + self.n * self.X_mean * self.y_mean + values * self.missing_y
+        stats = SufficientStatistics(len(values))
+        stats.n = self.n
+        stats.X_mean = self.X_mean + values * self.missing / self.n
+        stats.y_mean = self.y_mean
+        stats.XtX = XtX - self.n * np.outer(stats.X_mean, stats.X_mean)
+        stats.Xty = Xty - self.n * stats.X_mean * self.y_mean
+        stats.yty = self.yty
+        return stats
+
+    def to_arrays(self, prefix=""):
+        """
+        Returns the statistics as a dict of arrays, e.g. to store them in the
+        model artifact for incremental retraining.
+        """
+        return {prefix + "n": np.array([self.n]), prefix + "X_mean": self.X_mean, prefix + "y_mean": np.array([self.y_mean]),
+                prefix + "XtX": self.XtX, prefix + "Xty": self.Xty, prefix + "yty": np.array([self.yty]),
+                prefix + "missing": self.missing, prefix + "X_missing": self.X_missing,
+                prefix + "missing_missing": self.missing_missing, prefix + "missing_y": self.missing_y}
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix=""):
+        stats = cls(len(arrays[prefix + "X_mean"]))
+        stats.n = int(arrays[prefix + "n"][0])
+        stats.X_mean = np.array(arrays[prefix + "X_mean"], dtype=np.float64)
+        stats.y_mean = float(arrays[prefix + "y_mean"][0])
+        stats.XtX = np.array(arrays[prefix + "XtX"], dtype=np.float64)
+        stats.Xty = np.array(arrays[prefix + "Xty"], dtype=np.float64)
+        stats.yty = float(arrays[prefix + "yty"][0])
+        # Artifacts written before missing values were supported have none
+        for name in ("missing", "X_missing", "missing_missing", "missing_y"):
+            if prefix + name in arrays:
+                setattr(stats, name, np.array(arrays[prefix + name], dtype=np.float64))
+        return stats
+
+    def solve_path(self, alphas):
+        """
+        Same as ridge_path, but solved from the statistics with a single
+        eigendecomposition of X'X instead of an SVD of X.
+        """
+        alphas = np.asarray(alphas, dtype=np.float64)
+        eigenvalues, V = np.linalg.eigh(self.XtX)
+        Vty = V.T.dot(self.Xty)
+        denominator = eigenvalues[np.newaxis, :] + alphas[:, np.newaxis]
+        # Directions without variance get no weight, as in ridge_path
+        d = np.divide(1.0, denominator, out=np.zeros_like(denominator), where=denominator > 1e-12 * max(eigenvalues.max(), 1.0))
+        coefs = (d * Vty).dot(V.T)
+        intercepts = self.y_mean - coefs.dot(self.X_mean)
+        return coefs, intercepts
+
+    def solve(self, alpha):
+        coefs, intercepts = self.solve_path([alpha])
+        return coefs[0], intercepts[0]
+
+    def mse_path(self, coefs, intercepts):
+        """
+        Returns the mean squared error on the accumulated rows for every row
+        of coefs without another pass over the data.
+        """
+        offset = self.y_mean - coefs.dot(self.X_mean) - intercepts
+        rss = self.yty - 2 * coefs.dot(self.Xty) + np.einsum("ij,jk,ik->i", coefs, self.XtX, coefs) + self.n * offset ** 2
+        return np.maximum(rss, 0.0) / self.n
@@ -0,0 +1,258 @@
+"""
+Copyright (C) Microsoft Corporation. All rights reserved.​
+ ​
+Microsoft Corporation (“Microsoft”) grants you a nonexclusive, perpetual,
+royalty-free right to use, copy, and modify the software code provided by us
+("Software Code"). You may not sublicense the Software Code or any use of it
+(except to your affiliates and to vendors to perform work on your behalf)
+through distribution, network access, service agreement, lease, rental, or
+otherwise. This license does not purport to express any claim of ownership over
+data you may have shared with Microsoft in the creation of the Software Code.
+Unless applicable law gives you more rights, Microsoft reserves all other
+rights not expressly granted herein, whether by implication, estoppel or
+otherwise. ​
+ ​
+THE SOFTWARE CODE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+MICROSOFT OR ITS LICENSORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ARISING IN ANY WAY OUT OF THE USE OF THE SOFTWARE CODE, EVEN IF ADVISED OF THE
+POSSIBILITY OF SUCH DAMAGE.
+"""
+# This file is shipped with both the training and the scoring source
+# directories, code/training/sketches.py and code/scoring/sketches.py must
+# be kept identical, which aml_service/ci_cd/05-CheckSharedModules.py checks.
+import numpy as np
+
+# Quantiles of the features stored in a profile
+QUANTILES = np.linspace(0.0, 1.0, 101)
+# Rows kept per level of a quantile sketch
+QUANTILE_SKETCH_SIZE = 256
+HISTOGRAM_BINS = 10
+
+
+class RunningMoments(object):
+    """
+    Count, mean and sum of squared deviations of every column, updated with
+    whole batches and merged with the pairwise formula of Chan et al.
+    """
+    def __init__(self, n_features):
+        self.count = 0
+        self.mean = np.zeros(n_features)
+        self.m2 = np.zeros(n_features)
+
+    def update(self, X):
+        if len(X):
+            # Column sums as a product with ones use BLAS, which is several
+            # times faster than sum(axis=0) over the short rows of X
+            ones = np.ones(len(X))
+            mean = ones.dot(X) / len(X)
+            self._combine(len(X), mean, ones.dot(np.square(X - mean)))
+
+    def merge(self, other):
+        if other.count:
+            self._combine(other.count, other.mean, other.m2)
+        return self
+
+    def _combine(self, count, mean, m2):
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean = self.mean + delta * (count / float(total))
+        self.m2 = self.m2 + m2 + delta ** 2 * (self.count * count / float(total))
+        self.count = total
+
+    def variance(self):
+        return self.m2 / max(self.count, 1)
+
+
+class FixedHistogram(object):
+    """
+    Histogram with bins of equal width between lower and upper of every
+    column plus one bin below and one above, so that the bins of all
+    columns are counted with a single np.bincount.
+    """
+    def __init__(self, lower, upper, bins=HISTOGRAM_BINS):
+        self.lower = np.asarray(lower, dtype=np.float64)
+        self.upper = np.asarray(upper, dtype=np.float64)
+        self.bins = bins
+        width = self.upper - self.lower
+        self.scale = bins / np.where(width > 0, width, 1.0)
+        self.counts = np.zeros((len(self.lower), bins + 2), dtype=np.int64)
+        self._offsets = np.arange(len(self.lower)) * (bins + 2) + 1
+
+    def update(self, X):
+        index = np.floor((X - self.lower) * self.scale)
+        np.clip(index, -1, self.bins, out=index)
+        index = index.astype(np.int64) + self._offsets
+        self.counts += np.bincount(index.ravel(), minlength=self.counts.size).reshape(self.counts.shape)
+
+    def merge(self, other):
+        self.counts += other.counts
+        return self
+
+
+class QuantileSketch(object):
+    """
+    Mergeable quantile sketch of every column in the spirit of KLL: level i
+    holds rows of weight 2**i, and a level with twice size rows is sorted
+    and every other row, starting at a random offset, is promoted to the
+    next level. Memory grows with the logarithm of the number of rows and
+    the rank error of the quantiles is about 1 / size.
+    """
+    def __init__(self, n_features, size=QUANTILE_SKETCH_SIZE, seed=0):
+        self.n_features = n_features
+        self.size = size
+        self.levels = []
+        self._random = np.random.RandomState(seed)
+
+    def update(self, X):
+        values = np.array(X, dtype=np.float64, ndmin=2)
+        level = 0
+        if len(values) >= 2 * self.size:
+            # Large batches, e.g. chunks of a file, are sorted once and
+            # halved until they fit into a level instead of being sorted
+            # again on every level
+            values.sort(axis=0)
+            while len(values) >= 2 * self.size:
+                even = len(values) - len(values) % 2
+                self._add(level, values[even:])
+                values = values[self._random.randint(2):even:2]
+                level += 1
+        self._add(level, values)
+
+    def merge(self, other):
+        for level, values in enumerate(other.levels):
+            self._add(level, values)
+        return self
+
+    def _add(self, level, values):
+        while len(values):
+            while level >= len(self.levels):
+                self.levels.append(np.empty((0, self.n_features)))
+            values = np.concatenate([self.levels[level], values])
+            if len(values) < 2 * self.size:
+                self.levels[level] = values
+                return
+            values.sort(axis=0)
+            even = len(values) - len(values) % 2
+            self.levels[level] = values[even:]
+            values = values[self._random.randint(2):even:2]
+            level += 1
+
+    def count(self):
+        return sum(len(values) << level for level, values in enumerate(self.levels))
+
+    def cdf(self, points):
+        """
+        Returns the estimated fraction of rows less than or equal to each
+        row of points, one column per feature.
+        """
+        points = np.asarray(points, dtype=np.float64)
+        below = np.zeros(points.shape)
+        for level, values in enumerate(self.levels):
+            for start in range(0, len(values), 64):
+                below += (values[np.newaxis, start:start + 64] <= points[:, np.newaxis]).sum(axis=1) * float(1 << level)
+        return below / max(self.count(), 1)
+
+    def quantiles(self, quantiles=QUANTILES):
+        """
+        Returns the estimated quantiles of every column, shape (len(quantiles), n_features).
+        """
+        if not self.levels or not self.count():
+            return np.full((len(quantiles), self.n_features), np.nan)
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(values), 1 << level) for level, values in enumerate(self.levels)])
+        order = np.argsort(values, axis=0)
+        cumulative = np.cumsum(weights[order], axis=0)
+        ranks = np.asarray(quantiles) * (cumulative[-1, 0] - 1) + 1
+        result = np.empty((len(quantiles), self.n_features))
+        for feature in range(self.n_features):
+            index = np.minimum(np.searchsorted(cumulative[:, feature], ranks), len(values) - 1)
+            result[:, feature] = values[order[index, feature], feature]
+        return result
+
+
+class FeatureProfile(object):
+    """
+    Constant memory summary of a stream of feature rows: running moments,
+    minimum and maximum, fixed histograms between lower and upper and
+    quantile sketches of every feature. Rows with missing or infinite
+    values are skipped. Profiles of chunks of a file can be computed in
+    parallel and merged, and restored from their arrays to add new rows.
+    """
+    def __init__(self, lower, upper, bins=HISTOGRAM_BINS, size=QUANTILE_SKETCH_SIZE, seed=0):
+        self.moments = RunningMoments(len(lower))
+        self.min = np.full(len(lower), np.inf)
+        self.max = np.full(len(lower), -np.inf)
+        self.histogram = FixedHistogram(lower, upper, bins=bins)
+        self.sketch = QuantileSketch(len(lower), size=size, seed=seed)
+
+    def update(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        # The sum is only finite if all values are
+        if not np.isfinite(X.sum()):
+            X = X[np.isfinite(X).all(axis=1)]
+        if len(X) == 0:
+            return
+        self.moments.update(X)
+        self.min = np.minimum(self.min, X.min(axis=0))
+        self.max = np.maximum(self.max, X.max(axis=0))
+        self.histogram.update(X)
+        self.sketch.update(X)
+
+    def merge(self, other):
+        self.moments.merge(other.moments)
+        self.min = np.minimum(self.min, other.min)
+        self.max = np.maximum(self.max, other.max)
+        self.histogram.merge(other.histogram)
+        self.sketch.merge(other.sketch)
+        return self
+
+    def medians(self):
+        """
+        Returns the estimated median of every column, or 0 for the columns
+        of an empty profile.
+        """
+        medians = self.sketch.quantiles([0.5])[0]
+        return np.where(np.isfinite(medians), medians, 0.0)
+
+    def to_arrays(self):
+        """
+        Returns the profile as arrays for write_artifact(). Besides the
+        summaries, the rows of the quantile sketch and their levels are
+        kept for from_arrays().
+        """
+        levels = self.sketch.levels
+        return {
+            "count": np.array([self.moments.count]),
+            "mean": self.moments.mean,
+            "variance": self.moments.variance(),
+            "min": self.min,
+            "max": self.max,
+            "histogram_lower": self.histogram.lower,
+            "histogram_upper": self.histogram.upper,
+            "histogram": self.histogram.counts,
+            "quantiles": self.sketch.quantiles(QUANTILES),
+            "sketch_values": np.concatenate(levels) if levels else np.empty((0, len(self.min))),
+            "sketch_levels": np.concatenate([np.full(len(values), level, dtype=np.int8) for level, values in enumerate(levels)])
+                             if levels else np.empty(0, dtype=np.int8)
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays, size=QUANTILE_SKETCH_SIZE, seed=0):
+        histogram = np.asarray(arrays["histogram"])
+        profile = cls(arrays["histogram_lower"], arrays["histogram_upper"], bins=histogram.shape[1] - 2, size=size, seed=seed)
+        profile.moments.count = int(arrays["count"][0])
+        profile.moments.mean = np.array(arrays["mean"], dtype=np.float64)
+        profile.moments.m2 = np.array(arrays["variance"], dtype=np.float64) * profile.moments.count
+        profile.min = np.array(arrays["min"], dtype=np.float64)
+        profile.max = np.array(arrays["max"], dtype=np.float64)
+        profile.histogram.counts = np.array(histogram, dtype=np.int64)
+        levels = np.asarray(arrays["sketch_levels"])
+        values = np.asarray(arrays["sketch_values"])
+        profile.sketch.levels = [np.array(values[levels == level]) for level in range(int(levels.max()) + 1 if len(levels) else 0)]
+        return profile
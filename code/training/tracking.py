@@ -0,0 +1,105 @@
+"""
+Copyright (C) Microsoft Corporation. All rights reserved.​
+ ​
+Microsoft Corporation (“Microsoft”) grants you a nonexclusive, perpetual,
+royalty-free right to use, copy, and modify the software code provided by us
+("Software Code"). You may not sublicense the Software Code or any use of it
+(except to your affiliates and to vendors to perform work on your behalf)
+through distribution, network access, service agreement, lease, rental, or
+otherwise. This license does not purport to express any claim of ownership over
+data you may have shared with Microsoft in the creation of the Software Code.
+Unless applicable law gives you more rights, Microsoft reserves all other
+rights not expressly granted herein, whether by implication, estoppel or
+otherwise. ​
+ ​
+THE SOFTWARE CODE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+MICROSOFT OR ITS LICENSORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ARISING IN ANY WAY OUT OF THE USE OF THE SOFTWARE CODE, EVEN IF ADVISED OF THE
+POSSIBILITY OF SUCH DAMAGE.
+"""
+import os, abc, json, time, atexit, sqlite3
+
+AUTO = "auto"
+AZUREML = "azureml"
+JSONL = "jsonl"
+SQLITE = "sqlite"
+
+
+def get_run():
+    """
+    Returns the run used to log metrics. Inside an AML run this is the AML
+    run context, otherwise a local run writing to a JSON lines or SQLite
+    file, so that azureml is not imported at all on local runs.
+    """
+    backend = os.environ.get("RUN_TRACKING_BACKEND", AUTO).lower()
+    if backend == AUTO:
+        # AZUREML_RUN_ID is set in every run submitted to AML
+        backend = AZUREML if "AZUREML_RUN_ID" in os.environ else JSONL
+    if backend == AZUREML:
+        from azureml.core.run import Run
+        return Run.get_context()
+    batch_size = int(os.environ.get("RUN_TRACKING_BATCH_SIZE", 100))
+    if backend == SQLITE:
+        return SQLiteRun(os.environ.get("RUN_TRACKING_PATH", os.path.join("outputs", "metrics.db")), batch_size=batch_size)
+    elif backend == JSONL:
+        return JsonLinesRun(os.environ.get("RUN_TRACKING_PATH", os.path.join("outputs", "metrics.jsonl")), batch_size=batch_size)
+    raise ValueError("Unknown run tracking backend {}, please choose between 'auto', 'azureml', 'jsonl' and 'sqlite'".format(backend))
+
+
+class LocalRun(abc.ABC):
+    """
+    Stand-in for the logging methods of azureml.core.run.Run. Metrics are
+    buffered and written in batches of batch_size records, the rest is
+    written by flush(), which is called at exit. Subclasses implement
+    write() for their file format.
+    """
+    def __init__(self, path, batch_size=100):
+        self.id = "local_{}_{}".format(time.strftime("%Y%m%d%H%M%S"), os.getpid())
+        self.path = path
+        self.batch_size = max(batch_size, 1)
+        self.buffer = []
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        atexit.register(self.flush)
+
+    def log(self, name, value, description=""):
+        self._append(name, value)
+
+    def log_list(self, name, value, description=""):
+        self._append(name, list(value))
+
+    def _append(self, name, value):
+        self.buffer.append({"run_id": self.id, "name": name, "value": value, "time": time.time()})
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            records, self.buffer = self.buffer, []
+            self.write(records)
+
+    @abc.abstractmethod
+    def write(self, records):
+        pass
+
+
+class JsonLinesRun(LocalRun):
+    def write(self, records):
+        with open(self.path, "a") as f:
+            f.write("".join(json.dumps(record, default=float) + "\n" for record in records))
+
+
+class SQLiteRun(LocalRun):
+    def write(self, records):
+        with sqlite3.connect(self.path) as connection:
+            connection.execute("CREATE TABLE IF NOT EXISTS metrics (run_id TEXT, name TEXT, value TEXT, time REAL)")
+            connection.executemany("INSERT INTO metrics VALUES (?, ?, ?, ?)",
+                                   [(record["run_id"], record["name"], json.dumps(record["value"], default=float), record["time"]) for record in records])
+        connection.close()
@@ -23,48 +23,223 @@ IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
 ARISING IN ANY WAY OUT OF THE USE OF THE SOFTWARE CODE, EVEN IF ADVISED OF THE
 POSSIBILITY OF SUCH DAMAGE.
 """
-import pickle, os
+import pickle, os, sys, time, shutil
 import numpy as np
-from azureml.core import Workspace
-from azureml.core.run import Run
-from sklearn.datasets import load_diabetes
-from sklearn.linear_model import Ridge
-from sklearn.metrics import mean_squared_error
-from sklearn.model_selection import train_test_split
-from sklearn.externals import joblib
+from ridge import ridge_path, mse_path, SufficientStatistics
+from dataset import FEATURE_NAMES, TEST_EVERY, load_column_cache, prefix_checksum
+from tracking import get_run
+from validation import CONTRACT_PATH, validate_file, load_contract, contract_bounds
+from sketches import FeatureProfile
+from options import parse_args
+from artifact import write_artifact, read_artifact
+from parallel import accumulate_statistics, accumulate_statistics_mpi, accumulate_cached_statistics, get_mpi_comm
 
 RANDOM_STATE = 42
 MODEL_NAME = "mymodel.pkl"
+COEFFICIENTS_NAME = "mymodel_coef.npy"
+ARTIFACT_NAME = "mymodel.artifact"
+CONTRACT_NAME = "data_contract.json"
+PROFILE_NAME = "dataset_profile.artifact"
+ALPHAS = np.arange(0.0, 1.0, 0.05)
+
+args = parse_args()
+if args.cv:
+    # Only imported when needed, the training image may lack multiprocessing.shared_memory
+    from crossval import cross_validate
+
+# When started by mpirun every rank reads a share of --data, while only
+# rank 0 validates it, logs and saves the outputs
+comm = get_mpi_comm() if args.data else None
+rank = comm.Get_rank() if comm is not None else 0
 
-print("Creating output folder")
-os.makedirs('./outputs', exist_ok=True)
+if rank == 0:
+    print("Creating output folder")
+    os.makedirs('./outputs', exist_ok=True)
 
-print("Getting Run context")
-run = Run.get_context()
+    print("Getting Run context")
+    # azureml is only imported inside an AML run
+    run = get_run()
 
-print("Loading data")
-X, y = load_diabetes(return_X_y=True)
+if args.validate:
+    report = None
+    if rank == 0:
+        print("Validating {}".format(args.data))
+        report = validate_file(args.data, chunk_rows=args.chunk_rows)
+    if comm is not None:
+        # The other ranks stop as well when the file is invalid
+        report = comm.bcast(report, root=0)
+    if not report["valid"]:
+        raise ValueError("{} failed validation: {}".format(args.data, "; ".join(report["errors"])))
+    print("Validated {} rows".format(report["rows"]))
+    if rank == 0 and report["warnings"]:
+        print("Validation warnings: {}".format("; ".join(report["warnings"])))
 
-print("Creating train test split")
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=RANDOM_STATE)
-data = {"train": {"X": X_train, "y": y_train}, "test": {"X": X_test, "y": y_test}}
+if args.data:
+    # Only the sufficient statistics of the train and test rows are kept in memory
+    print("Streaming data from {} in chunks of {} rows".format(args.data, args.chunk_rows))
+    # Rows appended while training are left for the next training
+    data_bytes = os.path.getsize(args.data)
+    start_row, offset = 0, None
+    base_train_stats = SufficientStatistics(len(FEATURE_NAMES))
+    base_test_stats = SufficientStatistics(len(FEATURE_NAMES))
+    # The dataset profile is computed in the same pass, its histogram bins
+    # span the valid ranges of the data contract
+    profile = FeatureProfile(*contract_bounds(load_contract(), FEATURE_NAMES))
+    if args.warm_start:
+        arrays, metadata = read_artifact(args.warm_start, mmap=False)
+        # The profile is downloaded together with the artifact of the registered model
+        profile_path = os.path.join(os.path.dirname(args.warm_start), PROFILE_NAME)
+        profile_arrays = read_artifact(profile_path, mmap=False)[0] if os.path.exists(profile_path) else {}
+        if ("train_n" in arrays and "sketch_values" in profile_arrays and metadata.get("data_bytes") is not None
+                and metadata["data_bytes"] <= data_bytes and prefix_checksum(args.data, metadata["data_bytes"]) == metadata.get("data_prefix_crc32")):
+            print("Warm start from {} rows of {}, reading only the rows appended since then".format(metadata["data_rows"], args.warm_start))
+            base_train_stats = SufficientStatistics.from_arrays(arrays, "train_")
+            base_test_stats = SufficientStatistics.from_arrays(arrays, "test_")
+            profile = FeatureProfile.from_arrays(profile_arrays)
+            start_row, offset = metadata["data_rows"], metadata["data_bytes"]
+        else:
+            print("{} was not trained on a prefix of {} or has no dataset profile, training from scratch".format(args.warm_start, args.data))
+    if comm is not None:
+        print("Accumulating statistics on MPI rank {} of {}".format(rank, comm.Get_size()))
+        train_stats, test_stats, read_rows = accumulate_statistics_mpi(args.data, comm, chunk_rows=args.chunk_rows, start_row=start_row, offset=offset,
+                                                            end=data_bytes, profile=profile)
+        if rank != 0:
+            # Rank 0 solves, logs and saves the model
+            sys.exit(0)
+    elif args.cache_dir:
+        print("Loading memory-mapped columns from cache {}".format(args.cache_dir))
+        columns = load_column_cache(args.data, args.cache_dir, chunk_rows=args.chunk_rows)
+        train_stats, test_stats, read_rows = accumulate_cached_statistics(columns, chunk_rows=args.chunk_rows, profile=profile)
+    else:
+        workers = args.workers or os.cpu_count()
+        print("Accumulating statistics with {} worker processes".format(workers))
+        train_stats, test_stats, read_rows = accumulate_statistics(args.data, chunk_rows=args.chunk_rows, workers=workers,
+                                                        start_row=start_row, offset=offset, end=data_bytes, profile=profile)
+    print("Read {} new rows".format(read_rows))
+    train_stats = base_train_stats.merge(train_stats)
+    test_stats = base_test_stats.merge(test_stats)
+    print("Accumulated {} train and {} test rows, every {}th row is used for testing".format(train_stats.n, test_stats.n, TEST_EVERY))
+    # Missing feature values are replaced by the medians of the complete rows, the
+    # statistics keep them separately so that a warm start can still add rows
+    impute_values = profile.medians()
+    missing = int(train_stats.missing.sum() + test_stats.missing.sum())
+    if missing:
+        print("Imputing {} missing values with the medians of the features".format(missing))
+    fit_stats, score_stats = train_stats.impute(impute_values), test_stats.impute(impute_values)
+    fit_path = fit_stats.solve_path
+    score_path = score_stats.mse_path
+    # The centered Gram matrix of all rows is the covariance times the number of rows
+    all_stats = SufficientStatistics(len(FEATURE_NAMES)).merge(fit_stats).merge(score_stats)
+    covariance = all_stats.XtX / max(all_stats.n, 1)
+else:
+    from sklearn.datasets import load_diabetes
+    from sklearn.metrics import mean_squared_error
+    from sklearn.model_selection import train_test_split
+    print("Loading data")
+    X, y = load_diabetes(return_X_y=True)
 
-print("Training a ridge regression model with sklearn and random alpha value")
-alphas = np.arange(0.0, 1.0, 0.05)
-alpha = alphas[np.random.choice(alphas.shape[0], 1, replace=False)][0]
+    print("Creating train test split")
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=RANDOM_STATE)
+    data = {"train": {"X": X_train, "y": y_train}, "test": {"X": X_test, "y": y_test}}
+    fit_path = lambda alphas: ridge_path(data["train"]["X"], data["train"]["y"], alphas)
+    score_path = lambda coefs, intercepts: mse_path(coefs, intercepts, data["test"]["X"], data["test"]["y"])
+    profile = FeatureProfile(*contract_bounds(load_contract(), FEATURE_NAMES))
+    profile.update(X if args.cv else X_train)
+    impute_values = profile.medians()
+    covariance = np.cov(X if args.cv else X_train, rowvar=False, bias=True)
 
+if args.alpha is not None:
+    print("Training a ridge regression model with sklearn and alpha value {}".format(args.alpha))
+    alpha = args.alpha
+elif args.mode == "path":
+    if args.cv:
+        print("Cross-validating the ridge path for {} alpha values with {} folds".format(len(ALPHAS), args.cv))
+        mses = cross_validate(X, y, ALPHAS, folds=args.cv, workers=args.cv_workers or os.cpu_count(), random_state=RANDOM_STATE)[0].mean(axis=0)
+    else:
+        print("Computing the ridge path for {} alpha values with a single decomposition".format(len(ALPHAS)))
+        coefs, intercepts = fit_path(ALPHAS)
+        mses = score_path(coefs, intercepts)
+    for path_alpha, path_mse in zip(ALPHAS, mses):
+        print("Alpha {0:.2f}: MSE {1:0.2f}".format(path_alpha, path_mse))
+    run.log_list("alphas", ALPHAS.tolist())
+    run.log_list("mse_path", mses.tolist())
+    alpha = ALPHAS[np.argmin(mses)]
+    print("Training a ridge regression model with sklearn and best alpha value")
+else:
+    print("Training a ridge regression model with sklearn and random alpha value")
+    alpha = ALPHAS[np.random.choice(ALPHAS.shape[0], 1, replace=False)][0]
+
+# scikit-learn takes more than a second to import, with --data it is only
+# needed for the pickled model
+import sklearn
+from sklearn.linear_model import Ridge
+try:
+    import joblib
+except ImportError:
+    # scikit-learn before 0.21 vendors joblib
+    from sklearn.externals import joblib
 reg = Ridge(alpha=alpha)
-reg.fit(data["train"]["X"], data["train"]["y"])
-preds = reg.predict(data["test"]["X"])
-mse = mean_squared_error(preds, data["test"]["y"])
+if args.data:
+    # The solution of the statistics equals Ridge.fit on the same rows
+    reg.coef_, reg.intercept_ = fit_stats.solve(alpha)
+    mse = score_stats.mse_path(reg.coef_[np.newaxis, :], np.array([reg.intercept_]))[0]
+elif args.cv:
+    print("Cross-validating alpha {} with {} folds".format(alpha, args.cv))
+    cv_mse, cv_r2 = cross_validate(X, y, [alpha], folds=args.cv, workers=args.cv_workers or os.cpu_count(), random_state=RANDOM_STATE)
+    mse, mse_std, r2, r2_std = cv_mse.mean(), cv_mse.std(), cv_r2.mean(), cv_r2.std()
+    print("Cross-validation MSE is {0:0.2f} +/- {1:0.2f} and R2 is {2:0.3f} +/- {3:0.3f}".format(mse, mse_std, r2, r2_std))
+    # The final model is trained on all rows
+    reg.fit(X, y)
+else:
+    reg.fit(data["train"]["X"], data["train"]["y"])
+    preds = reg.predict(data["test"]["X"])
+    mse = mean_squared_error(preds, data["test"]["y"])
 print("Alpha is {0:.2f}, and MSE is {1:0.2f}".format(alpha, mse))
 
 print("Logging values")
 run.log("alpha", alpha)
 run.log("mse", mse)
+if args.cv:
+    run.log("mse_std", mse_std)
+    run.log("r2", r2)
+    run.log("r2_std", r2_std)
 
 print("Saving model to output folder")
-with open(MODEL_NAME, "wb") as file:
-    joblib.dump(value=reg, filename=os.path.join("./outputs/", MODEL_NAME))
+joblib.dump(value=reg, filename=os.path.join("./outputs/", MODEL_NAME))
+
+print("Saving versioned model artifact")
+arrays = {"coef": reg.coef_, "intercept": np.atleast_1d(reg.intercept_), "impute": impute_values}
+metadata = {
+    "model": type(reg).__name__,
+    "imputation": "median",
+    "alpha": float(alpha),
+    "mse": float(mse),
+    "n_features": int(reg.coef_.shape[-1]),
+    "sklearn_version": sklearn.__version__,
+    "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+}
+if args.data:
+    # Statistics and read position for a later --warm-start
+    arrays.update(train_stats.to_arrays("train_"))
+    arrays.update(test_stats.to_arrays("test_"))
+    # Rows without a target count as well, they still take their place in the train and test split
+    metadata.update({"data_rows": start_row + read_rows, "data_bytes": data_bytes,
+                     "data_prefix_crc32": prefix_checksum(args.data, data_bytes)})
+artifact_size = write_artifact(os.path.join("./outputs/", ARTIFACT_NAME), arrays, metadata=metadata, compression=args.artifact_compression)
+print("Artifact has {} bytes".format(artifact_size))
+
+print("Saving coefficients and intercept for fast startup scoring")
+np.save(os.path.join("./outputs/", COEFFICIENTS_NAME), np.append(reg.coef_, reg.intercept_))
+
+print("Saving dataset profile for input validation, drift detection and model profiling")
+profile_arrays = profile.to_arrays()
+profile_arrays["covariance"] = covariance
+profile_size = write_artifact(os.path.join("./outputs/", PROFILE_NAME), profile_arrays,
+                              metadata={"feature_names": FEATURE_NAMES, "rows": int(profile.moments.count),
+                                        "quantiles": len(profile_arrays["quantiles"]), "histogram_bins": profile.histogram.bins})
+print("Dataset profile of {} rows has {} bytes".format(profile.moments.count, profile_size))
+
+print("Saving data contract for input validation in scoring")
+shutil.copy(CONTRACT_PATH, os.path.join("./outputs/", CONTRACT_NAME))
 
 print("Training successfully completed!")
@@ -0,0 +1,301 @@
+"""
+Copyright (C) Microsoft Corporation. All rights reserved.​
+ ​
+Microsoft Corporation (“Microsoft”) grants you a nonexclusive, perpetual,
+royalty-free right to use, copy, and modify the software code provided by us
+("Software Code"). You may not sublicense the Software Code or any use of it
+(except to your affiliates and to vendors to perform work on your behalf)
+through distribution, network access, service agreement, lease, rental, or
+otherwise. This license does not purport to express any claim of ownership over
+data you may have shared with Microsoft in the creation of the Software Code.
+Unless applicable law gives you more rights, Microsoft reserves all other
+rights not expressly granted herein, whether by implication, estoppel or
+otherwise. ​
+ ​
+THE SOFTWARE CODE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+MICROSOFT OR ITS LICENSORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+ARISING IN ANY WAY OUT OF THE USE OF THE SOFTWARE CODE, EVEN IF ADVISED OF THE
+POSSIBILITY OF SUCH DAMAGE.
+"""
+import os, sys, json, time, warnings, argparse
+import numpy as np
+from dataset import FEATURE_NAMES, TARGET_NAME, read_csv_line_chunks
+
+CONTRACT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data_contract.json")
+# Values may exceed the range seen in the reference data by this fraction of the range
+RANGE_TOLERANCE = 0.1
+# Means may differ from the reference by this fraction of its standard deviation
+MEAN_TOLERANCE = 0.5
+# Standard deviations may be this factor smaller or larger than the reference
+STD_RATIO = 2.0
+# Means and standard deviations of fewer rows are not compared
+MIN_DISTRIBUTION_ROWS = 100
+# Line numbers of at most this many offending rows are reported per check
+MAX_REPORTED_LINES = 5
+
+
+def parse_chunk(lines, columns, n_fields):
+    """
+    Parses the columns of a chunk of CSV lines into a float64 array. Empty
+    or invalid fields become NaN and lines without n_fields fields are
+    dropped. Returns the array together with the indices of its rows and
+    of the dropped lines in the chunk. Chunks without either are parsed
+    by np.loadtxt alone.
+    """
+    try:
+        # Without usecols np.loadtxt raises on rows with too many fields as well
+        chunk = np.loadtxt(lines, delimiter=",", dtype=np.float64, ndmin=2)
+        if chunk.shape == (len(lines), n_fields):
+            return chunk[:, columns], np.arange(len(lines)), np.arange(0)
+    except ValueError:
+        pass
+    fields = np.array([line.count(b",") + 1 for line in lines])
+    blank = np.array([not line.strip() for line in lines], dtype=bool)
+    rows = np.flatnonzero((fields == n_fields) & ~blank)
+    malformed = np.flatnonzero((fields != n_fields) & ~blank)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        chunk = np.genfromtxt([lines[i] for i in rows], delimiter=",", usecols=columns, dtype=np.float64) if len(rows) else np.empty((0, len(columns)))
+    return chunk.reshape(-1, len(columns)), rows, malformed
+
+
+class ColumnStatistics(object):
+    """
+    Null counts, range and moments of every column, updated chunk by chunk
+    with vectorized column-wise operations. Squares are summed around
+    shift, e.g. the reference means, to avoid cancellation.
+    """
+    def __init__(self, n_columns, shift=None):
+        self.rows = 0
+        self.nulls = np.zeros(n_columns, dtype=np.int64)
+        self.count = np.zeros(n_columns, dtype=np.int64)
+        self.min = np.full(n_columns, np.inf)
+        self.max = np.full(n_columns, -np.inf)
+        self.shift = np.zeros(n_columns) if shift is None else np.asarray(shift, dtype=np.float64)
+        self.sum = np.zeros(n_columns)
+        self.sum_squares = np.zeros(n_columns)
+
+    def update(self, chunk, missing=None):
+        if missing is None:
+            missing = np.isnan(chunk)
+        nulls = missing.sum(axis=0)
+        self.rows += len(chunk)
+        self.nulls += nulls
+        self.count += len(chunk) - nulls
+        if len(chunk) == 0:
+            return
+        centered = chunk - self.shift
+        if nulls.any():
+            centered[missing] = 0.0
+            self.min = np.fmin(self.min, np.fmin.reduce(chunk, axis=0))
+            self.max = np.fmax(self.max, np.fmax.reduce(chunk, axis=0))
+        else:
+            self.min = np.minimum(self.min, chunk.min(axis=0))
+            self.max = np.maximum(self.max, chunk.max(axis=0))
+        self.sum += centered.sum(axis=0)
+        self.sum_squares += np.einsum("ij,ij->j", centered, centered)
+
+    def mean(self):
+        return self.shift + self.sum / np.maximum(self.count, 1)
+
+    def std(self):
+        count = np.maximum(self.count, 1)
+        return np.sqrt(np.maximum(self.sum_squares / count - (self.sum / count) ** 2, 0.0))
+
+
+class DataValidator(object):
+    """
+    Checks a CSV file against a data contract in a single streaming pass:
+    the header has to contain exactly the contract columns, every row has
+    to have a value in every column within the range of the reference data
+    plus RANGE_TOLERANCE, and the means and standard deviations of all
+    rows have to be close to those of the reference data. Missing values
+    of the imputed columns of the contract, which training replaces by
+    their medians, are only reported as warnings.
+    """
+    def __init__(self, contract):
+        self.columns = contract["columns"]
+        self.lower, self.upper = contract_bounds(contract, self.columns)
+        self.reference_mean, self.reference_std = np.array(contract["mean"]), np.array(contract["std"])
+        self.mean_tolerance = contract.get("mean_tolerance", MEAN_TOLERANCE)
+        self.std_ratio = contract.get("std_ratio", STD_RATIO)
+        self.imputed = np.array([name in contract.get("imputed_columns", []) for name in self.columns], dtype=bool)
+        self.statistics = ColumnStatistics(len(self.columns), shift=self.reference_mean)
+        self.out_of_range = np.zeros(len(self.columns), dtype=np.int64)
+        self.malformed = 0
+        self.errors = []
+        self.malformed_lines = []
+        self.null_lines = []
+        self.out_of_range_lines = []
+
+    def check_header(self, header):
+        missing = [name for name in self.columns if name not in header]
+        unexpected = [name for name in header if name not in self.columns]
+        if missing:
+            self.errors.append("Missing columns {}".format(missing))
+        if unexpected:
+            self.errors.append("Unexpected columns {}".format(unexpected))
+        return not missing
+
+    def update(self, chunk, lines, malformed_lines):
+        """
+        Adds a parsed chunk whose rows are on the given lines of the file.
+        """
+        self.malformed += len(malformed_lines)
+        self.malformed_lines.extend(malformed_lines[:MAX_REPORTED_LINES].tolist())
+        missing = np.isnan(chunk)
+        self.statistics.update(chunk, missing)
+        # Comparisons with NaN are False, so missing values are not out of range
+        invalid = (chunk < self.lower) | (chunk > self.upper)
+        out_of_range = invalid.sum(axis=0)
+        self.out_of_range += out_of_range
+        if len(self.null_lines) < MAX_REPORTED_LINES and missing[:, ~self.imputed].any():
+            self.null_lines.extend(lines[missing[:, ~self.imputed].any(axis=1)][:MAX_REPORTED_LINES].tolist())
+        if len(self.out_of_range_lines) < MAX_REPORTED_LINES and out_of_range.any():
+            self.out_of_range_lines.extend(lines[invalid.any(axis=1)][:MAX_REPORTED_LINES].tolist())
+
+    def report(self):
+        """
+        Returns the errors and warnings found so far and the statistics of the file.
+        """
+        errors = list(self.errors)
+        warnings = []
+        statistics = self.statistics
+        if self.malformed:
+            errors.append("{} rows with a different number of fields than the header on lines {}".format(self.malformed, self.malformed_lines[:MAX_REPORTED_LINES]))
+        if statistics.rows == 0 and not self.errors:
+            errors.append("No rows")
+        for i, name in enumerate(self.columns):
+            if statistics.nulls[i] and self.imputed[i]:
+                warnings.append("{}: {} missing values, which training replaces by the median".format(name, statistics.nulls[i]))
+            elif statistics.nulls[i]:
+                errors.append("{}: {} missing values".format(name, statistics.nulls[i]))
+            if self.out_of_range[i]:
+                errors.append("{}: {} values outside of [{:.6g}, {:.6g}], range of the data is [{:.6g}, {:.6g}]".format(
+                    name, self.out_of_range[i], self.lower[i], self.upper[i], statistics.min[i], statistics.max[i]))
+        if self.null_lines:
+            errors.append("Missing values on lines {}".format(self.null_lines[:MAX_REPORTED_LINES]))
+        if self.out_of_range_lines:
+            errors.append("Values out of range on lines {}".format(self.out_of_range_lines[:MAX_REPORTED_LINES]))
+        mean, std = statistics.mean(), statistics.std()
+        for i, name in enumerate(self.columns):
+            if statistics.count[i] < MIN_DISTRIBUTION_ROWS:
+                continue
+            if abs(mean[i] - self.reference_mean[i]) > self.mean_tolerance * self.reference_std[i]:
+                errors.append("{}: mean {:.6g} differs from the reference mean {:.6g} by more than {} standard deviations".format(
+                    name, mean[i], self.reference_mean[i], self.mean_tolerance))
+            if not self.reference_std[i] / self.std_ratio <= std[i] <= self.reference_std[i] * self.std_ratio:
+                errors.append("{}: standard deviation {:.6g} is not within a factor {} of the reference {:.6g}".format(
+                    name, std[i], self.std_ratio, self.reference_std[i]))
+        return {
+            "valid": not errors,
+            "errors": errors,
+            "warnings": warnings,
+            "rows": int(statistics.rows + self.malformed),
+            "columns": {name: {"nulls": int(statistics.nulls[i]), "min": float(statistics.min[i]), "max": float(statistics.max[i]),
+                               "mean": float(mean[i]), "std": float(std[i])} if statistics.count[i] else {"nulls": int(statistics.nulls[i])}
+                        for i, name in enumerate(self.columns)}
+        }
+
+
+def contract_bounds(contract, columns):
+    """
+    Returns the lowest and highest valid value of the given columns, the
+    range of the reference data widened by the range tolerance.
+    """
+    indices = [contract["columns"].index(name) for name in columns]
+    reference_min, reference_max = np.array(contract["min"])[indices], np.array(contract["max"])[indices]
+    tolerance = contract.get("range_tolerance", RANGE_TOLERANCE) * (reference_max - reference_min)
+    return reference_min - tolerance, reference_max + tolerance
+
+
+def read_header(path):
+    with open(path, "rb") as f:
+        return f.readline().decode("utf-8").strip().split(",")
+
+
+def scan_file(path, columns, chunk_rows, update):
+    """
+    Calls update(chunk, lines, malformed_lines) for every chunk of the
+    columns of a CSV file with the line numbers of its rows and of the
+    rows that could not be parsed.
+    """
+    header = read_header(path)
+    # The header is line 1
+    first_line = 2
+    for indices, lines in read_csv_line_chunks(path, chunk_rows, feature_names=columns[:-1], target_name=columns[-1]):
+        chunk, rows, malformed = parse_chunk(lines, indices, len(header))
+        update(chunk, first_line + rows, first_line + malformed)
+        first_line += len(lines)
+
+
+def validate_file(path, contract=None, chunk_rows=100000):
+    """
+    Validates a CSV file against a data contract, by default the one
+    learned from diabetes.csv, and returns a report with all errors.
+    """
+    if contract is None:
+        contract = load_contract()
+    validator = DataValidator(contract)
+    if validator.check_header(read_header(path)):
+        scan_file(path, validator.columns, chunk_rows, validator.update)
+    return validator.report()
+
+
+def learn_contract(path, chunk_rows=100000, columns=FEATURE_NAMES + [TARGET_NAME]):
+    """
+    Returns the data contract of a CSV file: its columns together with the
+    range, mean and standard deviation of every column. The features are
+    marked as imputed columns, as training replaces their missing values.
+    """
+    statistics = ColumnStatistics(len(columns))
+    scan_file(path, columns, chunk_rows, lambda chunk, lines, malformed_lines: statistics.update(chunk))
+    if statistics.nulls.any():
+        raise ValueError("{} has missing values and can't be used as reference".format(path))
+    return {
+        "columns": columns,
+        "imputed_columns": columns[:-1],
+        "rows": int(statistics.rows),
+        "min": statistics.min.tolist(),
+        "max": statistics.max.tolist(),
+        "mean": statistics.mean().tolist(),
+        "std": statistics.std().tolist(),
+        "range_tolerance": RANGE_TOLERANCE,
+        "mean_tolerance": MEAN_TOLERANCE,
+        "std_ratio": STD_RATIO
+    }
+
+
+def load_contract(path=CONTRACT_PATH):
+    with open(path) as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validates CSV files against the data contract of the training data")
+    parser.add_argument("data", nargs="+", help="CSV files to validate")
+    parser.add_argument("--contract", type=str, default=CONTRACT_PATH, help="Data contract to validate against")
+    parser.add_argument("--learn", action="store_true", help="Write the contract learned from the first file instead of validating")
+    parser.add_argument("--chunk-rows", type=int, default=100000, dest="chunk_rows", help="Rows validated at once")
+    args = parser.parse_args()
+
+    if args.learn:
+        print("Learning data contract from {}".format(args.data[0]), file=sys.stderr)
+        with open(args.contract, "w") as f:
+            json.dump(learn_contract(args.data[0], chunk_rows=args.chunk_rows), f, indent=4)
+        sys.exit(0)
+    contract = load_contract(args.contract)
+    valid = True
+    for path in args.data:
+        start = time.perf_counter()
+        report = validate_file(path, contract, chunk_rows=args.chunk_rows)
+        report.update({"file": path, "seconds": round(time.perf_counter() - start, 3)})
+        print(json.dumps(report))
+        valid = valid and report["valid"]
+    sys.exit(0 if valid else 1)